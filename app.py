@@ -1,16 +1,32 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
 from datetime import datetime
-import requests
-import json
 import os
 from streamlit_cookies_manager import EncryptedCookieManager
+from freight.route_index import get_route_index, invalidate_route_index
+from freight.distance_matrix import get_distance_matrix
+from freight.distance_store import open_distance_store
+from freight.additional_costs import UNITS as ADDITIONAL_COST_UNITS, compile_additional_costs
+from freight.bulk_import import import_distance_file
+from freight.route_graph import reachable_ports
+from freight.port_search import get_port_search_index
+from freight.geo_estimate import DEFAULT_DETOUR_FACTOR, get_port_coordinates
+from freight.monte_carlo import DISTRIBUTIONS, SIMULATION_INPUTS, TRIANGULAR, simulate
+from freight.page_assets import load_page_asset
+from freight.profit_scenario import AXES, FREIGHT, format_scenarios, profit_scenarios, scenario_title
+from freight.rate_card import RETURN_TO_POL, get_rate_card, rate_card_classes
+from freight.result_cache import get_result_cache, input_key
+from freight.route_ranking import MARGIN, RANK_BY, TCE as RANKING_TCE, rank_routes
+from freight.solvers import SOLVE_FOR, solve
+from freight.speed_optimizer import TCE, frontier_figure, optimize_speed, speed_sweep
+from freight.sensitivity import METRICS, sensitivity_grid, tornado_figure, tornado_table
+from freight.vessel_registry import diff_overrides, get_vessel_registry, save_vessel
+from freight.voyage_graph import VoyageGraph
+from freight.voyage_legs import (
+    BALLAST, LADEN,
+    compute_legs, resolve_route, resolve_rotation, rotation_dataframe, summarize_rotation
+)
 
 cookies = EncryptedCookieManager(
     prefix="freight_app",
@@ -29,58 +45,85 @@ if cookies.get("hide_intro") == "true":
     st.session_state.hide_intro = True
 
 DATA_FILE = "distance_data.json"
+DB_FILE = "distance_data.db"
+MATRIX_FILE = "distance_data.mat"
+COORD_FILE = "port_coordinates.json"
+VESSEL_FILE = "vessel_registry.json"
+VESSEL_CLASS_DEFAULT = "(Class default)"
+PAGE_HEAD_FILE = "assets/page_head.html"
+
+# input sidebar (panel vessel) yang dibaca perhitungan, urutan = unpack di STATE HANDOFF
+VESSEL_INPUTS = [
+    "speed_laden", "speed_ballast", "consumption", "price_fuel", "consumption_fw", "price_fw",
+    "charter", "crew", "insurance", "docking", "maintenance", "certificate", "premi_nm", "other_cost",
+    "port_cost_pol", "port_cost_pod", "asist_tug", "opex_office", "depreciation_kapal",
+    "port_stay_pol", "port_stay_pod",
+]
+
+# profit scenario di PDF dipecah per table (~1 halaman)
+PDF_ROWS_PER_TABLE = 45
+
+# "sqlite" (default) atau "json" (file lama, tanpa database)
+DISTANCE_BACKEND = os.environ.get("FREIGHT_DISTANCE_BACKEND", "sqlite")
+
+distance_store = open_distance_store(DISTANCE_BACKEND, DATA_FILE, DB_FILE)
+
+def get_matrix():
+    # mmap, dipakai bareng semua session & process; rebuild kalau store berubah
+    return get_distance_matrix(distance_store, MATRIX_FILE)
+
+def lazy_route_index():
+    # RouteIndex (dict) cuma dibangun kalau perlu multi-leg
+    return get_route_index(distance_store)
+
+def find_route(pol, pod):
+    # return (distance, path, estimated)
+    # tabel (matrix) -> multi-leg -> estimasi great-circle x detour factor
+    return resolve_route(
+        lazy_route_index, get_port_coordinates(COORD_FILE), pol, pod,
+        st.session_state.get("detour_factor", DEFAULT_DETOUR_FACTOR), matrix=get_matrix()
+    )
 
 def find_distance(pol, pod):
-    data = load_distances()
-
-    pol = (pol or "").strip().upper()
-    pod = (pod or "").strip().upper()
+    return find_route(pol, pod)[0]
 
-    for route, distance in data.items():
-        try:
-            p, d = route.split(" - ")
-
-            p = p.strip().upper()
-            d = d.strip().upper()
-
-            # ✅ normal match
-            if p == pol and d == pod:
-                return distance
+def resolve_legs(ports):
+    return resolve_rotation(
+        lazy_route_index, get_port_coordinates(COORD_FILE), ports,
+        st.session_state.get("detour_factor", DEFAULT_DETOUR_FACTOR), matrix=get_matrix()
+    )
 
-            # 🔥 reverse match (INI KUNCI FIX LU)
-            if p == pod and d == pol:
-                return distance
+def format_route_path(path, sep=" → "):
+    return sep.join(path)
 
-        except:
-            continue
+def load_distances():
+    return distance_store.load_all()
 
-    return 0
 
-def load_distances():
-    if not os.path.exists(DATA_FILE):
-        return {}
+def save_distances(data):
+    # façade lama: cuma row yang berubah yang ditulis ke store
+    distance_store.replace_all(data)
 
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    # 🔥 index lama dibuang, rebuild di lookup berikutnya
+    invalidate_route_index(distance_store)
 
+def add_distance(route, distance):
+    # 1 row insert, False kalau route (arah mana saja) sudah ada
+    added = distance_store.add_route(route, distance)
+    invalidate_route_index(distance_store)
+    return added
 
-def save_distances(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def delete_distance(route):
+    deleted = distance_store.delete_route(route)
+    invalidate_route_index(distance_store)
+    return deleted
 
 def get_all_ports():
-    data = load_distances()
-    ports = set()
-
-    for route in data.keys():
-        try:
-            pol, pod = route.split(" - ")
-            ports.add(pol.upper())
-            ports.add(pod.upper())
-        except:
-            continue
+    return get_matrix().ports
 
-    return sorted(list(ports))
+def search_ports(query, limit=20):
+    # ranking fuzzy (typo, alias "SIP, Kuala Cenaku" -> "kuala cenaku")
+    return get_port_search_index(get_matrix()).search(query, limit)
 
 
 # ==========================================================
@@ -92,223 +135,11 @@ st.set_page_config(
     layout="wide"
 )
 
-st.markdown("""
-<style>
-
-/* Base font */
-html, body, [class*="css"]  {
-    font-size: 13px !important;
-}
-
-/* Label */
-label {
-    font-size: 12px !important;
-}
-
-/* Input text & number */
-input, select {
-    font-size: 13px !important;
-}
-
-/* Button */
-button {
-    font-size: 13px !important;
-    padding: 6px 10px !important;
-}
-
-/* Metric / big text */
-h1, h2, h3 {
-    font-size: 16px !important;
-}
-
-/* Caption kecil */
-.small-text {
-    font-size: 11px !important;
-    color: #666;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* 🔥 BUTTON CALCULATE UTAMA */
-div.stButton > button {
-    background: linear-gradient(135deg, #6495ED, #FFFFFF, #6495ED);
-    color: Black;
-    font-weight: bold;
-    border-radius: 12px;
-    height: 48px;
-    font-size: 14px;
-    border: none;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.35);
-}
-
-/* 🔥 EFFECT HOVER */
-div.stButton > button:hover {
-    background: linear-gradient(135deg, #6495ED, #FFFFFF, #6495ED);
-    color: Black;
-    font-weight: bold;
-    border-radius: 12px;
-    height: 48px;
-    font-size: 14px;
-    border: none;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.35);
-}
-
-/* 🔥 BIAR ADA JARAK DI HP */
-div.stButton {
-    margin-top: 10px;
-    margin-bottom: 10px;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ===== FIX RESULT BOX DARK MODE ===== */
-
-div[data-testid="stAlert"] {
-    color: white !important;
-}
-
-/* SUCCESS */
-div[data-testid="stAlert"][kind="success"] {
-    background-color: #1b5e20 !important;
-    border-left: 5px solid #00e676 !important;
-}
-
-/* WARNING */
-div[data-testid="stAlert"][kind="warning"] {
-    background-color: #ff8f00 !important;
-    border-left: 5px solid #ffd54f !important;
-}
-
-/* ERROR */
-div[data-testid="stAlert"][kind="error"] {
-    background-color: #b71c1c !important;
-    border-left: 5px solid #ff5252 !important;
-}
-
-/* FORCE TEXT ALWAYS VISIBLE */
-html, body, [class*="css"] {
-    color: #f5f5f5 !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ===== LOGIN BUTTON (BIRU) ===== */
-div.stButton > button[kind="primary"] {
-    background: #2563eb !important;
-    color: white !important;
-    border-radius: 10px !important;
-    height: 42px !important;
-    font-weight: 600 !important;
-    border: none !important;
-}
-
-/* hover login */
-div.stButton > button[kind="primary"]:hover {
-    background: #1d4ed8 !important;
-}
-
-/* ===== CREATE ACCOUNT (KOTAK POLOS) ===== */
-div.stButton > button[kind="secondary"] {
-    background: transparent !important;   /* ❌ tidak ada warna */
-    color: #2563eb !important;
-    border: 1px solid #cbd5e1 !important; /* kotak tetap ada */
-    border-radius: 10px !important;
-    height: 42px !important;
-    font-weight: 500 !important;
-    box-shadow: none !important;
-}
-
-/* hover tetap soft */
-div.stButton > button[kind="secondary"]:hover {
-    background: #f8fafc !important;
-    border-color: #2563eb !important;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-
-/* ===== CONTAINER ===== */
-div[role="radiogroup"] {
-    display: flex;
-    gap: 8px;
-    width: 100%;
-}
-
-/* ===== DEFAULT OPTION ===== */
-div[role="radiogroup"] label {
-    flex: 1;
-    text-align: center;
-    padding: 8px 10px;
-    border-radius: 10px;
-    background: #f1f5f9;
-    border: 1px solid #e2e8f0;
-    cursor: pointer;
-    transition: all 0.2s ease;
-    font-size: 12px;
-    color: #334155;
-}
-
-/* hide radio dot */
-div[role="radiogroup"] input {
-    display: none;
-}
-
-/* 🔥 ACTIVE (SELECTED) */
-div[role="radiogroup"] label:has(input:checked) {
-    background: #2563eb !important;
-    color: white !important;
-    font-weight: 600;
-    box-shadow: 0 4px 10px rgba(37,99,235,0.35);
-    transform: scale(1.05);
-    border: none;
-}
-
-/* hover */
-div[role="radiogroup"] label:hover {
-    background: #e2e8f0;
-}
-
-</style>
-""", unsafe_allow_html=True)
-
-
-# ==========================================================
-# 🔧 PWA Support — biar bisa di-install di HP
-# ==========================================================
-st.markdown("""
-<link rel="manifest" href="https://raw.githubusercontent.com/muhammadiqnaa-png/freight-calculator/main/manifest.json">
-<script>
-if ('serviceWorker' in navigator) {
-  navigator.serviceWorker.register('https://raw.githubusercontent.com/muhammadiqnaa-png/freight-calculator/main/service-worker.js')
-    .then(reg => console.log("Service worker registered:", reg))
-    .catch(err => console.log("Service worker failed:", err));
-}
-</script>
-""", unsafe_allow_html=True)
-
 # ==========================================================
-# 🍎 iPhone (Safari) Support — tambahan meta
+# 🎨 CSS + PWA + iPhone meta -> assets/page_head.html
+# - dibaca 1x per process (freight/page_assets.py), 1 element per run
 # ==========================================================
-st.markdown("""
-<meta name="apple-mobile-web-app-capable" content="yes">
-<meta name="apple-mobile-web-app-status-bar-style" content="black-translucent">
-<meta name="apple-mobile-web-app-title" content="FreightCalc">
-""", unsafe_allow_html=True)
+st.markdown(load_page_asset(PAGE_HEAD_FILE), unsafe_allow_html=True)
 
 
 # ====== FIREBASE AUTH ======
@@ -317,10 +148,14 @@ AUTH_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPasswo
 REGISTER_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_API_KEY}"
 
 def login_user(email, password):
+    import requests  # lazy: cuma dipakai saat login / register
+
     res = requests.post(AUTH_URL, json={"email": email, "password": password, "returnSecureToken": True})
     return res.ok, res.json()
 
 def register_user(email, password):
+    import requests
+
     res = requests.post(REGISTER_URL, json={"email": email, "password": password, "returnSecureToken": True})
     return res.ok, res.json()
 
@@ -540,81 +375,15 @@ if not st.session_state.logged_in:
 
         st.stop()
 
+# 🐢 pandas baru di-import setelah login -> intro / login page tampil lebih cepat
+import pandas as pd
+
 # ==========================================================
 # ⚙️ PRESET PARAMETER KAPAL (non-intrusive)
 # - ditaruh di expander sidebar yang default tertutup
 # - tidak mengubah layout main / posisi expander lain
 # ==========================================================
-preset_params = {
-    "270 ft": {
-        "speed_laden": 3, "speed_ballast": 4,
-        "consumption": 85, "price_fuel": 25000,
-        "consumption_fw": 2, "price_fw": 120000,
-        "charter": 0, "crew": 60000000, "insurance": 40000000,
-        "docking": 40000000, "maintenance": 40000000,
-        "certificate": 40000000, "premi_nm": 50000, "other_cost": 10000000,
-        "port_cost_pol": 35000000, "port_cost_pod": 35000000, "asist_tug": 0,
-        "port_stay_pol": 4, "port_stay_pod": 4
-    },
-    "300 ft": {
-        "speed_laden": 3, "speed_ballast": 4,
-        "consumption": 115, "price_fuel": 25000,
-        "consumption_fw": 2, "price_fw": 120000,
-        "charter": 0, "crew": 60000000, "insurance": 50000000,
-        "docking": 50000000, "maintenance": 50000000,
-        "certificate": 45000000, "premi_nm": 50000, "other_cost": 15000000,
-        "port_cost_pol": 35000000, "port_cost_pod": 35000000, "asist_tug": 0,
-        "port_stay_pol": 5, "port_stay_pod": 5
-    },
-    "330 ft": {
-        "speed_laden": 3, "speed_ballast": 4,
-        "consumption": 130, "price_fuel": 25000,
-        "consumption_fw": 2, "price_fw": 120000,
-        "charter": 0, "crew": 60000000, "insurance": 60000000,
-        "docking": 60000000, "maintenance": 60000000,
-        "certificate": 50000000, "premi_nm": 50000, "other_cost": 20000000,
-        "port_cost_pol": 35000000, "port_cost_pod": 35000000, "asist_tug": 0,
-        "port_stay_pol": 5, "port_stay_pod": 5
-    },
-    "Custom": {
-        "speed_laden": 0, "speed_ballast": 0,
-        "consumption": 0, "price_fuel": 0,
-        "consumption_fw": 0, "price_fw": 0,
-        "charter": 0, "crew": 0, "insurance": 0,
-        "docking": 000, "maintenance": 0,
-        "certificate": 0, "premi_nm": 0, "other_cost": 0,
-        "port_cost_pol": 0, "port_cost_pod": 0, "asist_tug": 0,
-        "port_stay_pol": 0, "port_stay_pod": 0
-    }
-}
-
-
-cargo_qty_default = {
-    "270 ft": {
-        "Coal (MT)": 5500,
-        "Nickel (MT)": 5500,
-        "Bauxite (MT)": 5500,
-        "Sand (M3)": 3500,
-        "Split (M3)": 3500
-    },
-    "300 ft": {
-        "Coal (MT)": 7500,
-        "Nickel (MT)": 7500,
-        "Bauxite (MT)": 7500,
-        "Sand (M3)": 4700,
-        "Split (M3)": 5000
-    },
-    "330 ft": {
-        "Coal (MT)": 11500,
-        "Nickel (MT)": 11500,
-        "Bauxite (MT)": 11500,
-        "Sand (M3)": 6000,
-        "Split (M3)": 6500
-    }
-}
-
-def get_default_cargo(barge, cargo_type):
-    return float(cargo_qty_default.get(barge, {}).get(cargo_type, 0))
+# preset_params, cargo_qty_default & get_default_cargo -> freight/presets.py
 
 # ==== PRESET SEGMEN ====
 
@@ -624,84 +393,32 @@ if "preset_selected" not in st.session_state:
 
 
 def get_pods_by_pol(pol):
-    data = load_distances()
-    pol = (pol or "").strip().upper()
-
-    pods = set()
-
-    for route in data.keys():
-        try:
-            p, d = route.split(" - ")
-
-            p = p.strip().upper()
-            d = d.strip().upper()
-
-            # ✅ normal direction
-            if p == pol:
-                pods.add(d)
-
-            # 🔥 reverse direction (INI KUNCINYA)
-            elif d == pol:
-                pods.add(p)
-
-        except:
-            continue
-
-    return sorted(list(pods))
+    # neighbour list sudah termasuk arah balik & sudah sorted
+    return get_matrix().neighbours_of(pol)
 
 def get_next_by_pod(pod):
-    data = load_distances()
-    pod = (pod or "").strip().upper()
-
-    next_ports = set()
-
-    for route in data.keys():
-        try:
-            p, d = route.split(" - ")
-
-            p = p.strip().upper()
-            d = d.strip().upper()
-
-            # maju
-            if p == pod:
-                next_ports.add(d)
-
-            # 🔥 balik
-            elif d == pod:
-                next_ports.add(p)
-
-        except:
-            continue
-
-    return sorted(list(next_ports))
-
+    return get_matrix().neighbours_of(pod)
 
-# ==== APPLY PRESET (ONLY ONCE) ====
-if "preset_applied" not in st.session_state:
-    st.session_state.preset_applied = False
+def get_reachable_ports(port):
+    # semua port yang bisa dicapai via multi-leg + port yang punya koordinat (estimasi)
+    ports = set(reachable_ports(get_route_index(distance_store), port))
+    ports.update(get_port_coordinates(COORD_FILE).ports)
+    ports.discard((port or "").strip().upper())
+    return sorted(ports)
 
 
-def apply_preset():
-    selected = st.session_state.get("preset_control")
-
-    if selected not in preset_params:
-        return
-
-    chosen = preset_params.get(selected)
-    if not chosen:
-        return
-
-    for k, v in chosen.items():
-        st.session_state[k] = v
-
 st.sidebar.markdown("### 🚢 Barge Class")
 
-options = ["270 ft", "300 ft", "330 ft", "Custom"]
+# class dari registry (preset bawaan + class tambahan di vessel_registry.json), Custom paling akhir
+vessel_registry = get_vessel_registry(VESSEL_FILE)
+options = sorted(vessel_registry.classes, key=lambda barge: barge == "Custom")
 
-if "preset_control" not in st.session_state:
-    st.session_state.preset_control = "270 ft"
+# class hilang dari registry (file diedit) -> balik ke class pertama
+if st.session_state.get("preset_control") not in options:
+    st.session_state.preset_control = options[0]
 
-cols = st.sidebar.columns(4)
+# 4 tombol per baris
+cols = [col for row in range(0, len(options), 4) for col in st.sidebar.columns(4)]
 
 for i, opt in enumerate(options):
 
@@ -724,9 +441,24 @@ for i, opt in enumerate(options):
         
 selected = st.session_state.preset_control
 
-if selected in preset_params:
-    for k, v in preset_params[selected].items():
-        st.session_state[k] = v
+# ===== VESSEL (registry, freight/vessel_registry.py) =====
+# session cuma simpan ref vessel + override; nilai default dibaca dari registry (shared, read-only)
+if "vessel_saved" in st.session_state:
+    st.session_state[f"vessel_{selected}"] = st.session_state.pop("vessel_saved")
+vessel_choice = st.sidebar.selectbox(
+    "Vessel", [VESSEL_CLASS_DEFAULT] + vessel_registry.vessels_of(selected), key=f"vessel_{selected}"
+)
+vessel_ref = selected if vessel_choice == VESSEL_CLASS_DEFAULT else vessel_choice
+
+if st.session_state.get("vessel_ref") != vessel_ref:
+    st.session_state.vessel_ref = vessel_ref
+    st.session_state.vessel_overrides = {}
+vessel_base = vessel_registry.base(vessel_ref)
+
+
+def vessel_key(name):
+    # widget per vessel -> ganti vessel = nilai vessel itu, edit tetap tersimpan per vessel
+    return f"{name}_{vessel_ref}"
 
 st.session_state.preset_selected = st.session_state.preset_control
 
@@ -735,200 +467,315 @@ st.session_state.preset_selected = st.session_state.preset_control
 mode = st.sidebar.selectbox("Mode", ["Owner", "Charter"])
 
 
-with st.sidebar.expander("➕ Add Distance"):
+# ==========================================================
+# 🧩 SIDEBAR PANELS (st.fragment)
+# - tiap panel rerun sendiri -> edit 1 input / browse route tidak
+#   menjalankan ulang seluruh script (CSS, cookie, port list, dll)
+# - hasil panel diserahkan ke perhitungan lewat st.session_state
+#   (vessel_overrides, additional_costs); dibaca saat full run
+# - data distance berubah (save / import / delete) -> full rerun,
+#   karena list POL / POD di main page ikut berubah
+# ==========================================================
+
+@st.fragment
+def add_distance_panel():
+    with st.expander("➕ Add Distance"):
 
-    pol_new = st.text_input("POL", key="new_pol")
-    pod_new = st.text_input("POD", key="new_pod")
-    distance_new = st.number_input("Distance (NM)", min_value=0.0, key="new_distance")
+        if "distance_saved" in st.session_state:
+            st.success(st.session_state.pop("distance_saved"))
 
-    if st.button("💾 Save Distance"):
+        pol_new = st.text_input("POL", key="new_pol")
+        pod_new = st.text_input("POD", key="new_pod")
+        distance_new = st.number_input("Distance (NM)", min_value=0.0, key="new_distance")
 
-        if pol_new and pod_new and distance_new > 0:
+        if st.button("💾 Save Distance"):
 
-            data = load_distances()
+            if pol_new and pod_new and distance_new > 0:
 
-            key = f"{pol_new.upper()} - {pod_new.upper()}"
+                key = f"{pol_new.upper()} - {pod_new.upper()}"
 
-            if key in data:
-                st.warning("⚠️ Route sudah ada!")
+                if not add_distance(key, distance_new):
+                    st.warning("⚠️ Route sudah ada!")
+                else:
+                    # route baru -> port list main page berubah -> full rerun
+                    st.session_state.distance_saved = "✅ Distance berhasil disimpan!"
+                    st.rerun()
             else:
-                data[key] = distance_new
-                save_distances(data)
+                st.error("❌ Semua field wajib diisi!")
 
-                st.success("✅ Distance berhasil disimpan!")
-        else:
-            st.error("❌ Semua field wajib diisi!")
 
+@st.fragment
+def import_distance_panel():
+    with st.expander("📤 Import Distance (CSV/XLSX)"):
 
-with st.sidebar.expander("📋 Saved Distance"):
+        st.caption("Kolom: POL, POD, Distance (atau Route, Distance)")
 
-    data = load_distances()
+        # hasil import terakhir (setelah full rerun)
+        report = st.session_state.pop("import_report", None)
+        if report is not None:
+            st.success(
+                f"✅ {report['accepted']} route baru, {report['updated']} diupdate, "
+                f"{report['duplicates']} duplikat dilewati"
+            )
+            if report["conflicts"] or report["rejected"]:
+                st.warning(
+                    f"⚠️ {report['conflicts']} bentrok, {report['rejected']} ditolak\n\n"
+                    + "\n".join(f"- {m}" for m in report["messages"])
+                )
 
-    # ===== NOTIF (MUNCUL SETELAH DELETE) =====
-    if st.session_state.delete_success:
-        st.success("Distance berhasil dihapus 🚀")
-        st.session_state.delete_success = False
+        upload_file = st.file_uploader("File", type=["csv", "xlsx"], key="import_file")
+        update_existing = st.checkbox("Overwrite distance yang beda", key="import_update")
 
-    if not data:
-        st.info("Belum ada data distance")
+        if st.button("📥 Import", use_container_width=True):
 
-    else:
-        routes = list(data.keys())
+            if upload_file is None:
+                st.error("❌ Pilih file dulu!")
+            else:
+                try:
+                    report = import_distance_file(
+                        distance_store, upload_file, upload_file.name,
+                        update_existing=update_existing
+                    )
+                except Exception as e:
+                    st.error(f"❌ Import gagal: {e}")
+                else:
+                    invalidate_route_index(distance_store)
 
-        selected_route = st.selectbox(
-            "Pilih route",
-            routes
-        )
+                    st.session_state.import_report = report
+                    st.rerun()
 
-        # ===== RESET CONFIRM KALAU GANTI ROUTE =====
-        if st.session_state.last_route != selected_route:
-            st.session_state.confirm_delete = False
-            st.session_state.last_route = selected_route
 
-        st.caption(f"Distance: {data[selected_route]:,.0f} NM")
+def set_confirm_delete(value):
+    # callback: state diubah sebelum panel dirender ulang (tanpa st.rerun)
+    st.session_state.confirm_delete = value
 
-        # ===== STEP 1: BUTTON DELETE =====
-        if not st.session_state.confirm_delete:
-            if st.button("🗑️ Delete Distance", use_container_width=True):
-                st.session_state.confirm_delete = True
-                st.rerun()
 
-        # ===== STEP 2: KONFIRMASI =====
+@st.fragment
+def saved_distance_panel():
+    with st.expander("📋 Saved Distance"):
+
+        data = load_distances()
+
+        # ===== NOTIF (MUNCUL SETELAH DELETE) =====
+        if st.session_state.delete_success:
+            st.success("Distance berhasil dihapus 🚀")
+            st.session_state.delete_success = False
+
+        if not data:
+            st.info("Belum ada data distance")
+
         else:
-            st.warning("⚠️ Yakin mau hapus data ini?")
+            routes = list(data.keys())
 
-            col1, col2 = st.columns(2)
+            selected_route = st.selectbox(
+                "Pilih route",
+                routes
+            )
 
-            with col1:
-                if st.button("❌ Cancel", use_container_width=True):
-                    st.session_state.confirm_delete = False
-                    st.rerun()
+            # ===== RESET CONFIRM KALAU GANTI ROUTE =====
+            if st.session_state.last_route != selected_route:
+                st.session_state.confirm_delete = False
+                st.session_state.last_route = selected_route
 
-            with col2:
-                if st.button("✅ Confirm Delete", use_container_width=True):
+            st.caption(f"Distance: {data[selected_route]:,.0f} NM")
 
-                    del data[selected_route]
-                    save_distances(data)
+            # ===== STEP 1: BUTTON DELETE =====
+            if not st.session_state.confirm_delete:
+                st.button("🗑️ Delete Distance", use_container_width=True, on_click=set_confirm_delete, args=(True,))
 
-                    # 🔥 TRIGGER NOTIF
-                    st.session_state.delete_success = True
-                    st.session_state.confirm_delete = False
+            # ===== STEP 2: KONFIRMASI =====
+            else:
+                st.warning("⚠️ Yakin mau hapus data ini?")
 
-                    st.rerun()
+                col1, col2 = st.columns(2)
 
-# ===== SIDEBAR PARAMETERS =====
-with st.sidebar.expander("⚙️ Operational Input", expanded=False):
-    
-    speed_laden = st.number_input(
-        "Speed Laden (knot)",
-        value=float(st.session_state.get("speed_laden", 0)),
-        step=0.1,
-        format="%.2f"
-    )
-    speed_ballast = st.number_input(
-        "Speed Ballast (knot)",
-        value=float(st.session_state.get("speed_ballast", 0)),
-        step=0.1,
-        format="%.2f"
-    )
-    consumption = st.number_input("Fuel Consumption (L/hr)", value=st.session_state.get("consumption", 0))
-    price_fuel = st.number_input("Fuel Price (Rp/L)", value=st.session_state.get("price_fuel", 0))
-
-    consumption_fw = st.number_input("FW Consumption (Ton/Day)", value=st.session_state.get("consumption_fw", 0))
-    price_fw = st.number_input("FW Price (Rp/Ton)", value=st.session_state.get("price_fw", 0))
-
-if mode == "Owner":
-    with st.sidebar.expander("🏗️ Cost (Owner)", expanded=False):
-        charter = st.number_input("Angsuran (Rp/Month)", value=st.session_state.get("charter", 0))
-        crew = st.number_input("Crew (Rp/Month)", value=st.session_state.get("crew", 0))
-        insurance = st.number_input("Insurance (Rp/Month)", value=st.session_state.get("insurance", 0))
-        docking = st.number_input("Docking (Rp/Month)", value=st.session_state.get("docking", 0))
-        maintenance = st.number_input("Maintenance (Rp/Month)", value=st.session_state.get("maintenance", 0))
-        certificate = st.number_input("Certificate (Rp/Month)", value=st.session_state.get("certificate", 0))
-        premi_nm = st.number_input("Premi (Rp/NM)", value=st.session_state.get("premi_nm", 0))
-        other_cost = st.number_input("Other Cost (Rp)", value=st.session_state.get("other_cost", 0))
-else:
-    with st.sidebar.expander("🏗️ Cost (Charter)", expanded=False):
-        charter = st.number_input("Charter Hire (Rp/Month)", value=st.session_state.get("charter", 0))
-        premi_nm = st.number_input("Premi (Rp/NM)", value=st.session_state.get("premi_nm", 0))
-        other_cost = st.number_input("Other Cost (Rp)", value=st.session_state.get("other_cost", 0))
-
-with st.sidebar.expander("⚓ Port Cost"):
-    port_cost_pol = st.number_input("Port Cost POL (Rp)", value=st.session_state.get("port_cost_pol", 0))
-    port_cost_pod = st.number_input("Port Cost POD (Rp)", value=st.session_state.get("port_cost_pod", 0))
-    asist_tug = st.number_input("Asist Tug (Rp)", value=st.session_state.get("asist_tug", 0))
-
-with st.sidebar.expander("🏢 General Overhead"):
-    opex_office = st.number_input(
-        "Opex (Rp/Month)",
-        value=st.session_state.get("opex_office", 0)
-    )
-    depreciation_kapal = st.number_input(
-        "Depreciation Kapal (Rp/Month)",
-        value=st.session_state.get("depreciation_kapal", 0)
-    )
+                with col1:
+                    st.button("❌ Cancel", use_container_width=True, on_click=set_confirm_delete, args=(False,))
 
-with st.sidebar.expander("🕓 Port Stay"):
-    port_stay_pol = st.number_input("POL (Days)", value=st.session_state.get("port_stay_pol", 0))
-    port_stay_pod = st.number_input("POD (Days)", value=st.session_state.get("port_stay_pod", 0))
-
-# ===== ADDITIONAL COST =====
-with st.sidebar.expander("➕ Additional Cost"):
-    if "additional_costs" not in st.session_state:
-        st.session_state.additional_costs = []
-
-    add_new = st.button("➕ Add Additional Cost")
-    if add_new:
-        st.session_state.additional_costs.append({
-            "name": "",
-            "price": 0,
-            "unit": "Ltr",
-            "subtype": "Day",
-            "consumption": 0
-        })
-
-    updated_costs = []
-    unit_options = ["Ltr", "Ton", "Month", "Voyage", "MT", "M3", "Day"]
-
-    for i, cost in enumerate(st.session_state.additional_costs):
-        st.markdown(f"**Additional Cost {i+1}**")
-        col1, col2 = st.columns(2)
-        with col1:
-            name = st.text_input(f"Name {i+1}", cost.get("name", ""), key=f"name_{i}")
-            price = st.number_input(f"Price {i+1} (Rp)", cost.get("price", 0), key=f"price_{i}")
-        with col2:
-            unit = st.selectbox(
-                f"Unit {i+1}",
-                unit_options,
-                index=unit_options.index(cost.get("unit", "Ltr")) if cost.get("unit", "Ltr") in unit_options else 0,
-                key=f"unit_{i}"
-            )
-            subtype = "Day"
-            if unit in ["Ltr", "Ton"]:
-                subtype = st.selectbox(
-                    f"Type {i+1}",
-                    ["Day", "Hour"],
-                    index=["Day", "Hour"].index(cost.get("subtype", "Day")),
-                    key=f"subtype_{i}"
-                )
-            additional_consumption = 0
-            if unit in ["Ltr", "Ton"]:
-                additional_consumption = st.number_input(
-                    f"Consumption {i+1} ({unit}/{subtype})",
-                    cost.get("consumption", 0),
-                    key=f"additional_consumption_{i}"
-                )
+                with col2:
+                    if st.button("✅ Confirm Delete", use_container_width=True):
+
+                        delete_distance(selected_route)
+
+                        # 🔥 TRIGGER NOTIF
+                        st.session_state.delete_success = True
+                        st.session_state.confirm_delete = False
+
+                        # route hilang -> port list main page berubah -> full rerun
+                        st.rerun()
+
+
+@st.fragment
+def vessel_panels(vessel_ref, vessel_base, selected, mode):
+    # ===== SIDEBAR PARAMETERS =====
+    with st.expander("⚙️ Operational Input", expanded=False):
+        
+        speed_laden = st.number_input(
+            "Speed Laden (knot)",
+            value=float(vessel_base.get("speed_laden", 0)), key=vessel_key("speed_laden"),
+            step=0.1,
+            format="%.2f"
+        )
+        speed_ballast = st.number_input(
+            "Speed Ballast (knot)",
+            value=float(vessel_base.get("speed_ballast", 0)), key=vessel_key("speed_ballast"),
+            step=0.1,
+            format="%.2f"
+        )
+        consumption = st.number_input("Fuel Consumption (L/hr)", value=vessel_base.get("consumption", 0), key=vessel_key("consumption"))
+        price_fuel = st.number_input("Fuel Price (Rp/L)", value=vessel_base.get("price_fuel", 0), key=vessel_key("price_fuel"))
+
+        consumption_fw = st.number_input("FW Consumption (Ton/Day)", value=vessel_base.get("consumption_fw", 0), key=vessel_key("consumption_fw"))
+        price_fw = st.number_input("FW Price (Rp/Ton)", value=vessel_base.get("price_fw", 0), key=vessel_key("price_fw"))
+
+    if mode == "Owner":
+        with st.expander("🏗️ Cost (Owner)", expanded=False):
+            charter = st.number_input("Angsuran (Rp/Month)", value=vessel_base.get("charter", 0), key=vessel_key("charter"))
+            crew = st.number_input("Crew (Rp/Month)", value=vessel_base.get("crew", 0), key=vessel_key("crew"))
+            insurance = st.number_input("Insurance (Rp/Month)", value=vessel_base.get("insurance", 0), key=vessel_key("insurance"))
+            docking = st.number_input("Docking (Rp/Month)", value=vessel_base.get("docking", 0), key=vessel_key("docking"))
+            maintenance = st.number_input("Maintenance (Rp/Month)", value=vessel_base.get("maintenance", 0), key=vessel_key("maintenance"))
+            certificate = st.number_input("Certificate (Rp/Month)", value=vessel_base.get("certificate", 0), key=vessel_key("certificate"))
+            premi_nm = st.number_input("Premi (Rp/NM)", value=vessel_base.get("premi_nm", 0), key=vessel_key("premi_nm"))
+            other_cost = st.number_input("Other Cost (Rp)", value=vessel_base.get("other_cost", 0), key=vessel_key("other_cost"))
+    else:
+        with st.expander("🏗️ Cost (Charter)", expanded=False):
+            charter = st.number_input("Charter Hire (Rp/Month)", value=vessel_base.get("charter", 0), key=vessel_key("charter"))
+            premi_nm = st.number_input("Premi (Rp/NM)", value=vessel_base.get("premi_nm", 0), key=vessel_key("premi_nm"))
+            other_cost = st.number_input("Other Cost (Rp)", value=vessel_base.get("other_cost", 0), key=vessel_key("other_cost"))
+
+    with st.expander("⚓ Port Cost"):
+        port_cost_pol = st.number_input("Port Cost POL (Rp)", value=vessel_base.get("port_cost_pol", 0), key=vessel_key("port_cost_pol"))
+        port_cost_pod = st.number_input("Port Cost POD (Rp)", value=vessel_base.get("port_cost_pod", 0), key=vessel_key("port_cost_pod"))
+        asist_tug = st.number_input("Asist Tug (Rp)", value=vessel_base.get("asist_tug", 0), key=vessel_key("asist_tug"))
+
+    with st.expander("🏢 General Overhead"):
+        opex_office = st.number_input(
+            "Opex (Rp/Month)",
+            value=vessel_base.get("opex_office", 0), key=vessel_key("opex_office")
+        )
+        depreciation_kapal = st.number_input(
+            "Depreciation Kapal (Rp/Month)",
+            value=vessel_base.get("depreciation_kapal", 0), key=vessel_key("depreciation_kapal")
+        )
 
-        remove = st.button(f"❌ Remove {i+1}", key=f"remove_{i}")
-        if not remove:
-            updated_costs.append({
-                "name": name,
-                "price": price,
-                "unit": unit,
-                "subtype": subtype,
-                "consumption": additional_consumption
+    with st.expander("🕓 Port Stay"):
+        port_stay_pol = st.number_input("POL (Days)", value=vessel_base.get("port_stay_pol", 0), key=vessel_key("port_stay_pol"))
+        port_stay_pod = st.number_input("POD (Days)", value=vessel_base.get("port_stay_pod", 0), key=vessel_key("port_stay_pod"))
+
+    # ===== VESSEL OVERRIDE (copy-on-write) =====
+    # yang beda dari registry saja yang disimpan di session -> dibaca perhitungan
+    st.session_state.vessel_overrides = diff_overrides(vessel_base, dict(
+        speed_laden=speed_laden, speed_ballast=speed_ballast,
+        consumption=consumption, price_fuel=price_fuel,
+        consumption_fw=consumption_fw, price_fw=price_fw,
+        charter=charter, premi_nm=premi_nm, other_cost=other_cost,
+        **({
+            "crew": crew, "insurance": insurance, "docking": docking,
+            "maintenance": maintenance, "certificate": certificate,
+        } if mode == "Owner" else {}),
+        port_cost_pol=port_cost_pol, port_cost_pod=port_cost_pod, asist_tug=asist_tug,
+        opex_office=opex_office, depreciation_kapal=depreciation_kapal,
+        port_stay_pol=port_stay_pol, port_stay_pod=port_stay_pod,
+    ))
+    vessel_params = vessel_registry.params(vessel_ref, st.session_state.vessel_overrides)
+
+    with st.expander("💾 Save Vessel"):
+        vessel_name = st.text_input("Vessel Name", value="" if vessel_ref == selected else vessel_ref)
+        if vessel_params.get("speed_laden", 0) <= 0:
+            st.caption("📌 Isi speed dulu sebelum disimpan")
+        elif st.button("💾 Save to Registry", use_container_width=True):
+            try:
+                # simpan yang beda dari class saja, sisanya ikut class
+                vessel_class = vessel_registry.class_of(vessel_ref)
+                save_vessel(
+                    VESSEL_FILE, vessel_name, vessel_class,
+                    diff_overrides(vessel_registry.classes[vessel_class], dict(vessel_params))
+                )
+                # dipilih otomatis di rerun berikut (widget sudah dibuat di run ini)
+                st.session_state.vessel_saved = vessel_name.strip()
+                st.rerun()
+            except ValueError as e:
+                st.error(str(e))
+
+
+@st.fragment
+def additional_cost_panel():
+    # ===== ADDITIONAL COST =====
+    with st.expander("➕ Additional Cost"):
+        if "additional_costs" not in st.session_state:
+            st.session_state.additional_costs = []
+
+        add_new = st.button("➕ Add Additional Cost")
+        if add_new:
+            st.session_state.additional_costs.append({
+                "name": "",
+                "price": 0,
+                "unit": "Ltr",
+                "subtype": "Day",
+                "consumption": 0
             })
-    st.session_state.additional_costs = updated_costs
+
+        updated_costs = []
+        unit_options = ADDITIONAL_COST_UNITS
+
+        for i, cost in enumerate(st.session_state.additional_costs):
+            st.markdown(f"**Additional Cost {i+1}**")
+            col1, col2 = st.columns(2)
+            with col1:
+                name = st.text_input(f"Name {i+1}", cost.get("name", ""), key=f"name_{i}")
+                price = st.number_input(f"Price {i+1} (Rp)", cost.get("price", 0), key=f"price_{i}")
+            with col2:
+                unit = st.selectbox(
+                    f"Unit {i+1}",
+                    unit_options,
+                    index=unit_options.index(cost.get("unit", "Ltr")) if cost.get("unit", "Ltr") in unit_options else 0,
+                    key=f"unit_{i}"
+                )
+                subtype = "Day"
+                if unit in ["Ltr", "Ton"]:
+                    subtype = st.selectbox(
+                        f"Type {i+1}",
+                        ["Day", "Hour"],
+                        index=["Day", "Hour"].index(cost.get("subtype", "Day")),
+                        key=f"subtype_{i}"
+                    )
+                additional_consumption = 0
+                if unit in ["Ltr", "Ton"]:
+                    additional_consumption = st.number_input(
+                        f"Consumption {i+1} ({unit}/{subtype})",
+                        cost.get("consumption", 0),
+                        key=f"additional_consumption_{i}"
+                    )
+
+            remove = st.button(f"❌ Remove {i+1}", key=f"remove_{i}")
+            if not remove:
+                updated_costs.append({
+                    "name": name,
+                    "price": price,
+                    "unit": unit,
+                    "subtype": subtype,
+                    "consumption": additional_consumption
+                })
+        st.session_state.additional_costs = updated_costs
+
+
+with st.sidebar:
+    add_distance_panel()
+    import_distance_panel()
+    saved_distance_panel()
+    vessel_panels(vessel_ref, vessel_base, selected, mode)
+    additional_cost_panel()
+
+# ===== STATE HANDOFF (panel -> perhitungan) =====
+# full run: fragment di atas sudah jalan -> session_state terbaru
+vessel_params = vessel_registry.params(vessel_ref, st.session_state.vessel_overrides)
+(
+    speed_laden, speed_ballast, consumption, price_fuel, consumption_fw, price_fw,
+    charter, crew, insurance, docking, maintenance, certificate, premi_nm, other_cost,
+    port_cost_pol, port_cost_pod, asist_tug, opex_office, depreciation_kapal,
+    port_stay_pol, port_stay_pod,
+) = (vessel_params.get(name, 0) for name in VESSEL_INPUTS)
 
 # ===== LOGOUT =====
 st.sidebar.markdown("### Account")
@@ -1142,20 +989,37 @@ if st.session_state.show_info:
 st.markdown("### 🚢 Voyage Input")
 
 # ===== POL =====
-all_ports = get_all_ports()
+port_query = st.text_input(
+    "🔍 Search Port",
+    key="port_query",
+    placeholder="contoh: kuala tungkal, palembang, sip"
+)
+
+if port_query.strip():
+    all_ports = search_ports(port_query)
+    if not all_ports:
+        st.caption("Port tidak ditemukan")
+else:
+    all_ports = get_all_ports()
 
 port_pol = st.selectbox("Loading Port (POL)", [""] + all_ports)
 
+multi_leg = st.checkbox(
+    "🔀 Include unlisted routes",
+    key="multi_leg",
+    help="Tampilkan juga port yang tidak ada di tabel distance: dihitung via port lain (multi-leg) atau estimasi koordinat"
+)
+
 # ===== POD (muncul setelah POL dipilih) =====
 if port_pol:
-    pods = get_pods_by_pol(port_pol)
+    pods = get_reachable_ports(port_pol) if multi_leg else get_pods_by_pol(port_pol)
     port_pod = st.selectbox("Discharge Port (POD)", [""] + pods)
 else:
     port_pod = ""
 
 # ===== NEXT PORT (muncul setelah POD dipilih) =====
 if port_pod:
-    next_ports = get_next_by_pod(port_pod)
+    next_ports = get_reachable_ports(port_pod) if multi_leg else get_next_by_pod(port_pod)
     next_port = st.selectbox("Next Port (Optional)", [""] + next_ports)
 else:
     next_port = ""
@@ -1166,18 +1030,74 @@ col1, col2 = st.columns(2)
 
 with col1:
     if port_pol and port_pod:
-        auto_distance = find_distance(port_pol, port_pod)
+        auto_distance, auto_path, auto_estimated = find_route(port_pol, port_pod)
     else:
-        auto_distance = 0
+        auto_distance, auto_path, auto_estimated = 0, [], False
 
     st.text_input("POL → POD (NM)", value=str(auto_distance), disabled=True)
 
+    # 🔀 distance hasil turunan (tidak ada di tabel)
+    if len(auto_path) > 2:
+        st.caption(f"Derived via: {format_route_path(auto_path)}")
+    if auto_estimated:
+        st.caption("⚠️ ESTIMATE — great-circle x detour factor")
+
 with col2:
+        auto_estimated_return = False
+
         # hanya hitung kalau NEXT PORT dipilih
         if port_pod and next_port:
-            auto_distance_return = find_distance(port_pod, next_port)
+            auto_distance_return, auto_path_return, auto_estimated_return = find_route(port_pod, next_port)
             st.text_input("POD → NEXT (NM)", value=str(auto_distance_return), disabled=True)
 
+            if len(auto_path_return) > 2:
+                st.caption(f"Derived via: {format_route_path(auto_path_return)}")
+            if auto_estimated_return:
+                st.caption("⚠️ ESTIMATE — great-circle x detour factor")
+
+# selalu di-render: nilai custom tidak hilang waktu pindah ke route yang ada di tabel
+with st.expander("🌐 Distance Estimate", expanded=auto_estimated or auto_estimated_return):
+    st.number_input(
+        "Detour Factor (estimate)",
+        min_value=1.0,
+        value=float(DEFAULT_DETOUR_FACTOR),
+        step=0.05,
+        key="detour_factor",
+        help="Pengali jarak great-circle untuk route yang tidak ada di tabel (alur sungai / pelayaran)"
+    )
+
+# ===== MULTI-STOP ROTATION =====
+multi_stop = st.checkbox(
+    "🧭 Multi-stop rotation",
+    key="multi_stop",
+    help="Lebih dari 1 load / discharge: isi urutan port call, tiap call punya port stay & port cost sendiri"
+)
+
+rotation_df = None
+if multi_stop and port_pol and port_pod:
+    rotation_rows = [
+        {"Port": port_pol, "Leg": LADEN, "Stay (Days)": port_stay_pol, "Port Cost (Rp)": port_cost_pol},
+        {"Port": port_pod, "Leg": BALLAST, "Stay (Days)": port_stay_pod, "Port Cost (Rp)": port_cost_pod},
+    ]
+    if next_port:
+        rotation_rows.append({"Port": next_port, "Leg": BALLAST, "Stay (Days)": 0, "Port Cost (Rp)": 0})
+
+    rotation_port_options = sorted(set(get_all_ports()) | set(get_port_coordinates(COORD_FILE).ports))
+
+    rotation_df = st.data_editor(
+        pd.DataFrame(rotation_rows),
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"rotation_{port_pol}_{port_pod}_{next_port}",
+        column_config={
+            "Port": st.column_config.SelectboxColumn("Port", options=rotation_port_options, required=True),
+            "Leg": st.column_config.SelectboxColumn("Leg → next", options=[LADEN, BALLAST], required=True),
+            "Stay (Days)": st.column_config.NumberColumn("Stay (Days)", min_value=0.0),
+            "Port Cost (Rp)": st.column_config.NumberColumn("Port Cost (Rp)", min_value=0, format="%d"),
+        }
+    )
+    st.caption("📌 Leg = kondisi kapal dari port ini ke port berikutnya (Laden / Ballast)")
+
 st.markdown("### 📦 Type Cargo & Quantity")
 
 col1, col2 = st.columns(2)
@@ -1192,9 +1112,7 @@ with col1:
     )
 
 # ===== DEFAULT QTY =====
-default_qty = 0
-if st.session_state.preset_selected in cargo_qty_default:
-    default_qty = cargo_qty_default[st.session_state.preset_selected].get(type_cargo, 0)
+default_qty = vessel_registry.cargo_qty(vessel_ref, type_cargo)
 
 # ===== INIT =====
 if "qyt_cargo" not in st.session_state:
@@ -1204,12 +1122,12 @@ if "qyt_cargo" not in st.session_state:
 if (
     "last_preset" not in st.session_state or
     "last_cargo" not in st.session_state or
-    st.session_state.last_preset != st.session_state.preset_selected or
+    st.session_state.last_preset != vessel_ref or
     st.session_state.last_cargo != type_cargo
 ):
     st.session_state.qyt_cargo = default_qty
 
-st.session_state.last_preset = st.session_state.preset_selected
+st.session_state.last_preset = vessel_ref
 st.session_state.last_cargo = type_cargo
 
 # ===== QTY =====
@@ -1251,6 +1169,208 @@ if margin_type == "%":
 else:
     st.caption("📌 Mode Rp = Target profit dihitung dari Freight Cost dengan nominal")
 
+# ===== PROFIT SCENARIO SETTINGS =====
+with st.expander("💹 Profit Scenario Settings"):
+    scenario_axis = st.radio("Axis", AXES, horizontal=True, key="scenario_axis")
+
+    col_start, col_stop, col_step = st.columns(3)
+    if scenario_axis == FREIGHT:
+        with col_start:
+            scenario_start = st.number_input("From (Rp/MT)", 0, value=50_000, step=5_000, key="scenario_freight_start")
+        with col_stop:
+            scenario_stop = st.number_input("To (Rp/MT)", 0, value=200_000, step=5_000, key="scenario_freight_stop")
+        with col_step:
+            scenario_step = st.number_input("Step (Rp/MT)", 1, value=5_000, step=1_000, key="scenario_freight_step")
+    else:
+        with col_start:
+            scenario_start = st.number_input("From (%)", value=0, step=5, key="scenario_start")
+        with col_stop:
+            scenario_stop = st.number_input("To (%)", value=75, step=5, key="scenario_stop")
+        with col_step:
+            scenario_step = st.number_input("Step (%)", 1, value=5, step=1, key="scenario_step")
+
+    st.caption("📌 Baris breakeven (profit = 0 setelah PPH) otomatis disisipkan")
+
+# ===== ECONOMIC SPEED =====
+with st.expander("⚡ Economic Speed"):
+    speed_opt_on = st.checkbox("Optimize speed", key="speed_opt_on")
+
+    col_laden, col_ballast = st.columns(2)
+    with col_laden:
+        speed_laden_range = st.slider(
+            "Speed Laden (knot)", 0.5, 12.0,
+            (max(0.5, round(speed_laden * 0.6, 1)), min(12.0, max(1.0, round(speed_laden * 1.5, 1)))),
+            step=0.1, key=f"speed_laden_range_{st.session_state.preset_selected}"
+        )
+    with col_ballast:
+        speed_ballast_range = st.slider(
+            "Speed Ballast (knot)", 0.5, 12.0,
+            (max(0.5, round(speed_ballast * 0.6, 1)), min(12.0, max(1.0, round(speed_ballast * 1.5, 1)))),
+            step=0.1, key=f"speed_ballast_range_{st.session_state.preset_selected}"
+        )
+    speed_steps = st.number_input("Steps / Speed", 5, 200, 60, step=5, key="speed_steps")
+    st.caption("📌 Consumption ikut speed (consumption_curve per barge class, default cubic), anchor = consumption & speed sidebar")
+
+# ===== SENSITIVITY =====
+with st.expander("📈 Sensitivity Analysis"):
+    sensitivity_on = st.checkbox("Show tornado chart", key="sensitivity_on")
+    sensitivity_spread = st.slider("Range (±%)", 5, 50, 20, step=5, key="sensitivity_spread")
+    sensitivity_steps = st.number_input("Grid Steps / Input", 3, 1001, 21, step=2, key="sensitivity_steps")
+    st.caption("📌 Tiap input digeser ±range, input lain tetap (fuel, speed, port stay, port cost, charter, qty)")
+
+# ===== MONTE CARLO =====
+with st.expander("🎲 Monte Carlo Simulation"):
+    mc_on = st.checkbox("Run simulation", key="mc_on")
+
+    col_samples, col_seed = st.columns(2)
+    with col_samples:
+        mc_samples = st.number_input("Samples", 1000, 1_000_000, 100_000, step=10_000, key="mc_samples")
+    with col_seed:
+        mc_seed = st.number_input("Seed", 0, 2**31 - 1, 42, key="mc_seed")
+
+    # default: triangular di sekitar nilai sidebar sekarang
+    mc_default = {
+        "port_stay_pol": (port_stay_pol, 0.75, 2.0),
+        "port_stay_pod": (port_stay_pod, 0.75, 2.0),
+        "speed_laden": (speed_laden, 0.8, 1.1),
+        "speed_ballast": (speed_ballast, 0.8, 1.1),
+        "price_fuel": (price_fuel, 0.9, 1.2),
+    }
+    mc_distributions = st.data_editor(
+        pd.DataFrame(
+            [
+                {
+                    "Input": SIMULATION_INPUTS[name][0], "Distribution": TRIANGULAR,
+                    "Min": value * low, "Mode": float(value), "Max": value * high,
+                }
+                for name, (value, low, high) in mc_default.items()
+            ],
+            index=list(mc_default)
+        ),
+        hide_index=True,
+        use_container_width=True,
+        disabled=["Input"],
+        key=f"mc_dist_{st.session_state.preset_selected}",
+        column_config={
+            "Distribution": st.column_config.SelectboxColumn("Distribution", options=DISTRIBUTIONS, required=True),
+            "Min": st.column_config.NumberColumn("Min", min_value=0.0),
+            "Mode": st.column_config.NumberColumn("Mode / Mean", min_value=0.0),
+            "Max": st.column_config.NumberColumn("Max", min_value=0.0),
+        }
+    )
+    st.caption("📌 Normal: mean = Mode, sd = (Max - Min) / 6, dipotong di Min-Max. Multi-stop: POD = semua call setelah POL")
+
+# ===== RATE CARD (semua route x barge class x cargo) =====
+with st.expander("📇 Rate Card"):
+    rate_card_on = st.checkbox("Show rate card", key="rate_card_on")
+
+    col_ballast, col_class, col_cargo = st.columns(3)
+    with col_ballast:
+        rate_card_ballast = st.selectbox(
+            "Ballast Leg", ["No ballast", RETURN_TO_POL] + get_all_ports(), key="rate_card_ballast"
+        )
+    with col_class:
+        rate_card_barges = st.multiselect("Barge Class", rate_card_classes(vessel_registry), key="rate_card_barges")
+    with col_cargo:
+        rate_card_cargos = st.multiselect(
+            "Cargo Type", sorted({cargo for qty in vessel_registry.cargo.values() for cargo in qty}), key="rate_card_cargos"
+        )
+    rate_card_query = st.text_input("🔍 Filter route", key="rate_card_query")
+
+    if rate_card_on:
+        # cache per tabel distance + class registry -> instan setelah pertama kali
+        rate_card = get_rate_card(
+            get_route_index(distance_store),
+            None if rate_card_ballast == "No ballast" else rate_card_ballast,
+            registry=vessel_registry
+        )
+        if rate_card_barges:
+            rate_card = rate_card[rate_card["Barge Class"].isin(rate_card_barges)]
+        if rate_card_cargos:
+            rate_card = rate_card[rate_card["Cargo Type"].isin(rate_card_cargos)]
+        if rate_card_query.strip():
+            rate_card = rate_card[rate_card["Route"].str.contains(rate_card_query.strip(), case=False, regex=False)]
+
+        st.dataframe(
+            rate_card,
+            use_container_width=True,
+            height=320,
+            hide_index=True,
+            column_config={
+                name: st.column_config.NumberColumn(name, format="localized")
+                for name in ["Qty", "Total Cost", "Freight Cost / Unit", "Voyage Cost / Day"]
+            } | {
+                "Voyage (Days)": st.column_config.NumberColumn("Voyage (Days)", format="%.1f"),
+            }
+        )
+        st.caption(f"📌 {len(rate_card):,} baris • preset default (Owner), indikatif")
+        st.download_button(
+            "📥 Download Rate Card (CSV)",
+            rate_card.to_csv(index=False).encode("utf-8"),
+            file_name=f"Rate Card ({datetime.now():%d%m%Y}).csv",
+            mime="text/csv",
+        )
+
+# ===== ROUTE RANKING (seluruh network) =====
+with st.expander("🏆 Route Ranking"):
+    ranking_on = st.checkbox("Rank routes", key="ranking_on")
+
+    ranking_classes = rate_card_classes(vessel_registry)
+    col_barge, col_cargo, col_ballast = st.columns(3)
+    with col_barge:
+        ranking_barge = st.selectbox(
+            "Barge Class", ranking_classes, key="ranking_barge",
+            index=ranking_classes.index(st.session_state.preset_selected)
+            if st.session_state.preset_selected in ranking_classes else 0
+        )
+    with col_cargo:
+        ranking_cargo = st.selectbox("Cargo Type", list(vessel_registry.cargo[ranking_barge]), key="ranking_cargo")
+    with col_ballast:
+        ranking_ballast = st.selectbox(
+            "Ballast Leg", ["No ballast", RETURN_TO_POL] + get_all_ports(), key="ranking_ballast"
+        )
+
+    col_operator, col_days, col_tce = st.columns(3)
+    with col_operator:
+        ranking_operator = st.text_input("Operator / Port Code", key="ranking_operator")
+    with col_days:
+        ranking_max_days = st.number_input("Max Voyage (Days)", 0.0, value=0.0, step=1.0, key="ranking_max_days")
+    with col_tce:
+        ranking_min_tce = st.number_input("Min TCE Earnings / Day (Rp)", value=0, step=1_000_000, key="ranking_min_tce")
+
+    col_rank, col_k = st.columns([3, 1])
+    with col_rank:
+        ranking_by = st.radio("Rank by", RANK_BY, horizontal=True, key="ranking_by")
+    with col_k:
+        ranking_k = st.number_input("Top", 1, 1000, 20, key="ranking_k")
+
+    if ranking_on:
+        if not freight_price_input and not target_margin:
+            st.warning("⚠️ Isi Freight Rate customer atau Target Profit di sidebar")
+        else:
+            ranking, ranking_count = rank_routes(
+                get_route_index(distance_store), ranking_barge, ranking_cargo,
+                freight_price=freight_price_input, target_margin=target_margin, margin_type=margin_type,
+                next_port=None if ranking_ballast == "No ballast" else ranking_ballast,
+                operator=ranking_operator, max_days=ranking_max_days or None,
+                min_tce=ranking_min_tce if ranking_min_tce else None,
+                rank_by=ranking_by, k=int(ranking_k), registry=vessel_registry,
+            )
+            st.dataframe(
+                ranking,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    name: st.column_config.NumberColumn(name, format="localized")
+                    for name in ["Freight (Rp/Unit)", "Revenue", "Total Cost", "Profit", RANKING_TCE]
+                } | {
+                    "Voyage (Days)": st.column_config.NumberColumn("Voyage (Days)", format="%.1f"),
+                    MARGIN: st.column_config.NumberColumn(MARGIN, format="%.1f%%"),
+                }
+            )
+            basis = "Freight Rate customer" if freight_price_input else f"Target {target_margin:g} {margin_type}"
+            st.caption(f"📌 Top {len(ranking)} dari {ranking_count:,} route lolos filter • basis: {basis}")
+
 
 if not port_pol or not port_pod:
     st.error("⚠️ Pilih POL & POD")
@@ -1271,42 +1391,122 @@ calculate = st.button(
 
 if calculate:
     try:
-        distance_pol_pod = find_distance(port_pol, port_pod)
+        # ===== ROTATION (urutan port call) =====
+        if multi_stop and rotation_df is not None:
+            calls = rotation_df.dropna(subset=["Port"])
+            calls = calls[calls["Port"].astype(str).str.strip() != ""]
+
+            rotation_ports = calls["Port"].tolist()
+            rotation_laden = (calls["Leg"] == LADEN).tolist()[:-1]
+            rotation_stays = calls["Stay (Days)"].fillna(0).tolist()
+            rotation_costs = calls["Port Cost (Rp)"].fillna(0).tolist()
+
+            if len(rotation_ports) < 2:
+                raise ValueError("Rotation minimal 2 port call")
+        else:
+            # 🔥 FIX: NEXT PORT (ballast) hanya dihitung kalau dipilih
+            rotation_ports = [port_pol, port_pod]
+            rotation_laden = [True]
+            rotation_stays = [port_stay_pol, port_stay_pod]
+            rotation_costs = [port_cost_pol, port_cost_pod]
+
+            if next_port and next_port.strip():
+                rotation_ports.append(next_port)
+                rotation_laden.append(False)
+
+        leg_distances, leg_paths, leg_estimated = resolve_legs(rotation_ports)
+        legs = compute_legs(
+            leg_distances, rotation_laden,
+            speed_laden, speed_ballast, consumption, price_fuel, premi_nm
+        )
+        rotation = summarize_rotation(legs, rotation_stays, rotation_costs)
+
+        # laden = POL → POD, ballast = POD → NEXT (multi-stop: total semua leg)
+        distance_pol_pod = rotation["laden_distance"]
+        distance_pod_pol = rotation["ballast_distance"]
+
+        if multi_stop:
+            path_pol_pod, path_pod_pol = [], []
+            estimated_pol_pod = any(e for e, laden in zip(leg_estimated, rotation_laden) if laden)
+            estimated_pod_pol = any(e for e, laden in zip(leg_estimated, rotation_laden) if not laden)
+        else:
+            path_pol_pod, estimated_pol_pod = leg_paths[0], leg_estimated[0]
+            path_pod_pol = leg_paths[1] if len(leg_paths) > 1 else []
+            estimated_pod_pol = leg_estimated[1] if len(leg_estimated) > 1 else False
+
+        estimate_note = " (ESTIMATE)"
+
+        # ===== COST ENGINE (dependency graph, freight/voyage_graph.py) =====
+        voyage_inputs = dict(
+            distance_laden=distance_pol_pod, distance_ballast=distance_pod_pol,
+            speed_laden=speed_laden, speed_ballast=speed_ballast,
+            consumption=consumption, price_fuel=price_fuel,
+            consumption_fw=consumption_fw, price_fw=price_fw,
+            charter=charter, premi_nm=premi_nm, other_cost=other_cost,
+            **({
+                "crew": crew, "insurance": insurance, "docking": docking,
+                "maintenance": maintenance, "certificate": certificate,
+            } if mode == "Owner" else {}),
+            opex_office=opex_office, depreciation_kapal=depreciation_kapal,
+            port_cost_calls=rotation["port_cost"], port_stay_days=rotation["port_stay_days"], asist_tug=asist_tug,
+            qyt_cargo=qyt_cargo, freight_price=freight_price_input,
+            target_margin=float(target_margin or 0), margin_type=margin_type, mode=mode
+        )
+        # additional cost di-compile sekali -> dipakai ulang di solver / speed / sensitivity / monte carlo
+        additional_costs = compile_additional_costs(st.session_state.get("additional_costs", []))
+        # ===== RESULT CACHE (shared semua session, freight/result_cache.py) =====
+        # input sama persis (route, preset, cargo, freight, margin, additional cost, scenario) -> tidak hitung ulang
+        result_cache = get_result_cache()
+        voyage_key = input_key(
+            route=rotation_ports, voyage=voyage_inputs,
+            additional_costs=st.session_state.get("additional_costs", []),
+            scenario=[scenario_start, scenario_stop, scenario_step, scenario_axis],
+        )
+        cached = result_cache.get(voyage_key)
+
+        # graph disimpan per session -> cuma node yang input-nya berubah dihitung ulang
+        if "voyage_graph" not in st.session_state:
+            st.session_state.voyage_graph = VoyageGraph()
+        voyage_graph = st.session_state.voyage_graph
+
+        if cached is None:
+            voyage_graph.load(additional_costs=additional_costs, **voyage_inputs)
+            result = voyage_graph.result()
 
-        # 🔥 FIX: hanya hitung kalau NEXT PORT dipilih
-        if next_port and next_port.strip():
-            distance_pod_pol = find_distance(port_pod, next_port)
+            # kolom numerik, format Rp cuma di tampilan
+            df_profit = profit_scenarios(
+                result["total_cost"], result["freight_cost_mt"], qyt_cargo,
+                scenario_start, scenario_stop, scenario_step, scenario_axis
+            )
+            result_cache.put(voyage_key, {"result": result, "scenarios": df_profit})
         else:
-            distance_pod_pol = 0
+            result, df_profit = cached["result"], cached["scenarios"]
 
-        pol_pod_hour = distance_pol_pod / speed_laden if speed_laden else 0
-        pod_pol_hour = distance_pod_pol / speed_ballast if speed_ballast else 0
-        pol_pod_day = pol_pod_hour / 24
-        pod_pol_day = pod_pol_hour / 24
-            
-        # Waktu sailing (hour) based on speed inputs (hours)
-        sailing_time = (distance_pol_pod / speed_laden) + (distance_pod_pol / speed_ballast)
-        # total voyage in days (sailing hours converted to days + port stays)
-        total_voyage_days = (sailing_time / 24) + (port_stay_pol + port_stay_pod)
-        total_voyage_days_round = int(total_voyage_days) if total_voyage_days % 1 < 0.5 else int(total_voyage_days) + 1
+        pol_pod_day = result["laden_days"]
+        pod_pol_day = result["ballast_days"]
+
+        # Waktu sailing (hour) & total voyage (days, termasuk port stay)
+        sailing_time = result["sailing_time"]
+        total_voyage_days = result["total_voyage_days"]
+        total_voyage_days_round = int(result["total_voyage_days_round"])
 
         # consumptions
-        total_consumption_fuel = (sailing_time * consumption) + ((port_stay_pol + port_stay_pod) * 120)
-        total_consumption_fw = consumption_fw * total_voyage_days_round
-        cost_fw = total_consumption_fw * price_fw
-        cost_fuel = total_consumption_fuel * price_fuel
+        total_consumption_fuel = result["total_consumption_fuel"]
+        total_consumption_fw = result["total_consumption_fw"]
+        cost_fw = result["cost_fw"]
+        cost_fuel = result["cost_fuel"]
 
         # core costs
-        charter_cost = (charter / 30) * total_voyage_days
-        crew_cost = (crew / 30) * total_voyage_days if mode == "Owner" else 0
-        insurance_cost = (insurance / 30) * total_voyage_days if mode == "Owner" else 0
-        docking_cost = (docking / 30) * total_voyage_days if mode == "Owner" else 0
-        maintenance_cost = (maintenance / 30) * total_voyage_days if mode == "Owner" else 0
-        certificate_cost = (certificate / 30) * total_voyage_days if mode == "Owner" else 0
-        total_general_overhead = (opex_office / 30) * total_voyage_days
-        depreciation_cost = (depreciation_kapal / 30) * total_voyage_days
-        premi_cost = distance_pol_pod * premi_nm
-        port_cost = port_cost_pol + port_cost_pod + asist_tug
+        charter_cost = result["charter_cost"]
+        crew_cost = result["crew_cost"]
+        insurance_cost = result["insurance_cost"]
+        docking_cost = result["docking_cost"]
+        maintenance_cost = result["maintenance_cost"]
+        certificate_cost = result["certificate_cost"]
+        total_general_overhead = result["total_general_overhead"]
+        depreciation_cost = result["depreciation_cost"]
+        premi_cost = result["premi_cost"]
+        port_cost = result["port_cost"]
 
         # ===== COST DICTIONARY =====
         if mode == "Owner":
@@ -1329,106 +1529,37 @@ if calculate:
                 "Other Cost": other_cost
             }
 
-        # ===== ADDITIONAL COST CALCULATION =====
-        additional_total = 0
-        additional_breakdown = {}
-
-        for cost in st.session_state.get("additional_costs", []):
-            name = cost.get("name", "")
-            unit = cost.get("unit", "")
-            subtype = cost.get("subtype", "Day")
-            price = cost.get("price", 0)
-            cons = cost.get("consumption", 0)
-
-            val = 0
-            if unit == "Ltr":
-                if subtype == "Day":
-                    val = cons * total_voyage_days * price
-                elif subtype == "Hour":
-                    val = cons * (total_voyage_days * 24) * price
-            elif unit == "Ton":
-                if subtype == "Day":
-                    val = cons * total_voyage_days * price
-                elif subtype == "Hour":
-                    val = cons * (total_voyage_days * 24) * price
-            elif unit == "Month":
-                val = (price / 30) * total_voyage_days
-            elif unit == "Voyage":
-                val = price
-            elif unit in ["MT", "M3"]:
-                val = price * qyt_cargo
-            elif unit == "Day":
-                val = price * total_voyage_days
-
-            if val and val > 0:
-                key_name = name if name else f"{unit} cost"
-                if key_name in additional_breakdown:
-                    additional_breakdown[key_name] += val
-                else:
-                    additional_breakdown[key_name] = val
-                additional_total += val
+        # ===== ADDITIONAL COST =====
+        additional_total = result["additional_total"]
+        additional_breakdown = result["additional_breakdown"]
 
         # ===== TOTAL COST FINAL =====
-        total_cost = sum([
-            charter_cost, crew_cost, insurance_cost, docking_cost, maintenance_cost, certificate_cost,total_general_overhead,depreciation_cost, 
-            premi_cost, port_cost, cost_fuel, cost_fw, other_cost, additional_total
-        ])
-
-        freight_cost_mt = total_cost / qyt_cargo if qyt_cargo > 0 else 0
-
-        # ===== IDEAL PRICE CALC =====
-        ideal_freight = 0
-        ideal_revenue = 0
-        ideal_pph = 0
-        ideal_profit = 0
-        
-        margin_value_rp = 0
-        margin_value_pct = 0
+        total_cost = result["total_cost"]
+        freight_cost_mt = result["freight_cost_mt"]
 
-        # ===== FIX TARGET MARGIN TEXT =====
+        # ===== IDEAL PRICE (target margin) =====
         if margin_type == "%":
             target_margin_text = f"{target_margin:.1f} %"
-            margin_value_rp = freight_cost_mt * (target_margin / 100) if freight_cost_mt else 0
         else:
             target_margin_text = f"Rp {target_margin:,.0f}"
-            margin_value_rp = target_margin
-        
-        if float(target_margin or 0) > 0:
-        
-            # ===== HITUNG IDEAL FREIGHT =====
-            if margin_type == "%":
-                ideal_freight = freight_cost_mt * (1 + target_margin / 100)
-        
-                margin_value_pct = target_margin
-                margin_value_rp = freight_cost_mt * (target_margin / 100)
-        
-            else:  # Rp
-                ideal_freight = freight_cost_mt + target_margin
-        
-                margin_value_rp = target_margin
-                margin_value_pct = (target_margin / freight_cost_mt) * 100
-        
-            # ===== OUTPUT CALC =====
-            ideal_revenue = ideal_freight * qyt_cargo
-            ideal_pph = ideal_revenue * 0.012
-            ideal_profit = ideal_revenue - total_cost - ideal_pph
 
-    
+        ideal_freight = result["ideal_freight"]
+        ideal_revenue = result["ideal_revenue"]
+        ideal_pph = result["ideal_pph"]
+        ideal_profit = result["ideal_profit"]
+        margin_value_rp = result["margin_value_rp"]
+        margin_value_pct = result["margin_value_pct"]
+
         # ===== REVENUE CALC =====
-        revenue_user = freight_price_input * qyt_cargo
-        pph_user = revenue_user * 0.012
-        profit_user = revenue_user - total_cost - pph_user
-        profit_percent_user = (profit_user / total_cost * 100) if total_cost > 0 else 0
+        revenue_user = result["revenue_user"]
+        pph_user = result["pph_user"]
+        profit_user = result["profit_user"]
+        profit_percent_user = result["profit_percent_user"]
 
         # ===== TCE CALCULATION =====
-        tce_base_cost = cost_fuel + cost_fw + port_cost + premi_cost
-
-        tce_per_day = (
-            tce_base_cost / total_voyage_days
-            if total_voyage_days > 0 else 0
-        )
-
-        tce_per_month = tce_per_day * 30
+        tce_base_cost = result["tce_base_cost"]
+        tce_per_day = result["tce_per_day"]
+        tce_per_month = result["tce_per_month"]
 
         # ===== OUTPUT RINGKAS (MOBILE FRIENDLY) =====
         
@@ -1445,12 +1576,21 @@ if calculate:
             <h4 style="color:#93c5fd;">🚢 Voyage Summary</h4>
 
         • Cargo Type : <b>{type_cargo}</b><br>
-        • Route : <b>{port_pol} → {port_pod}</b><br>
-        • Distance POL → POD : <b>{distance_pol_pod:,.0f} NM</b><br>
+        • Route : <b>{format_route_path(rotation_ports) if multi_stop else f"{port_pol} → {port_pod}"}</b><br>
+        • {"Distance Laden (all legs)" if multi_stop else "Distance POL → POD"} : <b>{distance_pol_pod:,.0f} NM</b>{"<b style='color:#f97316;'>" + estimate_note + "</b>" if estimated_pol_pod else ""}<br>
+        {"• Distance Ballast (all legs) : <b>{:,.0f} NM</b><br>".format(distance_pod_pol)
+         if multi_stop and not estimated_pod_pol else ""}
+        {"• {} : <b>{:,.0f} NM</b><b style='color:#f97316;'>{}</b><br>".format(
+            "Distance Ballast (all legs)" if multi_stop else "Distance POD → NEXT", distance_pod_pol, estimate_note)
+         if estimated_pod_pol else ""}
+        {"• Path POL → POD : <b>{}</b> <span style='font-size:11px; color:#bbb;'>(derived)</span><br>".format(format_route_path(path_pol_pod))
+         if len(path_pol_pod) > 2 else ""}
+        {"• Path POD → NEXT : <b>{}</b> <span style='font-size:11px; color:#bbb;'>(derived)</span><br>".format(format_route_path(path_pod_pol))
+         if len(path_pod_pol) > 2 else ""}
         • Total Cargo : <b>{qyt_cargo:,.0f} {type_cargo.split()[1]}</b><br>
         • Total Voyage : <b>{total_voyage_days:.1f} Days</b>
         <span style="font-size:11px; color:#bbb;">
-        (sailing POL→POD {pol_pod_day:.1f} Days - POD→POL {pod_pol_day:.1f} Days)
+        (sailing {"laden" if multi_stop else "POL→POD"} {pol_pod_day:.1f} Days - {"ballast" if multi_stop else "POD→POL"} {pod_pol_day:.1f} Days)
         </span><br>
         • Freight Cost : <b style="color:#0f172a;">Rp {freight_cost_mt:,.0f}</b>
         
@@ -1460,6 +1600,24 @@ if calculate:
         </div>
         """, unsafe_allow_html=True)
 
+        # ===== LEG BREAKDOWN (multi-stop) =====
+        df_legs = rotation_dataframe([p.strip().upper() for p in rotation_ports], legs)
+        df_legs["Note"] = [
+            "ESTIMATE" if is_estimate else ("via " + format_route_path(path) if len(path) > 2 else "")
+            for path, is_estimate in zip(leg_paths, leg_estimated)
+        ]
+
+        if multi_stop:
+            st.markdown("#### 🧭 Leg Breakdown")
+            st.dataframe(
+                df_legs.style.format({
+                    "Distance (NM)": "{:,.0f}", "Speed (knot)": "{:.2f}", "Sailing (Days)": "{:.2f}",
+                    "Fuel (Ltr)": "{:,.0f}", "Fuel Cost (Rp)": "Rp {:,.0f}",
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
             
         if freight_price_input > 0:
 
@@ -1672,22 +1830,185 @@ if calculate:
         </div>
         """, unsafe_allow_html=True)
 
+        # ===== RECOMPUTE LOG (dependency graph) =====
+        with st.expander("🧮 Recompute Log"):
+            cache_stats = result_cache.stats()
+            st.caption(
+                f"🗃️ Result cache: {cache_stats['hits']:,} hit / {cache_stats['misses']:,} miss • "
+                f"{cache_stats['entries']:,} entry • {cache_stats['bytes'] / 1e6:,.1f} MB"
+            )
+            if cached is not None:
+                st.caption("⚡ Hasil dari cache (input sama persis), tidak ada node yang dihitung ulang")
+            elif voyage_graph.last_run:
+                st.dataframe(pd.DataFrame([
+                    {
+                        "Stage": run["stage"],
+                        "Recomputed": ", ".join(run["outputs"]),
+                        "Because": ", ".join(run["because"]),
+                    }
+                    for run in voyage_graph.last_run
+                ]), use_container_width=True, hide_index=True)
+            else:
+                st.caption("📌 Input sama dengan kalkulasi sebelumnya, tidak ada node yang dihitung ulang")
+
+
+        # ===== BREAKEVEN & LIMITS (inverse solver) =====
+        # kolom 1 = breakeven (profit setelah PPH = 0)
+        # kolom 2 = target margin user, definisi sama dengan Freight Rate ideal (sebelum PPH)
+        solver_targets = {"Breakeven": (0, 0)}
+        if float(target_margin or 0) > 0:
+            if margin_type == "%":
+                solver_targets[f"Margin {target_margin:g}%"] = (0, target_margin)
+            else:
+                solver_targets[f"Rp {target_margin:,.0f}/{type_cargo.split()[1]}"] = (0, target_margin)
+
+        # selain freight rate, limit cuma berarti kalau freight customer diisi
+        solver_fields = list(SOLVE_FOR) if freight_price_input > 0 else ["freight_price"]
+        solver_voyages = {name: [value] * len(solver_targets) for name, value in voyage_inputs.items()}
+        target_profits, target_margins = zip(*solver_targets.values())
+
+        solver_rows = {}
+        for field in solver_fields:
+            values = solve(
+                solver_voyages, field, target_profits, target_margins,
+                additional_costs=additional_costs
+            )
+            solver_rows[SOLVE_FOR[field][0]] = [
+                "-" if np.isnan(value) else "∞" if np.isinf(value) else
+                f"{value:,.1f}" if field == "port_stay_days" else f"{value:,.0f}"
+                for value in values
+            ]
+
+        st.subheader("🎯 Breakeven & Limits")
+        st.dataframe(
+            pd.DataFrame.from_dict(solver_rows, orient="index", columns=list(solver_targets)),
+            use_container_width=True
+        )
+        st.caption("📌 Limit lain (fuel, qty, charter, port stay total) dihitung dari Freight Rate customer; '-' = tidak tercapai")
+
+        # ===== ECONOMIC SPEED =====
+        if speed_opt_on:
+            speed_curve = vessel_params.get("consumption_curve")
+            speed_optimum = optimize_speed(
+                voyage_inputs, speed_curve,
+                np.linspace(*speed_laden_range, int(speed_steps)),
+                np.linspace(*speed_ballast_range, int(speed_steps)),
+                additional_costs=additional_costs
+            )
+            # speed sekarang, dihitung dengan curve yang sama supaya sebanding
+            speed_current = speed_sweep(
+                voyage_inputs, speed_curve, [speed_laden], [speed_ballast],
+                additional_costs=additional_costs
+            ).iloc[0]
+
+            speed_rows = {"Current": speed_current, "Min Cost / MT": speed_optimum["min_cost"]}
+            if freight_price_input > 0:
+                speed_rows["Max TCE Earnings"] = speed_optimum["max_tce"]
+
+            st.subheader("⚡ Economic Speed")
+            st.dataframe(
+                pd.DataFrame(speed_rows).T[["Speed Laden", "Speed Ballast", "Voyage (Days)", "Total Cost", "Freight Cost / MT", TCE]]
+                .style.format({
+                    "Speed Laden": "{:.2f}", "Speed Ballast": "{:.2f}", "Voyage (Days)": "{:.1f}",
+                    "Total Cost": "Rp {:,.0f}", "Freight Cost / MT": "Rp {:,.0f}", TCE: "Rp {:,.0f}",
+                }),
+                use_container_width=True
+            )
+            st.pyplot(frontier_figure(speed_optimum, speed_current))
+            st.caption(f"{len(speed_optimum['sweep']):,} kombinasi speed, {len(speed_optimum['frontier'])} titik Pareto (voyage days vs cost)")
+
+        # ===== SENSITIVITY (TORNADO) =====
+        if sensitivity_on:
+            spread = sensitivity_spread / 100
+            grid = sensitivity_grid(
+                voyage_inputs,
+                {
+                    "port_stay_pol": rotation_stays[0], "port_stay_pod": sum(rotation_stays[1:]),
+                    "port_cost_pol": rotation_costs[0], "port_cost_pod": sum(rotation_costs[1:]),
+                },
+                spread=spread,
+                steps=int(sensitivity_steps),
+                additional_costs=additional_costs
+            )
+
+            st.subheader(f"📈 Sensitivity ±{sensitivity_spread}%")
+
+            # profit cuma berarti kalau freight customer diisi
+            metrics = ["freight_cost_mt"] + (["profit_user"] if freight_price_input > 0 else [])
+            for metric in metrics:
+                table = tornado_table(grid, metric, result[metric])
+                st.pyplot(tornado_figure(table, f"{METRICS[metric]} - base Rp {result[metric]:,.0f}", spread))
+
+            st.caption(f"{len(grid):,} grid points dihitung sekali jalan")
+
+        # ===== MONTE CARLO =====
+        if mc_on:
+            simulation = simulate(
+                voyage_inputs,
+                {"port_stay_pol": rotation_stays[0], "port_stay_pod": sum(rotation_stays[1:])},
+                {
+                    name: (row["Distribution"], row["Min"], row["Mode"], row["Max"])
+                    for name, row in mc_distributions.iterrows()
+                },
+                samples=int(mc_samples),
+                seed=int(mc_seed),
+                additional_costs=additional_costs
+            )
+
+            st.subheader(f"🎲 Monte Carlo ({simulation['samples']:,} samples)")
+
+            mc_metrics = {"total_cost": "Total Cost", "freight_cost_mt": "Freight Cost / MT"}
+            if freight_price_input > 0:
+                mc_metrics["profit_user"] = "Profit"
+
+            df_mc = pd.DataFrame(
+                [simulation["summary"][metric] for metric in mc_metrics],
+                index=list(mc_metrics.values())
+            )
+            st.dataframe(df_mc.style.format("Rp {:,.0f}"), use_container_width=True)
+
+            if freight_price_input > 0:
+                st.metric("Probability of Loss", f"{simulation['probability_of_loss'] * 100:.1f}%")
+
+            # distribusi freight cost / MT dari sketch (percentile 1..99)
+            percentiles = np.arange(1, 100)
+            st.line_chart(
+                pd.DataFrame(
+                    {"Freight Cost (Rp/MT)": simulation["sketches"]["freight_cost_mt"].quantiles(percentiles / 100)},
+                    index=pd.Index(percentiles, name="Percentile")
+                ),
+                height=220
+            )
 
         # ===== PROFIT SCENARIO =====
-        data = []
-        for p in range(0, 80, 5):
-            freight_persen = freight_cost_mt * (1 + p / 100)
-            revenue = freight_persen * qyt_cargo
-            pph = revenue * 0.012
-            gross_profit = revenue - total_cost - pph
-            data.append([f"{p}%", f"Rp {freight_persen:,.0f}", f"Rp {revenue:,.0f}", f"Rp {pph:,.0f}", f"Rp {gross_profit:,.0f}"])
-        df_profit = pd.DataFrame(data, columns=["Profit %", "Freight (Rp)", "Revenue (Rp)", "PPH 1.2% (Rp)", "Gross Profit (Rp)"])
-
-        st.subheader("💹 Profit Scenario 0–75%")
-        st.dataframe(df_profit, use_container_width=True, height=250)
+        # df_profit dihitung bareng result engine (ikut result cache)
+        profit_title = scenario_title(scenario_start, scenario_stop, scenario_axis)
+
+        st.subheader(f"💹 {profit_title}")
+        st.dataframe(
+            df_profit,
+            use_container_width=True,
+            height=250,
+            hide_index=True,
+            column_config={
+                "Profit %": st.column_config.NumberColumn("Profit %", format="%.1f%%"),
+                "Freight (Rp)": st.column_config.NumberColumn("Freight (Rp)", format="localized"),
+                "Revenue (Rp)": st.column_config.NumberColumn("Revenue (Rp)", format="localized"),
+                "PPH 1.2% (Rp)": st.column_config.NumberColumn("PPH 1.2% (Rp)", format="localized"),
+                "Gross Profit (Rp)": st.column_config.NumberColumn("Gross Profit (Rp)", format="localized"),
+                "Breakeven": st.column_config.CheckboxColumn("BEP"),
+            }
+        )
 
         # ===== PDF GENERATOR =====
-        def create_pdf(username):
+        def create_pdf(username, detour_factor):
+            # reportlab di-import lazy: cuma saat PDF benar-benar di-download
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+            from reportlab.lib.units import cm
+            from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
             buffer = BytesIO()
             doc = SimpleDocTemplate(
                 buffer,
@@ -1729,7 +2050,16 @@ if calculate:
                 ["Port Of Discharge", port_pod],
                 ["Next Port", next_port],
                 ["Cargo Quantity", f"{qyt_cargo:,.0f} {type_cargo.split()[1]}"],
-                ["Distance (NM)", f"{distance_pol_pod:,.0f}"],
+                ["Distance (NM)", f"{distance_pol_pod:,.0f}" + (estimate_note if estimated_pol_pod else "")],
+            ]
+            if estimated_pod_pol:
+                voyage_data.append(["Distance POD - Next (NM)", f"{distance_pod_pol:,.0f}{estimate_note}"])
+            # 🔀 leg path kalau distance hasil turunan
+            if len(path_pol_pod) > 2:
+                voyage_data.append(["Path POL - POD (derived)", format_route_path(path_pol_pod, " > ")])
+            if len(path_pod_pol) > 2:
+                voyage_data.append(["Path POD - Next (derived)", format_route_path(path_pod_pol, " > ")])
+            voyage_data += [
                 ["Total Voyage (Days)", f"{total_voyage_days:.2f}"],
             ]
             t_voyage = Table(voyage_data, colWidths=[9*cm, 9*cm])
@@ -1742,6 +2072,33 @@ if calculate:
             ]))
             elements += [t_voyage, Spacer(1, 4)]
 
+            # ===== LEG BREAKDOWN (multi-stop) =====
+            if multi_stop:
+                elements.append(Paragraph("Leg Breakdown", styles['SubHeader']))
+                leg_table = [["Leg", "From - To", "Type", "NM", "Days", "Fuel (Ltr)", "Fuel Cost"]]
+                for row in df_legs.itertuples(index=False):
+                    note = " *" if row.Note == "ESTIMATE" else ""
+                    leg_table.append([
+                        str(row.Leg), f"{row.From} - {row.To}", row.Type,
+                        f"{row[4]:,.0f}{note}", f"{row[6]:.2f}", f"{row[7]:,.0f}", fmt_rp(row[8])
+                    ])
+                t_legs = Table(leg_table, colWidths=[1*cm, 6.6*cm, 1.6*cm, 1.8*cm, 1.6*cm, 2.2*cm, 3.2*cm])
+                t_legs.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0d47a1")),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 7),
+                ]))
+                elements += [t_legs, Spacer(1, 4)]
+
+            if estimated_pol_pod or estimated_pod_pol:
+                elements.append(Paragraph(
+                    f"ESTIMATE: route tidak ada di tabel distance, dihitung great-circle x detour factor {detour_factor:.2f}",
+                    styles['NormalSmall']
+                ))
+
             # ===== OPERATIONAL COST =====
             elements.append(Paragraph("Operational & Cost Summary", styles['SubHeader']))
             calc_data = [
@@ -1816,18 +2173,27 @@ if calculate:
 
 
             # ===== PROFIT SCENARIO =====
-            elements.append(Paragraph("Profit Scenario 0–75%", styles['SubHeader']))
-            profit_table = [df_profit.columns.to_list()] + df_profit.values.tolist()
-            t_profit = Table(profit_table, colWidths=[3*cm, 3.8*cm, 3.8*cm, 3.8*cm, 3.8*cm])
-            t_profit.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0d47a1")),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ]))
-            elements += [t_profit, Spacer(1, 4)]
+            elements.append(Paragraph(profit_title, styles['SubHeader']))
+            profit_header, *profit_rows = format_scenarios(df_profit)
+            profit_breakeven = df_profit["Breakeven"].to_numpy()
+
+            # 1 Table per ~1 halaman: split 1 table panjang di reportlab lambat (kuadratik)
+            for start in range(0, len(profit_rows), PDF_ROWS_PER_TABLE):
+                end = start + PDF_ROWS_PER_TABLE
+                t_profit = Table([profit_header] + profit_rows[start:end], colWidths=[3*cm, 3.8*cm, 3.8*cm, 3.8*cm, 3.8*cm])
+                t_profit.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0d47a1")),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 8),
+                ] + [
+                    ('BACKGROUND', (0, i + 1), (-1, i + 1), colors.HexColor("#fff3e0"))
+                    for i in np.flatnonzero(profit_breakeven[start:end])
+                ]))
+                elements.append(t_profit)
+            elements.append(Spacer(1, 4))
 
             # ===== FOOTER =====
             footer_text = f"Generated by {username} | https://freight-calculator-mobile.streamlit.app"
@@ -1843,13 +2209,16 @@ if calculate:
             return buffer
 
         # ===== GENERATE PDF & DOWNLOAD BUTTON =====
-        pdf_buffer = create_pdf(username=st.session_state.email)
+        # deferred: create_pdf dijalankan saat tombol diklik, bukan tiap rerun
+        # (di thread media tanpa script context -> semua nilai session dibaca di sini)
+        report_user = st.session_state.email
+        report_detour = st.session_state.get("detour_factor", DEFAULT_DETOUR_FACTOR)
         selected_barge = st.session_state.get("preset_selected", "Custom")
         file_name = f"Freight Report {selected_barge} {port_pol}-{port_pod} ({datetime.now():%d%m%Y}).pdf"
 
         st.download_button(
             label="📥 Download PDF Report",
-            data=pdf_buffer,
+            data=lambda: create_pdf(username=report_user, detour_factor=report_detour),
             file_name=file_name,
             mime="application/pdf"
         )
@@ -0,0 +1,85 @@
+import numpy as np
+
+# ==========================================================
+# ➕ ADDITIONAL COST (compiled)
+# - list additional cost dari sidebar (name, unit, subtype, price,
+#   consumption) -> 1 matrix koefisien per nama:
+#   [Rp / hari voyage, Rp / unit cargo, Rp fixed / voyage]
+# - Ltr / Ton per Hour = x 24 per hari, Month = price / 30 per hari
+# - biaya 1 voyage / banyak voyage = 1 dot product [days, qty, 1]
+# - compile sekali, dipakai ulang di semua batch / scenario
+# ==========================================================
+
+PER_DAY, PER_UNIT, FIXED = 0, 1, 2
+
+UNITS = ["Ltr", "Ton", "Month", "Voyage", "MT", "M3", "Day"]
+
+
+def _coefficients(cost):
+    unit = cost.get("unit", "")
+    subtype = cost.get("subtype", "Day")
+    price = cost.get("price", 0) or 0
+    cons = cost.get("consumption", 0) or 0
+
+    coefficients = [0.0, 0.0, 0.0]
+    if unit in ["Ltr", "Ton"]:
+        if subtype == "Day":
+            coefficients[PER_DAY] = cons * price
+        elif subtype == "Hour":
+            coefficients[PER_DAY] = cons * 24 * price
+    elif unit == "Month":
+        coefficients[PER_DAY] = price / 30
+    elif unit == "Voyage":
+        coefficients[FIXED] = price
+    elif unit in ["MT", "M3"]:
+        coefficients[PER_UNIT] = price
+    elif unit == "Day":
+        coefficients[PER_DAY] = price
+
+    # baris dengan biaya <= 0 tidak dihitung (sama seperti kalkulasi lama)
+    return [max(value, 0.0) for value in coefficients]
+
+
+class CompiledCosts:
+
+    def __init__(self, names, matrix):
+        self.names = names
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.names)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, CompiledCosts)
+            and self.names == other.names
+            and np.array_equal(self.matrix, other.matrix)
+        )
+
+    def evaluate(self, total_voyage_days, qyt_cargo):
+        # return (total per voyage, {nama: biaya per voyage})
+        total_voyage_days = np.asarray(total_voyage_days, dtype=float)
+        features = np.stack(np.broadcast_arrays(total_voyage_days, np.asarray(qyt_cargo, dtype=float), 1.0), axis=-1)
+
+        with np.errstate(invalid="ignore"):
+            values = features @ self.matrix.T
+        values = np.where(values > 0, values, 0.0)
+
+        breakdown = {name: values[..., i] for i, name in enumerate(self.names)}
+        return values.sum(axis=-1), breakdown
+
+
+def compile_additional_costs(costs):
+    # sudah di-compile -> pakai langsung
+    if isinstance(costs, CompiledCosts):
+        return costs
+
+    rows = {}
+    for cost in costs or []:
+        name = cost.get("name", "") or f"{cost.get('unit', '')} cost"
+        row = rows.setdefault(name, [0.0, 0.0, 0.0])
+        for i, value in enumerate(_coefficients(cost)):
+            row[i] += value
+
+    matrix = np.array(list(rows.values()), dtype=float).reshape(len(rows), 3)
+    return CompiledCosts(list(rows), matrix)
@@ -0,0 +1,300 @@
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from freight.bulk_import import iter_csv_rows, iter_xlsx_rows
+from freight.distance_matrix import get_distance_matrix
+from freight.geo_estimate import DEFAULT_DETOUR_FACTOR, get_port_coordinates
+from freight.presets import cargo_qty_default, get_default_cargo, preset_params, preset_voyage
+from freight.route_index import get_route_index
+from freight.voyage_cost import CHARTER, OWNER, VOYAGE_FIELDS, cost_voyages
+from freight.voyage_legs import resolve_rotation
+
+# ==========================================================
+# 🧾 BATCH COSTING (headless, tanpa Streamlit)
+# - input CSV / XLSX: 1 row = 1 voyage (POL, POD, Next Port,
+#   Barge Class, Cargo Type, Qty, Freight Rate, Mode)
+# - parameter kapal dari preset_params; kolom dengan nama field
+#   engine (mis. price_fuel) override preset per row
+# - chunk diproses di process pool, output ditulis streaming
+#   sesuai urutan input -> memory tetap flat
+# - distance route langsung: 1 lookup id per chunk di distance
+#   matrix (mmap, file sama untuk semua worker); route yang tidak
+#   ada di tabel -> multi-leg / estimasi (resolve_rotation), RouteIndex
+#   baru dibangun di worker kalau ada row yang butuh fallback itu
+#
+#   python -m freight.batch_costing quotes.xlsx -o priced.csv
+# ==========================================================
+
+CHUNK_SIZE = 2000
+MATRIX_FILE = "distance_data.mat"
+
+_HEADER_ALIASES = {
+    "pol": "pol", "loading port": "pol", "from": "pol",
+    "pod": "pod", "discharge port": "pod", "to": "pod",
+    "next": "next_port", "next port": "next_port",
+    "barge": "barge", "barge class": "barge", "class": "barge",
+    "cargo": "cargo", "cargo type": "cargo", "type": "cargo",
+    "qty": "qty", "quantity": "qty",
+    "freight": "freight", "freight rate": "freight",
+    "mode": "mode",
+}
+
+OUTPUT_COLUMNS = [
+    ("Distance Laden (NM)", "distance_laden"),
+    ("Distance Ballast (NM)", "distance_ballast"),
+    ("Total Voyage (Days)", "total_voyage_days"),
+    ("Fuel Cost", "cost_fuel"),
+    ("FW Cost", "cost_fw"),
+    ("Charter / Angsuran", "charter_cost"),
+    ("Crew", "crew_cost"),
+    ("Insurance", "insurance_cost"),
+    ("Docking", "docking_cost"),
+    ("Maintenance", "maintenance_cost"),
+    ("Certificate", "certificate_cost"),
+    ("Premi", "premi_cost"),
+    ("Port Cost", "port_cost"),
+    ("Other Cost", "other_cost"),
+    ("Total Cost", "total_cost"),
+    ("Freight Cost / Unit", "freight_cost_mt"),
+    ("Revenue", "revenue_user"),
+    ("PPH", "pph_user"),
+    ("Profit", "profit_user"),
+    ("Profit (%)", "profit_percent_user"),
+    # nama & definisi sama dengan rate card / route ranking / speed optimizer
+    ("Voyage Cost / Day", "tce_per_day"),
+    ("TCE Earnings / Day", "tce_earnings_per_day"),
+]
+
+
+def _columns(header):
+    columns = {}
+    for i, cell in enumerate(header):
+        name = str(cell or "").strip()
+        key = _HEADER_ALIASES.get(name.lower(), name if name in VOYAGE_FIELDS else None)
+        if key and key not in columns:
+            columns[key] = i
+
+    missing = {"pol", "pod", "barge"} - columns.keys()
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ada: {', '.join(sorted(missing))}")
+    return columns
+
+
+def _number(value, default=0.0):
+    if value in (None, ""):
+        return default
+    return float(str(value).replace(",", "")) if isinstance(value, str) else float(value)
+
+
+# ===== WORKER (1x per process) =====
+_worker = {}
+
+
+def _init_worker(backend, data_path, coord_path, detour_factor, matrix_path):
+    from freight.distance_store import open_distance_store
+
+    store = open_distance_store(backend, data_path)
+    _worker.update(
+        route_index=lambda: get_route_index(store),
+        matrix=get_distance_matrix(store, matrix_path),
+        coords=get_port_coordinates(coord_path),
+        detour_factor=detour_factor,
+    )
+
+
+def _voyage_inputs(row, columns):
+    def cell(name):
+        i = columns.get(name)
+        return row[i] if i is not None and i < len(row) else None
+
+    barge = str(cell("barge") or "").strip()
+    if barge not in preset_params:
+        raise ValueError(f"Barge class tidak dikenal: {barge!r}")
+
+    mode = str(cell("mode") or OWNER).strip().title()
+    if mode not in (OWNER, CHARTER):
+        raise ValueError(f"Mode harus {OWNER} / {CHARTER}")
+
+    cargo = str(cell("cargo") or "").strip()
+    qty = _number(cell("qty"), None)
+    if qty is None:
+        # Qty kosong -> default barge, cuma kalau cargo type dikenal
+        if cargo not in cargo_qty_default.get(barge, {}):
+            raise ValueError(f"Cargo type tidak dikenal untuk {barge}: {cargo!r} (isi Qty)")
+        qty = get_default_cargo(barge, cargo)
+
+    voyage = preset_voyage(barge)
+    voyage.update(
+        qyt_cargo=qty,
+        freight_price=_number(cell("freight")),
+    )
+    for name in VOYAGE_FIELDS:
+        if name in columns and cell(name) not in (None, ""):
+            voyage[name] = _number(cell(name))
+
+    voyage["mode"] = mode
+    return voyage
+
+
+def _ports(row, columns):
+    def cell(name):
+        i = columns.get(name)
+        return row[i] if i is not None and i < len(row) else None
+
+    ports = [str(cell("pol") or ""), str(cell("pod") or "")]
+    next_port = cell("next_port")
+    if next_port not in (None, ""):
+        ports.append(str(next_port))
+    return ports
+
+
+def cost_chunk(rows, columns):
+    # return list output row (input + hasil), urutan sama dengan input
+    route_index, coords, matrix = _worker["route_index"], _worker["coords"], _worker["matrix"]
+
+    # route langsung semua row sekaligus (NaN = tidak ada di tabel)
+    row_ports = [_ports(row, columns) for row in rows]
+    laden = matrix.lookup([ports[0] for ports in row_ports], [ports[1] for ports in row_ports])
+    ballast = matrix.lookup([ports[1] for ports in row_ports], [ports[-1] for ports in row_ports])
+
+    voyages, errors = [], []
+    for row, ports, direct_laden, direct_ballast in zip(rows, row_ports, laden, ballast):
+        try:
+            voyage = _voyage_inputs(row, columns)
+
+            if len(ports) == 2 and not np.isnan(direct_laden):
+                distances, estimated = np.array([direct_laden]), [False]
+            elif len(ports) == 3 and not np.isnan(direct_laden) and not np.isnan(direct_ballast):
+                distances, estimated = np.array([direct_laden, direct_ballast]), [False, False]
+            else:
+                distances, _, estimated = resolve_rotation(
+                    route_index, coords, ports, _worker["detour_factor"], matrix=matrix
+                )
+            if not np.all(distances > 0):
+                raise ValueError("Distance tidak ditemukan")
+
+            voyage["distance_laden"] = distances[0]
+            voyage["distance_ballast"] = distances[1] if len(distances) > 1 else 0
+            for leg in ("laden", "ballast"):
+                if voyage[f"distance_{leg}"] and voyage[f"speed_{leg}"] <= 0:
+                    raise ValueError("Speed laden / ballast harus > 0")
+
+            voyages.append(voyage)
+            errors.append("ESTIMATE" if any(estimated) else "")
+        except (ValueError, TypeError, IndexError) as e:
+            voyages.append(None)
+            errors.append(f"ERROR: {e}")
+
+    valid = [voyage for voyage in voyages if voyage is not None]
+    result = {}
+    if valid:
+        result = cost_voyages({
+            name: np.array([voyage[name] for voyage in valid], dtype=object if name == "mode" else float)
+            for name in list(VOYAGE_FIELDS) + ["mode"]
+        })
+        result["distance_laden"] = np.array([voyage["distance_laden"] for voyage in valid])
+        result["distance_ballast"] = np.array([voyage["distance_ballast"] for voyage in valid])
+
+    output, j = [], 0
+    for row, voyage, note in zip(rows, voyages, errors):
+        if voyage is None:
+            values = [""] * len(OUTPUT_COLUMNS)
+        else:
+            values = [round(float(result[key][j]), 2) for _, key in OUTPUT_COLUMNS]
+            j += 1
+        output.append(list(row) + values + [note])
+    return output
+
+
+def _chunks(rows, size):
+    # row kosong dibuang dulu, baru dipotong -> blok row kosong panjang tidak menghentikan input
+    rows = (list(row) for row in rows if any(cell not in (None, "") for cell in row))
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(rows, writer, backend="sqlite", data_path="distance_data.json",
+              coord_path="port_coordinates.json", detour_factor=DEFAULT_DETOUR_FACTOR,
+              workers=None, chunk_size=CHUNK_SIZE, matrix_path=MATRIX_FILE):
+    from freight.distance_store import open_distance_store
+
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return 0
+    columns = _columns(header)
+    writer.writerow(list(header) + [label for label, _ in OUTPUT_COLUMNS] + ["Note"])
+
+    # matrix di-build (kalau stale) sekali di sini, worker cuma map file yang sama
+    get_distance_matrix(open_distance_store(backend, data_path), matrix_path)
+    init_args = (backend, data_path, coord_path, detour_factor, matrix_path)
+    workers = workers or os.cpu_count() or 1
+    count = 0
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as pool:
+        # maksimal 2 chunk per worker in-flight, output urut sesuai input
+        pending = deque()
+        for chunk in _chunks(rows, chunk_size):
+            pending.append(pool.submit(cost_chunk, chunk, columns))
+            if len(pending) >= 2 * workers:
+                for row in pending.popleft().result():
+                    writer.writerow(row)
+                    count += 1
+
+        while pending:
+            for row in pending.popleft().result():
+                writer.writerow(row)
+                count += 1
+
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch voyage costing from CSV / XLSX (tanpa Streamlit)")
+    parser.add_argument("path")
+    parser.add_argument("-o", "--output", default="-", help="CSV output (default stdout)")
+    parser.add_argument("--backend", default=os.environ.get("FREIGHT_DISTANCE_BACKEND", "sqlite"))
+    parser.add_argument("--data", default="distance_data.json")
+    parser.add_argument("--coordinates", default="port_coordinates.json")
+    parser.add_argument("--matrix", default=MATRIX_FILE, help="distance matrix mmap (rebuild otomatis kalau stale)")
+    parser.add_argument("--detour-factor", type=float, default=DEFAULT_DETOUR_FACTOR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    ext = os.path.splitext(args.path)[1].lower()
+    with open(args.path, "rb") as f:
+        if ext == ".csv":
+            rows = iter_csv_rows(f)
+        elif ext in (".xlsx", ".xlsm"):
+            rows = iter_xlsx_rows(f)
+        else:
+            raise SystemExit(f"Format file tidak didukung: {ext}")
+
+        out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+        try:
+            count = run_batch(
+                rows, csv.writer(out),
+                backend=args.backend, data_path=args.data, coord_path=args.coordinates,
+                detour_factor=args.detour_factor, workers=args.workers, chunk_size=args.chunk_size,
+                matrix_path=args.matrix
+            )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    print(f"{count} voyages", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
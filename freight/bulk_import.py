@@ -0,0 +1,220 @@
+import argparse
+import csv
+import io
+import os
+
+from freight.route_index import normalize_port, route_key
+
+# ==========================================================
+# 📤 BULK IMPORT DISTANCE (CSV / XLSX)
+# - baris dibaca streaming (XLSX pakai openpyxl read_only)
+# - nama port dinormalisasi sama seperti find_distance
+# - commit per batch, memory cuma sebesar 1 batch
+# ==========================================================
+
+BATCH_SIZE = 500
+MAX_MESSAGES = 20
+
+_HEADER_ALIASES = {
+    "pol": "pol", "loading port": "pol", "from": "pol", "origin": "pol",
+    "pod": "pod", "discharge port": "pod", "to": "pod", "destination": "pod",
+    "distance": "distance", "distance (nm)": "distance", "nm": "distance",
+    "route": "route",
+}
+
+
+def iter_csv_rows(fileobj):
+    # fileobj bisa bytes (upload Streamlit) atau text
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    yield from csv.reader(text, dialect)
+
+
+def iter_xlsx_rows(fileobj):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _columns(header):
+    names = [_HEADER_ALIASES.get(str(cell or "").strip().lower()) for cell in header]
+    columns = {name: i for i, name in reversed(list(enumerate(names))) if name}
+
+    if "distance" in columns and ("route" in columns or {"pol", "pod"} <= columns.keys()):
+        return columns
+    return None
+
+
+def _parse_distance(value):
+    if isinstance(value, (int, float)):
+        return value
+    value = str(value or "").strip()
+    return float(value) if "." in value else int(value)
+
+
+def _parse_row(row, columns):
+    def cell(name):
+        i = columns[name]
+        return row[i] if i < len(row) else None
+
+    if "route" in columns:
+        parts = str(cell("route") or "").split(" - ")
+        if len(parts) != 2:
+            raise ValueError("route harus format 'POL - POD'")
+        pol, pod = parts
+    else:
+        pol, pod = cell("pol"), cell("pod")
+
+    pol, pod = normalize_port(str(pol or "")), normalize_port(str(pod or ""))
+    if not pol or not pod:
+        raise ValueError("POL / POD kosong")
+    if pol == pod:
+        raise ValueError("POL dan POD sama")
+
+    try:
+        distance = _parse_distance(cell("distance"))
+    except ValueError:
+        raise ValueError(f"distance tidak valid: {cell('distance')!r}")
+    if not distance > 0:
+        raise ValueError("distance harus > 0")
+
+    return pol, pod, distance
+
+
+def import_distance_rows(store, rows, update_existing=False, batch_size=BATCH_SIZE):
+    report = {
+        "accepted": 0, "updated": 0, "duplicates": 0,
+        "conflicts": 0, "rejected": 0, "messages": [],
+    }
+
+    def note(line, message):
+        if len(report["messages"]) < MAX_MESSAGES:
+            report["messages"].append(f"Row {line}: {message}")
+
+    rows = iter(rows)
+    columns = None
+    line = 0
+
+    # header boleh tidak ada -> default POL, POD, Distance
+    for first in rows:
+        line += 1
+        if not any(cell not in (None, "") for cell in first):
+            continue
+        columns = _columns(first)
+        if columns is None:
+            columns = {"pol": 0, "pod": 1, "distance": 2}
+            rows = _chain(first, rows)
+            line -= 1
+        break
+
+    if columns is None:
+        return report
+
+    batch = {}
+
+    def flush():
+        if batch:
+            store.upsert_many(batch.values())
+            batch.clear()
+
+    for row in rows:
+        line += 1
+        if not any(cell not in (None, "") for cell in row):
+            continue
+
+        try:
+            pol, pod, distance = _parse_row(row, columns)
+        except ValueError as e:
+            report["rejected"] += 1
+            note(line, str(e))
+            continue
+
+        key = route_key(pol, pod)
+
+        # duplikat di batch yang sama (termasuk arah balik)
+        if key in batch:
+            existing = batch[key]
+        else:
+            existing = store.find_pair(pol, pod)
+
+        if existing is not None:
+            existing_route, existing_distance = existing
+            if existing_distance == distance:
+                report["duplicates"] += 1
+                continue
+
+            if not update_existing:
+                report["conflicts"] += 1
+                note(line, f"{pol} - {pod} = {distance} bentrok dengan {existing_route} = {existing_distance}")
+                continue
+
+            batch[key] = (existing_route, distance)
+            report["updated"] += 1
+        else:
+            batch[key] = (f"{pol} - {pod}", distance)
+            report["accepted"] += 1
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return report
+
+
+def _chain(first, rows):
+    yield first
+    yield from rows
+
+
+def import_distance_file(store, fileobj, filename, update_existing=False, batch_size=BATCH_SIZE):
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext == ".csv":
+        rows = iter_csv_rows(fileobj)
+    elif ext in (".xlsx", ".xlsm"):
+        rows = iter_xlsx_rows(fileobj)
+    else:
+        raise ValueError(f"Format file tidak didukung: {ext}")
+
+    return import_distance_rows(store, rows, update_existing=update_existing, batch_size=batch_size)
+
+
+def main(argv=None):
+    from freight.distance_store import open_distance_store
+
+    parser = argparse.ArgumentParser(description="Bulk import distance table from CSV / XLSX")
+    parser.add_argument("path")
+    parser.add_argument("--backend", default=os.environ.get("FREIGHT_DISTANCE_BACKEND", "sqlite"))
+    parser.add_argument("--data", default="distance_data.json")
+    parser.add_argument("--update-existing", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = open_distance_store(args.backend, args.data)
+    with open(args.path, "rb") as f:
+        report = import_distance_file(store, f, args.path, update_existing=args.update_existing)
+
+    print(
+        f"Accepted {report['accepted']}, updated {report['updated']}, "
+        f"duplicates {report['duplicates']}, conflicts {report['conflicts']}, "
+        f"rejected {report['rejected']}"
+    )
+    for message in report["messages"]:
+        print(f"  {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from freight.route_index import normalize_port, split_route
+
+# ==========================================================
+# 🧮 COMPACT DISTANCE MATRIX (memory-mapped)
+# - nama port -> integer id (sorted), distance = CSR float64 simetris
+#   (float64 -> distance pecahan sama persis dengan tabel / app)
+# - 1 file biner, dibuka np.memmap read-only: semua worker process
+#   & process Streamlit share page cache yang sama, tidak ada copy
+#   per session
+# - lookup pakai id integer, bisa vectorized (array id sekaligus)
+#
+# Layout file:
+#   MAGIC (8) | header_len (uint64) | header JSON | pad 8
+#   indptr int64[n+1] | indices int32[nnz] | data float64[nnz] | names utf-8
+#   (offset di header relatif ke awal section data, setelah pad)
+# ==========================================================
+
+MAGIC = b"FRDMAT2\0"
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def build_distance_matrix(data, path, source_version=None):
+    # data = {"POL - POD": distance} (format load_distances)
+    edges = {}
+    ports = set()
+    for route, distance in data.items():
+        pair = split_route(route)
+        if pair is None:
+            continue
+        # port list sama seperti RouteIndex.ports
+        ports.update(pair)
+        if pair[0] == pair[1]:
+            continue
+        # route pertama menang, sama seperti RouteIndex
+        edges.setdefault(pair, distance)
+        edges.setdefault(pair[::-1], edges[pair])
+
+    ports = sorted(ports)
+    ids = {port: i for i, port in enumerate(ports)}
+
+    rows = np.array([ids[a] for a, _ in edges], dtype=np.int64)
+    cols = np.array([ids[b] for _, b in edges], dtype=np.int32)
+    values = np.array(list(edges.values()), dtype=np.float64)
+
+    order = np.lexsort((cols, rows))
+    rows, cols, values = rows[order], cols[order], values[order]
+    indptr = np.zeros(len(ports) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(ports)), out=indptr[1:])
+
+    names = "\n".join(ports).encode("utf-8")
+
+    header = {"n": len(ports), "nnz": len(values), "source_version": repr(source_version)}
+    offset = 0
+    for name, array in (("indptr", indptr), ("indices", cols), ("data", values)):
+        header[name] = offset
+        offset = _align(offset + array.nbytes)
+    header["names"] = offset
+    header["names_len"] = len(names)
+
+    header_bytes = json.dumps(header).encode()
+    base = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    # tmp unik per build (folder sama -> os.replace atomic); 2 process rebuild bareng tidak saling timpa
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in (("indptr", indptr), ("indices", cols), ("data", values)):
+            f.seek(base + header[name])
+            f.write(array.tobytes())
+        f.seek(base + header["names"])
+        f.write(names)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} bukan file distance matrix")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+
+    header["base"] = _align(len(MAGIC) + 8 + length)
+    return header
+
+
+class DistanceMatrix:
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        n, nnz = self.header["n"], self.header["nnz"]
+
+        raw = np.memmap(path, dtype=np.uint8, mode="r")[self.header["base"]:]
+
+        def section(name, size):
+            start = self.header[name]
+            return raw[start:start + size]
+
+        self.indptr = section("indptr", 8 * (n + 1)).view(np.int64)
+        self.indices = section("indices", 4 * nnz).view(np.int32)
+        self.data = section("data", 8 * nnz).view(np.float64)
+
+        names = bytes(section("names", self.header["names_len"]))
+        self.ports = names.decode("utf-8").split("\n") if n else []
+        self.ids = {port: i for i, port in enumerate(self.ports)}
+
+    @property
+    def source_version(self):
+        return self.header["source_version"]
+
+    def port_id(self, port):
+        return self.ids.get(normalize_port(port), -1)
+
+    def port_ids(self, ports):
+        return np.array([self.port_id(port) for port in ports], dtype=np.int64)
+
+    def lookup_ids(self, pol_ids, pod_ids):
+        # vectorized binary search di tiap row CSR; NaN kalau tidak ada route
+        pol_ids = np.asarray(pol_ids, dtype=np.int64)
+        pod_ids = np.asarray(pod_ids, dtype=np.int64)
+        valid = (pol_ids >= 0) & (pod_ids >= 0)
+
+        result = np.full(len(pol_ids), np.nan, dtype=np.float64)
+        if not len(self.indices):
+            return result
+
+        rows = np.where(valid, pol_ids, 0)
+        lo = self.indptr[rows].copy()
+        hi = np.where(valid, self.indptr[rows + 1], lo)
+
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            go_right = active & (self.indices[np.minimum(mid, len(self.indices) - 1)] < pod_ids)
+            lo = np.where(go_right, mid + 1, lo)
+            hi = np.where(active & ~go_right, mid, hi)
+
+        found = valid & (lo < self.indptr[rows + 1])
+        found[found] = self.indices[lo[found]] == pod_ids[found]
+
+        result[found] = self.data[lo[found]]
+        return result
+
+    def lookup(self, pols, pods):
+        return self.lookup_ids(self.port_ids(pols), self.port_ids(pods))
+
+    def distance(self, pol, pod):
+        # angka bulat tetap int (sama dengan RouteIndex / tampilan lama)
+        value = self.lookup([pol], [pod])[0]
+        if np.isnan(value):
+            return 0
+        return int(value) if value.is_integer() else float(value)
+
+    def neighbours_of(self, port):
+        i = self.port_id(port)
+        if i < 0:
+            return []
+        return [self.ports[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+
+# ===== SHARED (per process, rebuild kalau store berubah) =====
+_lock = threading.Lock()
+_cache = {}
+
+
+def get_distance_matrix(store, path):
+    source_version = store.version()
+    version = repr(source_version)
+
+    entry = _cache.get(path)
+    if entry is not None and entry.source_version == version:
+        return entry
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry.source_version == version:
+            return entry
+
+        # file dari process lain mungkin sudah up to date
+        try:
+            stale = read_header(path)["source_version"] != version
+        except (FileNotFoundError, ValueError):
+            stale = True
+
+        if stale:
+            build_distance_matrix(store.load_all(), path, source_version)
+
+        matrix = DistanceMatrix(path)
+        _cache[path] = matrix
+        return matrix
+
+
+def main(argv=None):
+    from freight.distance_store import open_distance_store
+
+    parser = argparse.ArgumentParser(description="Build memory-mapped distance matrix")
+    parser.add_argument("output", nargs="?", default="distance_data.mat")
+    parser.add_argument("--backend", default=os.environ.get("FREIGHT_DISTANCE_BACKEND", "sqlite"))
+    parser.add_argument("--data", default="distance_data.json")
+    args = parser.parse_args(argv)
+
+    store = open_distance_store(args.backend, args.data)
+    build_distance_matrix(store.load_all(), args.output, store.version())
+
+    header = read_header(args.output)
+    print(f"{args.output}: {header['n']} ports, {header['nnz']} entries, {os.path.getsize(args.output)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa flock, store JSON cuma aman untuk 1 process
+    fcntl = None
+
+from freight.route_index import normalize_port, route_key, split_route
+
+# ==========================================================
+# 🗄️ DISTANCE STORE
+# - "sqlite" (default): WAL mode, 1 row per route, edit = 1 row
+# - "json"  : distance_data.json + append-only journal
+# - keduanya punya API sama: load_all / add_route / upsert_route /
+#   delete_route / replace_all / version
+# ==========================================================
+
+
+def _normalized_pair(route):
+    pair = split_route(route)
+    return pair if pair is not None else ("", "")
+
+
+# ===== JSON + JOURNAL =====
+# distance_data.json = snapshot terakhir (format lama, tetap source of truth)
+# distance_data.journal = 1 baris JSON per edit (append-only, O(1) per edit)
+# load = snapshot + replay journal; compaction jalan di background
+# antar process: flock di distance_data.journal.lock (bukan di journal,
+# journal di-replace waktu compaction) -> edit & compaction exclusive,
+# reload shared; tanpa fcntl (Windows) cuma lock antar thread
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+
+def _write_json_tmp(path, data):
+    # tmp unik (folder sama -> os.replace atomic); 2 process tidak saling timpa
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+def _write_json_atomic(path, data):
+    # tulis ke .tmp, fsync, lalu rename -> file lama/baru, tidak pernah setengah
+    os.replace(_write_json_tmp(path, data), path)
+
+
+def _apply_record(data, record):
+    if record.get("op") == "delete":
+        data.pop(record["route"], None)
+    else:
+        data[record["route"]] = record["distance"]
+
+
+class JsonDistanceStore:
+
+    def __init__(self, path, journal_path=None, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.lock_path = self.journal_path + ".lock"
+        self.cache_key = os.path.abspath(path)
+        self.compact_bytes = compact_bytes
+
+        self._lock = threading.RLock()
+        self._data = None
+        self._pairs = {}
+        self._stamp = None
+        self._compacting = False
+
+    @contextmanager
+    def _file_lock(self, exclusive=True):
+        # dipanggil sambil pegang self._lock, tidak nested
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _file_stamp(self):
+        stamps = []
+        for path in (self.path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def version(self):
+        return self._file_stamp()
+
+    def _file_ids(self):
+        # berubah kalau snapshot / journal di-replace (compaction); append biasa tidak
+        try:
+            stat = os.stat(self.path)
+            snapshot = stat.st_ino, stat.st_mtime_ns
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            journal = os.stat(self.journal_path).st_ino
+        except FileNotFoundError:
+            journal = None
+        return snapshot, journal
+
+    def _load(self):
+        # reload kalau file diubah dari luar (proses lain / edit manual)
+        stamp = self._file_stamp()
+        if self._data is not None and stamp == self._stamp:
+            return
+
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r+") as f:
+                journal = f.read()
+
+                # baris terakhir bisa terpotong kalau crash waktu nulis -> buang
+                if journal and not journal.endswith("\n"):
+                    journal = journal[:journal.rfind("\n") + 1]
+                    f.seek(0)
+                    f.truncate(len(journal.encode()))
+
+            for line in journal.splitlines():
+                try:
+                    _apply_record(data, json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+
+        self._data = {}
+        self._pairs = {}
+        for route, distance in data.items():
+            self._apply({"op": "upsert", "route": route, "distance": distance})
+        self._stamp = stamp
+
+    def _append(self, records):
+        with open(self.journal_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        for record in records:
+            self._apply(record)
+        self._stamp = self._file_stamp()
+
+        if self._stamp[1] and self._stamp[1][1] >= self.compact_bytes:
+            self._schedule_compaction()
+
+    def _apply(self, record):
+        # update state in-memory + route per pasangan port (cek duplikat O(1))
+        route = record["route"]
+        pair = split_route(route)
+        key = route_key(*pair) if pair is not None else None
+
+        if record.get("op") == "delete":
+            if route in self._data:
+                del self._data[route]
+                if key is not None:
+                    self._pairs[key].remove(route)
+                    if not self._pairs[key]:
+                        del self._pairs[key]
+        else:
+            if route not in self._data and key is not None:
+                self._pairs.setdefault(key, []).append(route)
+            self._data[route] = record["distance"]
+
+    def load_all(self):
+        with self._lock, self._file_lock(exclusive=False):
+            self._load()
+            return dict(self._data)
+
+    def find_pair(self, pol, pod):
+        # (route, distance) yang tersimpan untuk pasangan ini (arah mana saja)
+        with self._lock, self._file_lock(exclusive=False):
+            self._load()
+            routes = self._pairs.get(route_key(normalize_port(pol), normalize_port(pod)))
+            if not routes:
+                return None
+            return routes[0], self._data[routes[0]]
+
+    def add_route(self, route, distance):
+        # load + cek duplikat + append di bawah 1 lock -> process lain tidak bisa nyelip
+        with self._lock, self._file_lock():
+            self._load()
+
+            pair = split_route(route)
+            if route in self._data or (pair is not None and route_key(*pair) in self._pairs):
+                return False
+
+            self._append([{"op": "upsert", "route": route, "distance": distance}])
+            return True
+
+    def upsert_route(self, route, distance):
+        with self._lock, self._file_lock():
+            self._load()
+            self._append([{"op": "upsert", "route": route, "distance": distance}])
+
+    def upsert_many(self, items):
+        records = [{"op": "upsert", "route": route, "distance": distance} for route, distance in items]
+        with self._lock, self._file_lock():
+            self._load()
+            self._append(records)
+        return len(records)
+
+    def delete_route(self, route):
+        with self._lock, self._file_lock():
+            self._load()
+            if route not in self._data:
+                return False
+
+            self._append([{"op": "delete", "route": route}])
+            return True
+
+    def replace_all(self, data):
+        # façade untuk save_distances(): cuma selisihnya yang masuk journal
+        with self._lock, self._file_lock():
+            self._load()
+            records = [{"op": "delete", "route": route} for route in self._data if route not in data]
+            records += [
+                {"op": "upsert", "route": route, "distance": distance}
+                for route, distance in data.items()
+                if route not in self._data or self._data[route] != distance
+            ]
+            if records:
+                self._append(records)
+
+    # ===== COMPACTION =====
+    def _schedule_compaction(self):
+        if self._compacting:
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        try:
+            with self._lock, self._file_lock(exclusive=False):
+                self._load()
+                snapshot = dict(self._data)
+                try:
+                    offset = os.path.getsize(self.journal_path)
+                except FileNotFoundError:
+                    return
+                files = self._file_ids()
+
+            # snapshot ditulis tanpa lock, edit baru tetap bisa append
+            tmp_path = _write_json_tmp(self.path, snapshot)
+
+            # exclusive sampai journal diganti: append process lain antri, tidak hilang
+            with self._lock, self._file_lock():
+                if self._file_ids() != files:
+                    # process lain sudah compact duluan -> offset tidak berlaku lagi
+                    os.unlink(tmp_path)
+                    return
+
+                with open(self.journal_path, "r") as f:
+                    f.seek(offset)
+                    tail = f.read()
+
+                # crash di antara 2 replace ini aman: replay journal idempotent
+                os.replace(tmp_path, self.path)
+                journal_tmp = f"{self.journal_path}.tmp"
+                with open(journal_tmp, "w") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(journal_tmp, self.journal_path)
+
+                self._stamp = self._file_stamp()
+        finally:
+            self._compacting = False
+
+
+# ===== SQLITE =====
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    route TEXT NOT NULL UNIQUE,
+    pol TEXT NOT NULL,
+    pod TEXT NOT NULL,
+    distance NUMERIC NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_routes_pol_pod ON routes (pol, pod);
+CREATE INDEX IF NOT EXISTS idx_routes_pod ON routes (pod);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+
+CREATE TRIGGER IF NOT EXISTS routes_version_insert AFTER INSERT ON routes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS routes_version_update AFTER UPDATE ON routes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS routes_version_delete AFTER DELETE ON routes
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+"""
+
+_UPSERT = """
+INSERT INTO routes (route, pol, pod, distance) VALUES (?, ?, ?, ?)
+ON CONFLICT (route) DO UPDATE SET distance = excluded.distance
+WHERE distance IS NOT excluded.distance
+"""
+
+
+class SQLiteDistanceStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.cache_key = os.path.abspath(path)
+        self._local = threading.local()
+
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        # 1 koneksi per thread (tiap session Streamlit jalan di thread sendiri)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def version(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def load_all(self):
+        rows = self._conn().execute("SELECT route, distance FROM routes ORDER BY id")
+        return dict(rows.fetchall())
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+
+    def find_pair(self, pol, pod, conn=None):
+        # (route, distance) yang tersimpan untuk pasangan ini (arah mana saja)
+        pol, pod = normalize_port(pol), normalize_port(pod)
+        return (conn or self._conn()).execute(
+            "SELECT route, distance FROM routes WHERE (pol = ? AND pod = ?) OR (pol = ? AND pod = ?) "
+            "ORDER BY id LIMIT 1",
+            (pol, pod, pod, pol)
+        ).fetchone()
+
+    def add_route(self, route, distance):
+        pol, pod = _normalized_pair(route)
+
+        with self._transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM routes WHERE route = ?", (route,)).fetchone()
+            if exists or (pol and self.find_pair(pol, pod, conn) is not None):
+                return False
+
+            conn.execute(
+                "INSERT INTO routes (route, pol, pod, distance) VALUES (?, ?, ?, ?)",
+                (route, pol, pod, distance)
+            )
+            return True
+
+    def upsert_route(self, route, distance):
+        pol, pod = _normalized_pair(route)
+        with self._transaction() as conn:
+            conn.execute(_UPSERT, (route, pol, pod, distance))
+
+    def upsert_many(self, items):
+        rows = [(route, *_normalized_pair(route), distance) for route, distance in items]
+        with self._transaction() as conn:
+            conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    def delete_route(self, route):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM routes WHERE route = ?", (route,)).rowcount > 0
+
+    def seed_from_json(self, json_path):
+        # seed 1x seumur database (marker 'seeded' di meta), bukan tiap start:
+        # user hapus semua route -> tetap kosong, tidak balik dari JSON
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone():
+                return 0
+
+            count = 0
+            if conn.execute("SELECT 1 FROM routes LIMIT 1").fetchone() is None:
+                if not os.path.exists(json_path):
+                    return 0
+                with open(json_path, "r") as f:
+                    data = json.load(f)
+                conn.executemany(_UPSERT, [(route, *_normalized_pair(route), distance) for route, distance in data.items()])
+                count = len(data)
+
+            # database lama (sudah ada isi, belum ada marker) cukup ditandai
+            conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', 1)")
+            return count
+
+    def replace_all(self, data):
+        # façade untuk save_distances(): hanya row yang berubah yang ditulis
+        with self._transaction() as conn:
+            existing = dict(conn.execute("SELECT route, distance FROM routes").fetchall())
+
+            removed = [(route,) for route in existing if route not in data]
+            conn.executemany("DELETE FROM routes WHERE route = ?", removed)
+
+            changed = [
+                (route, *_normalized_pair(route), distance)
+                for route, distance in data.items()
+                if route not in existing or existing[route] != distance
+            ]
+            conn.executemany(_UPSERT, changed)
+
+
+class _Transaction:
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        # IMMEDIATE: ambil write lock di awal, edit paralel antri bukan saling timpa
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+# ===== IMPORT / EXPORT (format distance_data.json) =====
+def import_json(store, json_path):
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    return store.upsert_many(data.items())
+
+
+def export_json(store, json_path):
+    data = store.load_all()
+    _write_json_atomic(json_path, data)
+    return len(data)
+
+
+# ===== FACTORY (1 store per file, shared semua session) =====
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_distance_store(backend, json_path, db_path=None):
+    db_path = db_path or os.path.splitext(json_path)[0] + ".db"
+    key = (backend, os.path.abspath(json_path), os.path.abspath(db_path))
+
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is not None:
+            return store
+
+        if backend == "json":
+            store = JsonDistanceStore(json_path)
+        elif backend == "sqlite":
+            store = SQLiteDistanceStore(db_path)
+            # 🔥 pertama kali jalan: isi dari distance_data.json
+            store.seed_from_json(json_path)
+        else:
+            raise ValueError(f"Unknown distance backend: {backend}")
+
+        _stores[key] = store
+        return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import / export distance table (SQLite <-> JSON)")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("json_path")
+    parser.add_argument("--db", default="distance_data.db")
+    args = parser.parse_args(argv)
+
+    store = SQLiteDistanceStore(args.db)
+    if args.action == "import":
+        print(f"Imported {import_json(store, args.json_path)} routes into {args.db}")
+    else:
+        print(f"Exported {export_json(store, args.json_path)} routes to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import heapq
+import os
+from collections import deque
+
+import numpy as np
+
+from freight.presets import cargo_qty_default, preset_params
+from freight.route_graph import all_pairs_matrix
+from freight.route_index import normalize_port
+from freight.voyage_cost import OWNER, VOYAGE_FIELDS, cost_voyages
+
+# ==========================================================
+# 🚢 FLEET SIMULATION (discrete event)
+# - fleet campuran barge class (preset_params), demand cargo per hari,
+#   distance dari tabel route (direct dulu, kalau tidak ada multi-leg)
+# - event queue = heap (waktu, seq, jenis, id); state kapal = array NumPy
+# - tiap voyage: ballast reposition -> antri berth POL -> loading
+#   -> laden -> antri berth POD -> discharge -> idle di POD
+# - order dibagi per lift sesuai kapasitas barge (cargo_qty_default)
+# - cost voyage dihitung di akhir pakai cost_voyages (1 call);
+#   waktu antri berth dihitung sebagai port stay
+# - voyage yang masih jalan di akhir horizon: hari sibuk dihitung,
+#   cost di-prorate (hari berjalan / hari voyage), revenue baru diakui
+#   waktu discharge
+# ==========================================================
+
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_BERTHS = 2
+
+# jenis event
+_RELEASE, _ARRIVE, _SERVICE_DONE = 0, 1, 2
+
+# fase kapal
+_IDLE, _TO_POL, _TO_POD = 0, 1, 2
+
+# biaya bulanan yang tetap jalan walau kapal idle
+_FIXED_MONTHLY = ("charter", "crew", "insurance", "docking", "maintenance", "certificate")
+
+
+def _distance_matrix(route_index):
+    ports, matrix = all_pairs_matrix(route_index)
+    ids = {port: i for i, port in enumerate(ports)}
+    matrix = np.array(matrix, dtype=float).reshape(len(ports), len(ports))
+
+    # route langsung di tabel menang (sama seperti kalkulator)
+    for (a, b), distance in route_index.distances.items():
+        matrix[ids[a], ids[b]] = matrix[ids[b], ids[a]] = distance
+    np.fill_diagonal(matrix, 0)
+    return ports, ids, matrix
+
+
+class FleetSimulation:
+
+    def __init__(self, route_index, fleet, demand, horizon_days=DEFAULT_HORIZON_DAYS, berths=DEFAULT_BERTHS):
+        # fleet  = [(barge class, jumlah, start port)]
+        # demand = [(hari, pol, pod, cargo type, qty, freight rate)]
+        self.ports, self.port_ids, self.distance = _distance_matrix(route_index)
+        self.horizon = float(horizon_days)
+        self.berths = np.full(len(self.ports), berths, dtype=np.int32)
+        self.queues = [deque() for _ in self.ports]
+
+        classes = []
+        vessel_class, vessel_port = [], []
+        for barge, count, start_port in fleet:
+            if barge not in preset_params or barge == "Custom":
+                raise ValueError(f"Barge class tidak dikenal: {barge!r}")
+            port = self.port_ids.get(normalize_port(start_port))
+            if port is None:
+                raise ValueError(f"Start port tidak ada di tabel route: {start_port!r}")
+            if barge not in classes:
+                classes.append(barge)
+            vessel_class += [classes.index(barge)] * int(count)
+            vessel_port += [port] * int(count)
+
+        self.classes = classes
+        params = [preset_params[barge] for barge in classes]
+        self.speed_laden = np.array([p["speed_laden"] for p in params], dtype=float)
+        self.speed_ballast = np.array([p["speed_ballast"] for p in params], dtype=float)
+        self.stay_pol = np.array([p["port_stay_pol"] for p in params], dtype=float)
+        self.stay_pod = np.array([p["port_stay_pod"] for p in params], dtype=float)
+
+        # ===== STATE KAPAL (compact) =====
+        n = len(vessel_class)
+        self.cls = np.array(vessel_class, dtype=np.int16)
+        self.port = np.array(vessel_port, dtype=np.int32)
+        self.phase = np.zeros(n, dtype=np.int8)
+        self.order = np.full(n, -1, dtype=np.int32)
+        self.lift = np.zeros(n)
+        self.voyage_start = np.zeros(n)
+        self.arrived_at = np.zeros(n)
+        self.waiting = np.zeros(n)
+        self.ballast_nm = np.zeros(n)
+        self.busy_days = np.zeros(n)
+
+        # ===== ORDER (array per order, urut hari release) =====
+        accepted = []
+        self.rejected = []
+        self.demanded = 0.0
+        for day, pol, pod, cargo, qty, freight in sorted(demand, key=lambda order: float(order[0])):
+            if float(day) > self.horizon:
+                continue
+            self.demanded += float(qty)
+            pol_id = self.port_ids.get(normalize_port(pol))
+            pod_id = self.port_ids.get(normalize_port(pod))
+            capacity = [cargo_qty_default.get(barge, {}).get(cargo, 0) for barge in classes]
+
+            # route tidak ada / tidak ada kapal di fleet yang bisa angkut cargo ini
+            if pol_id is None or pod_id is None or not np.isfinite(self.distance[pol_id, pod_id]) \
+                    or not any(capacity):
+                self.rejected.append((day, pol, pod, cargo, qty, freight))
+                continue
+            accepted.append((float(day), pol_id, pod_id, float(qty), float(freight), capacity))
+
+        self.order_day = np.array([order[0] for order in accepted])
+        self.order_pol = np.array([order[1] for order in accepted], dtype=np.int32)
+        self.order_pod = np.array([order[2] for order in accepted], dtype=np.int32)
+        self.remaining = np.array([order[3] for order in accepted])
+        self.order_freight = np.array([order[4] for order in accepted])
+        self.capacity = np.array([order[5] for order in accepted], dtype=float).reshape(len(accepted), len(classes))
+
+        self.pending = []
+        self.events = []
+        self.seq = 0
+        self.voyages = []
+
+    # ===== EVENT QUEUE =====
+    def _push(self, time, kind, key):
+        heapq.heappush(self.events, (time, self.seq, kind, key))
+        self.seq += 1
+
+    def _sail(self, vessel, time, target, speed):
+        distance = self.distance[self.port[vessel], target]
+        self.port[vessel] = target
+        self._push(time + distance / speed / 24, _ARRIVE, vessel)
+        return distance
+
+    # ===== DISPATCH =====
+    def _assign(self, vessel, order, time):
+        lift = min(self.remaining[order], self.capacity[order, self.cls[vessel]])
+        self.remaining[order] -= lift
+        if self.remaining[order] <= 0:
+            self.pending.remove(order)
+
+        self.phase[vessel] = _TO_POL
+        self.order[vessel] = order
+        self.lift[vessel] = lift
+        self.voyage_start[vessel] = time
+        self.waiting[vessel] = 0
+        self.ballast_nm[vessel] = self._sail(vessel, time, self.order_pol[order], self.speed_ballast[self.cls[vessel]])
+
+    def _release(self, order, time):
+        # order baru -> kapal idle yang paling cepat sampai POL (bisa lebih dari 1 lift)
+        self.pending.append(order)
+        while self.remaining[order] > 0:
+            idle = np.flatnonzero(self.phase == _IDLE)
+            cls = self.cls[idle]
+            hours = self.distance[self.port[idle], self.order_pol[order]] / self.speed_ballast[cls]
+            hours = np.where(self.capacity[order, cls] > 0, hours, np.inf)
+            if not len(idle) or not np.isfinite(hours.min()):
+                return
+            self._assign(idle[int(np.argmin(hours))], order, time)
+
+    def _next_order(self, vessel, time):
+        # kapal baru idle -> order pending paling lama yang bisa dia jangkau & angkut
+        if not self.pending:
+            return
+        orders = np.array(self.pending)
+        ok = np.isfinite(self.distance[self.port[vessel], self.order_pol[orders]]) \
+            & (self.capacity[orders, self.cls[vessel]] > 0)
+        if ok.any():
+            self._assign(vessel, orders[int(np.argmax(ok))], time)
+
+    # ===== PORT / BERTH =====
+    def _arrive(self, vessel, time):
+        port = self.port[vessel]
+        self.arrived_at[vessel] = time
+        if self.berths[port] > 0:
+            self.berths[port] -= 1
+            self._start_service(vessel, time)
+        else:
+            self.queues[port].append(vessel)
+
+    def _start_service(self, vessel, time):
+        self.waiting[vessel] += time - self.arrived_at[vessel]
+        cls = self.cls[vessel]
+        stay = self.stay_pol[cls] if self.phase[vessel] == _TO_POL else self.stay_pod[cls]
+        self._push(time + stay, _SERVICE_DONE, vessel)
+
+    def _service_done(self, vessel, time):
+        port = self.port[vessel]
+        if self.queues[port]:
+            self._start_service(self.queues[port].popleft(), time)
+        else:
+            self.berths[port] += 1
+
+        order = self.order[vessel]
+        if self.phase[vessel] == _TO_POL:
+            self.phase[vessel] = _TO_POD
+            self._sail(vessel, time, self.order_pod[order], self.speed_laden[self.cls[vessel]])
+            return
+
+        # discharge selesai -> voyage lengkap, kapal idle di POD
+        self.busy_days[vessel] += time - self.voyage_start[vessel]
+        self.voyages.append(self._record(vessel, self.waiting[vessel], time))
+        self.phase[vessel] = _IDLE
+        self.order[vessel] = -1
+        self._next_order(vessel, time)
+
+    def _record(self, vessel, waiting, time):
+        order = self.order[vessel]
+        return (
+            vessel, order, self.lift[vessel], self.order_freight[order],
+            self.distance[self.order_pol[order], self.order_pod[order]], self.ballast_nm[vessel],
+            waiting, time,
+        )
+
+    def _in_progress(self):
+        # voyage belum selesai di akhir horizon -> (records, hari berjalan)
+        active = np.flatnonzero(self.phase != _IDLE)
+        queued = {int(vessel) for queue in self.queues for vessel in queue}
+        records = []
+        for vessel in active:
+            waiting = self.waiting[vessel]
+            if vessel in queued:
+                # masih antri berth: waktu antri sampai horizon ikut dihitung
+                waiting += self.horizon - self.arrived_at[vessel]
+            records.append(self._record(vessel, waiting, self.horizon))
+        return records, self.horizon - self.voyage_start[active]
+
+    def run(self):
+        for order, day in enumerate(self.order_day):
+            self._push(day, _RELEASE, order)
+
+        while self.events:
+            time, _, kind, key = heapq.heappop(self.events)
+            if time > self.horizon:
+                break
+            if kind == _RELEASE:
+                self._release(key, time)
+            elif kind == _ARRIVE:
+                self._arrive(key, time)
+            else:
+                self._service_done(key, time)
+
+        # voyage yang masih jalan di akhir horizon tetap dihitung sibuk
+        active = self.phase != _IDLE
+        self.busy_days[active] += self.horizon - self.voyage_start[active]
+        return self.report()
+
+    # ===== REPORT =====
+    def _voyage_costs(self, voyages):
+        records = np.array(voyages, dtype=float).reshape(-1, 8)
+        vessel = records[:, 0].astype(int)
+        cls = self.cls[vessel]
+
+        columns = {}
+        for name, default in VOYAGE_FIELDS.items():
+            values = np.array([preset_params[barge].get(name, default) for barge in self.classes], dtype=float)
+            columns[name] = values[cls]
+
+        stays = self.stay_pol[cls] + self.stay_pod[cls]
+        port_costs = np.array(
+            [preset_params[barge]["port_cost_pol"] + preset_params[barge]["port_cost_pod"] for barge in self.classes],
+            dtype=float
+        )
+        columns.update(
+            distance_laden=records[:, 4], distance_ballast=records[:, 5],
+            port_stay_days=stays + records[:, 6], port_cost_calls=port_costs[cls],
+            qyt_cargo=records[:, 2], freight_price=records[:, 3],
+            mode=np.full(len(records), OWNER, dtype=object),
+        )
+        return vessel, records, cost_voyages(columns)
+
+    def report(self):
+        import pandas as pd
+
+        n = len(self.cls)
+        revenue = np.zeros(n)
+        cost = np.zeros(n)
+        voyages = np.zeros(n, dtype=int)
+        waiting = np.zeros(n)
+        cargo = np.zeros(n)
+
+        if self.voyages:
+            vessel, records, result = self._voyage_costs(self.voyages)
+            np.add.at(revenue, vessel, result["revenue_user"] - result["pph_user"])
+            np.add.at(cost, vessel, result["total_cost"])
+            np.add.at(voyages, vessel, 1)
+            np.add.at(waiting, vessel, records[:, 6])
+            np.add.at(cargo, vessel, records[:, 2])
+
+        # voyage yang masih jalan: hari sibuk sudah masuk busy_days -> cost ikut, prorate
+        partial, elapsed = self._in_progress()
+        if partial:
+            vessel, records, result = self._voyage_costs(partial)
+            days = result["total_voyage_days"]
+            fraction = np.clip(np.divide(elapsed, days, out=np.ones(len(days)), where=days > 0), 0, 1)
+            np.add.at(cost, vessel, result["total_cost"] * fraction)
+            np.add.at(waiting, vessel, records[:, 6])
+
+        fixed_monthly = np.array(
+            [sum(preset_params[barge].get(name, 0) for name in _FIXED_MONTHLY) for barge in self.classes]
+        )
+        idle_days = np.maximum(self.horizon - self.busy_days, 0)
+        idle_cost = fixed_monthly[self.cls] / 30 * idle_days
+
+        vessels = pd.DataFrame({
+            "Vessel": [f"{self.classes[c]} #{i + 1}" for i, c in enumerate(self.cls)],
+            "Class": [self.classes[c] for c in self.cls],
+            "Voyages": voyages,
+            "Cargo": cargo,
+            "Utilization (%)": self.busy_days / self.horizon * 100,
+            "Waiting (Days)": waiting,
+            "Revenue (net PPH)": revenue,
+            "Voyage Cost": cost,
+            "Idle Cost": idle_cost,
+            "Profit": revenue - cost - idle_cost,
+        })
+
+        summary = {
+            "vessels": n,
+            "voyages": int(voyages.sum()),
+            "cargo_delivered": float(cargo.sum()),
+            "cargo_demanded": self.demanded,
+            "backlog": float(self.remaining.sum()),
+            "rejected_orders": len(self.rejected),
+            "utilization": float(self.busy_days.sum() / (self.horizon * n) * 100) if n else 0.0,
+            "revenue": float(revenue.sum()),
+            "cost": float(cost.sum() + idle_cost.sum()),
+            "profit": float(vessels["Profit"].sum()),
+        }
+        return vessels, summary
+
+
+def simulate_fleet(route_index, fleet, demand, horizon_days=DEFAULT_HORIZON_DAYS, berths=DEFAULT_BERTHS):
+    return FleetSimulation(route_index, fleet, demand, horizon_days, berths).run()
+
+
+def _read_rows(path):
+    from freight.bulk_import import iter_csv_rows, iter_xlsx_rows
+
+    with open(path, "rb") as f:
+        rows = iter_xlsx_rows(f) if path.lower().endswith((".xlsx", ".xlsm")) else iter_csv_rows(f)
+        header = [str(cell or "").strip().lower() for cell in next(rows)]
+        return [dict(zip(header, row)) for row in rows if any(cell not in (None, "") for cell in row)]
+
+
+def main(argv=None):
+    from freight.distance_store import open_distance_store
+    from freight.route_index import get_route_index
+
+    parser = argparse.ArgumentParser(description="Fleet discrete-event simulation")
+    parser.add_argument("fleet", help="CSV/XLSX: Barge Class, Count, Start Port")
+    parser.add_argument("demand", help="CSV/XLSX: Day, POL, POD, Cargo Type, Qty, Freight Rate")
+    parser.add_argument("-o", "--output", help="CSV hasil per kapal")
+    parser.add_argument("--days", type=float, default=DEFAULT_HORIZON_DAYS)
+    parser.add_argument("--berths", type=int, default=DEFAULT_BERTHS)
+    parser.add_argument("--backend", default=os.environ.get("FREIGHT_DISTANCE_BACKEND", "sqlite"))
+    parser.add_argument("--data", default="distance_data.json")
+    args = parser.parse_args(argv)
+
+    fleet = [
+        (str(row["barge class"]).strip(), int(float(row["count"])), str(row["start port"]))
+        for row in _read_rows(args.fleet)
+    ]
+    demand = [
+        (float(row["day"]), str(row["pol"]), str(row["pod"]), str(row["cargo type"]).strip(),
+         float(row["qty"]), float(row["freight rate"]))
+        for row in _read_rows(args.demand)
+    ]
+
+    store = open_distance_store(args.backend, args.data)
+    vessels, summary = simulate_fleet(get_route_index(store), fleet, demand, args.days, args.berths)
+
+    if args.output:
+        vessels.to_csv(args.output, index=False)
+    for key, value in summary.items():
+        print(f"{key:>16}: {value:,.2f}" if isinstance(value, float) else f"{key:>16}: {value:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from freight.route_index import normalize_port
+
+# ==========================================================
+# 🌐 ESTIMASI DISTANCE (route tidak ada di tabel)
+# - koordinat port dari port_coordinates.json {"Port": [lat, lon]}
+# - great-circle (haversine) / rhumb line, x detour factor
+#   (sungai & alur pelayaran tidak lurus)
+# - semua pakai NumPy: 1 pasangan atau matrix port x port sekali jalan
+# ==========================================================
+
+EARTH_RADIUS_NM = 3440.065
+# median rasio tabel distance vs great-circle saat ini ~1.28
+DEFAULT_DETOUR_FACTOR = 1.3
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def rhumb_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+
+    dlat = lat2 - lat1
+    dlon = np.abs(lon2 - lon1)
+    dlon = np.where(dlon > np.pi, 2 * np.pi - dlon, dlon)
+
+    # stretched latitude difference; q = cos(lat) kalau jalur hampir timur-barat
+    dpsi = np.log(np.tan(np.pi / 4 + lat2 / 2) / np.tan(np.pi / 4 + lat1 / 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(np.abs(dpsi) > 1e-12, dlat / dpsi, np.cos(lat1))
+
+    return EARTH_RADIUS_NM * np.sqrt(dlat ** 2 + (q * dlon) ** 2)
+
+
+_METHODS = {"haversine": haversine_nm, "rhumb": rhumb_nm}
+
+
+class PortCoordinates:
+
+    def __init__(self, data):
+        self.ports = sorted(normalize_port(port) for port in data)
+        self.ids = {port: i for i, port in enumerate(self.ports)}
+
+        coords = {normalize_port(port): latlon for port, latlon in data.items()}
+        self.lat = np.array([coords[port][0] for port in self.ports], dtype=float)
+        self.lon = np.array([coords[port][1] for port in self.ports], dtype=float)
+
+    def __contains__(self, port):
+        return normalize_port(port) in self.ids
+
+    def lookup(self, ports):
+        # index array; -1 kalau koordinat tidak ada
+        return np.array([self.ids.get(normalize_port(port), -1) for port in ports], dtype=np.intp)
+
+
+def estimate_distances(coords, pols, pods, detour_factor=DEFAULT_DETOUR_FACTOR, method="haversine"):
+    # batch pasangan -> array NM, NaN kalau salah satu port tidak punya koordinat
+    i, j = coords.lookup(pols), coords.lookup(pods)
+    valid = (i >= 0) & (j >= 0)
+
+    result = np.full(len(i), np.nan)
+    result[valid] = _METHODS[method](
+        coords.lat[i[valid]], coords.lon[i[valid]],
+        coords.lat[j[valid]], coords.lon[j[valid]]
+    ) * detour_factor
+    return result
+
+
+def estimate_distance(coords, pol, pod, detour_factor=DEFAULT_DETOUR_FACTOR, method="haversine"):
+    value = estimate_distances(coords, [pol], [pod], detour_factor, method)[0]
+    return None if np.isnan(value) else float(value)
+
+
+def estimate_matrix(coords, ports=None, detour_factor=DEFAULT_DETOUR_FACTOR, method="haversine"):
+    # port x port dalam 1 call (broadcasting); default semua port di registry
+    ports = coords.ports if ports is None else [normalize_port(port) for port in ports]
+    ids = coords.lookup(ports)
+    valid = ids >= 0
+
+    lat = np.full(len(ids), np.nan)
+    lon = np.full(len(ids), np.nan)
+    lat[valid] = coords.lat[ids[valid]]
+    lon[valid] = coords.lon[ids[valid]]
+
+    matrix = _METHODS[method](lat[:, None], lon[:, None], lat[None, :], lon[None, :]) * detour_factor
+    return ports, matrix
+
+
+# ===== SHARED CACHE (reload kalau file berubah) =====
+_lock = threading.Lock()
+_cache = {}
+
+
+def get_port_coordinates(path):
+    try:
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        stamp = None
+
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _lock:
+        data = {}
+        if stamp is not None:
+            with open(path, "r") as f:
+                data = json.load(f)
+
+        coords = PortCoordinates(data)
+        _cache[path] = (stamp, coords)
+        return coords
@@ -0,0 +1,135 @@
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+# ==========================================================
+# ⏱️ IMPORT PROFILE (cold start, gaya `python -X importtime`)
+# - python -m freight.import_profile app.py
+# - import top-level script diambil lewat ast (script tidak dijalankan)
+# - semua statement dijalankan urut di process baru dengan
+#   -X importtime; tiap statement diberi marker di stderr
+# - waktu statement = jumlah cumulative module level teratas di
+#   antara 2 marker -> module yang sudah ter-import statement
+#   sebelumnya tidak dihitung 2x (sama seperti cold start asli)
+# - tidak import pandas dkk: tool ini sendiri harus ringan
+# ==========================================================
+
+MARKER = "#import-profile"
+DEFAULT_TOP = 15
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def import_statements(path):
+    # return [(lineno, source)] semua import level module
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source, path)
+    return [
+        (node.lineno, ast.get_source_segment(source, node))
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def _profile_code(statements):
+    # statement gagal (dependency tidak ada) -> dicatat, lanjut ke berikutnya
+    lines = ["import sys"]
+    for i, (_, source) in enumerate(statements):
+        lines += [
+            f"print('{MARKER} {i}', file=sys.stderr, flush=True)",
+            "try:",
+            *("    " + line for line in source.splitlines()),
+            "except Exception as e:",
+            # pesan dirakit dulu: str(e) bisa memicu import (output importtime)
+            "    error = ' '.join(f'{type(e).__name__}: {e}'.split())",
+            f"    print('{MARKER} {i} ERROR', error, file=sys.stderr, flush=True)",
+        ]
+    lines.append(f"print('{MARKER} end', file=sys.stderr, flush=True)")
+    return "\n".join(lines)
+
+
+def _run_once(statements, cwd):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _profile_code(statements)],
+        cwd=cwd, capture_output=True, text=True,
+    )
+
+    elapsed = [0] * len(statements)
+    errors = [None] * len(statements)
+    modules = {}
+    current = None
+    for line in proc.stderr.splitlines():
+        if line.startswith(MARKER):
+            _, index, *error = line.split(" ", 2)
+            if error:
+                errors[int(index)] = error[0].removeprefix("ERROR ")
+            else:
+                current = None if index == "end" else int(index)
+            continue
+
+        match = _LINE.match(line)
+        if match is None or current is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = int(self_us)
+        if len(indent) == 1:
+            # level teratas (tidak di-import oleh module lain)
+            elapsed[current] += int(cumulative_us)
+    return elapsed, errors, modules
+
+
+def profile_imports(path, runs=1):
+    # return (rows, modules); ms = waktu terkecil dari beberapa run
+    statements = import_statements(path)
+    cwd = os.path.dirname(os.path.abspath(path))
+
+    best, errors, modules = None, None, {}
+    for _ in range(max(runs, 1)):
+        elapsed, errors, found = _run_once(statements, cwd)
+        best = elapsed if best is None else [min(a, b) for a, b in zip(best, elapsed)]
+        for name, self_us in found.items():
+            modules[name] = min(self_us, modules.get(name, self_us))
+
+    rows = [
+        {"line": lineno, "statement": " ".join(source.split()), "ms": us / 1000, "error": error}
+        for (lineno, source), us, error in zip(statements, best, errors)
+    ]
+    return rows, {name: us / 1000 for name, us in modules.items()}
+
+
+def format_report(rows, modules, top=DEFAULT_TOP):
+    total = sum(row["ms"] for row in rows) or 1.0
+    out = [f"{'line':>5} {'ms':>9} {'share':>6}  statement"]
+    for row in sorted(rows, key=lambda row: -row["ms"]):
+        statement = row["statement"]
+        if len(statement) > 70:
+            statement = statement[:67] + "..."
+        out.append(f"{row['line']:>5} {row['ms']:>9.1f} {row['ms'] / total:>6.1%}  {statement}")
+        if row["error"]:
+            out.append(f"{'':>23}!! {row['error']}")
+    out.append(f"{'':>5} {sum(row['ms'] for row in rows):>9.1f} ms total ({len(rows)} import statements)")
+
+    if top:
+        out += ["", f"top {top} module (self time):"]
+        for name, ms in sorted(modules.items(), key=lambda item: -item[1])[:top]:
+            out.append(f"{ms:>9.1f} ms  {name}")
+    return "\n".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile top-level import sebuah script")
+    parser.add_argument("script", nargs="?", default="app.py")
+    parser.add_argument("--runs", type=int, default=1, help="ambil waktu terkecil dari N run")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="jumlah module terlambat (self time)")
+    args = parser.parse_args(argv)
+
+    rows, modules = profile_imports(args.script, args.runs)
+    print(format_report(rows, modules, args.top))
+
+
+if __name__ == "__main__":
+    main()
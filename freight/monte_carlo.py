@@ -0,0 +1,106 @@
+import numpy as np
+
+from freight.quantile_sketch import QuantileSketch
+from freight.voyage_cost import broadcast_voyage, cost_voyages
+
+# ==========================================================
+# 🎲 MONTE CARLO VOYAGE P&L
+# - input tidak pasti (port stay, speed, fuel price) diberi
+#   distribusi; sample ditarik per chunk (generator ber-seed)
+# - tiap chunk = 1 call cost_voyages, hasil masuk QuantileSketch
+#   -> memory tetap kecil berapa pun jumlah sample
+# ==========================================================
+
+DEFAULT_SAMPLES = 100_000
+CHUNK_SIZE = 20_000
+MIN_SPEED = 0.1
+
+FIXED = "Fixed"
+UNIFORM = "Uniform"
+TRIANGULAR = "Triangular"
+NORMAL = "Normal"
+DISTRIBUTIONS = [FIXED, UNIFORM, TRIANGULAR, NORMAL]
+
+# input -> (label, field engine)
+SIMULATION_INPUTS = {
+    "port_stay_pol": ("Port Stay POL (Days)", "port_stay_days"),
+    "port_stay_pod": ("Port Stay POD (Days)", "port_stay_days"),
+    "speed_laden": ("Speed Laden (knot)", "speed_laden"),
+    "speed_ballast": ("Speed Ballast (knot)", "speed_ballast"),
+    "price_fuel": ("Fuel Price (Rp/L)", "price_fuel"),
+}
+
+METRICS = {
+    "total_cost": "Total Cost (Rp)",
+    "freight_cost_mt": "Freight Cost (Rp/MT)",
+    "profit_user": "Profit (Rp)",
+}
+
+PERCENTILES = {"P10": 0.1, "P50": 0.5, "P90": 0.9}
+
+
+def draw(rng, distribution, low, mode, high, size):
+    # Normal: mean = mode, sd = (max - min) / 6, dipotong di [min, max]
+    if distribution == UNIFORM:
+        return rng.uniform(low, high, size)
+    if distribution == TRIANGULAR:
+        if low == high:
+            return np.full(size, float(mode))
+        return rng.triangular(low, min(max(mode, low), high), high, size)
+    if distribution == NORMAL:
+        return np.clip(rng.normal(mode, (high - low) / 6, size), low, high)
+    return np.full(size, float(mode))
+
+
+def simulate(base, parts, distributions, samples=DEFAULT_SAMPLES, seed=None,
+             chunk_size=CHUNK_SIZE, additional_costs=None):
+    # base          = input engine 1 voyage (kwargs cost_voyage)
+    # parts         = {"port_stay_pol": .., "port_stay_pod": ..} bagian dari port_stay_days
+    # distributions = {input: (distribution, min, mode, max)}
+    rng = np.random.default_rng(seed)
+    sketches = {metric: QuantileSketch(seed=seed) for metric in METRICS}
+    sums = dict.fromkeys(METRICS, 0.0)
+    losses = 0
+    done = 0
+
+    while done < samples:
+        size = min(chunk_size, samples - done)
+        columns = broadcast_voyage(base, size)
+
+        for name, (distribution, low, mode, high) in distributions.items():
+            if name not in SIMULATION_INPUTS:
+                continue
+            field = SIMULATION_INPUTS[name][1]
+            part = float(parts.get(name, base.get(field, 0)))
+            values = draw(rng, distribution, low, mode, high, size)
+
+            if field.startswith("speed_"):
+                values = np.maximum(values, MIN_SPEED)
+            else:
+                values = np.maximum(values, 0)
+
+            # ganti bagian input ini di field engine dengan nilai sample
+            columns[field] = columns[field] + (values - part)
+
+        result = cost_voyages(columns, additional_costs)
+
+        for metric in METRICS:
+            sketches[metric].update(result[metric])
+            sums[metric] += result[metric].sum()
+        losses += int((result["profit_user"] < 0).sum())
+        done += size
+
+    summary = {
+        metric: dict(
+            {label: sketches[metric].quantile(q) for label, q in PERCENTILES.items()},
+            Mean=float(sums[metric] / samples) if samples else np.nan,
+        )
+        for metric in METRICS
+    }
+
+    return {
+        "samples": samples,
+        "summary": summary,
+        "probability_of_loss": losses / samples if samples else np.nan,
+        "sketches": sketches,
+    }
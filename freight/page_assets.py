@@ -0,0 +1,43 @@
+import os
+import threading
+
+# ==========================================================
+# 🎨 PAGE ASSETS (CSS / head HTML statis)
+# - file dibaca 1x per process, dipakai bareng semua session
+# - reload otomatis kalau file berubah (mtime / size)
+# - Streamlit buang element yang tidak di-render ulang ->
+#   app tetap render 1 element per run, tapi tanpa baca file /
+#   rakit string lagi
+# ==========================================================
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+
+def load_page_asset(path):
+    # file tidak ada -> string kosong (app tetap jalan tanpa styling)
+    stamp = _stamp(path)
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        content = ""
+        if stamp is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+
+        _cache[path] = (stamp, content)
+        return content
@@ -0,0 +1,118 @@
+import heapq
+import re
+import threading
+import weakref
+
+# ==========================================================
+# 🔍 PORT SEARCH INDEX
+# - token prefix + trigram (tahan typo), alias operator:
+#   "SIP, KUALA CENAKU" juga ketemu dengan "kuala cenaku" / "sip"
+# - dibangun sekali per RouteIndex (rebuild otomatis kalau data berubah)
+# ==========================================================
+
+MIN_SIMILARITY = 0.2
+
+_TOKEN = re.compile(r"[A-Z0-9]+")
+
+
+def _normalize(text):
+    return " ".join(_TOKEN.findall((text or "").upper()))
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def port_aliases(port):
+    # "SIP, KUALA CENAKU" -> ["KUALA CENAKU", "SIP"]
+    parts = [_normalize(part) for part in port.split(",")]
+    if len(parts) < 2:
+        return []
+    return [part for part in reversed(parts) if part]
+
+
+class PortSearchIndex:
+
+    def __init__(self, ports):
+        self.ports = list(ports)
+        self.exact = {}
+        self.prefixes = {}
+        self.trigrams = {}
+        self.gram_sets = []
+
+        for i, port in enumerate(self.ports):
+            names = [_normalize(port)] + port_aliases(port)
+
+            for name in names:
+                self.exact.setdefault(name, set()).add(i)
+
+            grams = set()
+            for name in names:
+                grams |= _trigrams(name)
+                for token in name.split():
+                    for k in range(1, len(token) + 1):
+                        self.prefixes.setdefault(token[:k], set()).add(i)
+
+            self.gram_sets.append(frozenset(grams))
+            for gram in grams:
+                self.trigrams.setdefault(gram, []).append(i)
+
+    def search_scored(self, query, limit=10):
+        query = _normalize(query)
+        if not query:
+            return []
+
+        # ===== TRIGRAM (Jaccard) =====
+        # kandidat dari trigram yang jarang saja (trigram umum spt "KUA" skip),
+        # lalu similarity dihitung penuh per kandidat
+        query_grams = _trigrams(query)
+        postings = sorted((self.trigrams.get(gram, ()) for gram in query_grams), key=len)
+        common = max(50, len(self.ports) // 10)
+        selective = [posting for posting in postings if 0 < len(posting) <= common] or postings
+
+        candidates = set()
+        for posting in selective:
+            candidates.update(posting)
+
+        scores = {}
+        for i in candidates:
+            shared = len(query_grams & self.gram_sets[i])
+            similarity = shared / (len(query_grams) + len(self.gram_sets[i]) - shared)
+            if similarity >= MIN_SIMILARITY:
+                scores[i] = similarity
+
+        # ===== PREFIX: semua token query = awalan token port =====
+        matched = None
+        for token in query.split():
+            ids = self.prefixes.get(token, set())
+            matched = ids if matched is None else matched & ids
+        for i in matched or ():
+            scores[i] = scores.get(i, 0) + 1
+
+        # ===== EXACT (nama / alias) =====
+        for i in self.exact.get(query, ()):
+            scores[i] = scores.get(i, 0) + 2
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -len(self.ports[item[0]])))
+        return [(self.ports[i], score) for i, score in best]
+
+    def search(self, query, limit=10):
+        return [port for port, _ in self.search_scored(query, limit)]
+
+
+# ===== SHARED CACHE (per RouteIndex / DistanceMatrix) =====
+_lock = threading.Lock()
+_indexes = weakref.WeakKeyDictionary()
+
+
+def get_port_search_index(route_index):
+    # route_index = object apa saja dengan .ports (RouteIndex / DistanceMatrix)
+    search_index = _indexes.get(route_index)
+    if search_index is None:
+        with _lock:
+            search_index = _indexes.get(route_index)
+            if search_index is None:
+                search_index = PortSearchIndex(route_index.ports)
+                _indexes[route_index] = search_index
+    return search_index
@@ -0,0 +1,76 @@
+import numpy as np
+
+from freight.solvers import breakeven_freight as solve_breakeven_freight
+from freight.voyage_cost import PPH_RATE
+
+# ==========================================================
+# 💹 PROFIT SCENARIO
+# - sumbu margin (% dari freight cost) atau freight rate (Rp/MT)
+# - semua baris dihitung sekali jalan (NumPy), kolom tetap numerik;
+#   format "Rp ..." baru di tampilan (st.dataframe / PDF)
+# - baris breakeven persis (profit = 0 setelah PPH) disisipkan urut
+# ==========================================================
+
+MARGIN = "Margin %"
+FREIGHT = "Freight Rate"
+AXES = [MARGIN, FREIGHT]
+
+COLUMNS = ["Profit %", "Freight (Rp)", "Revenue (Rp)", "PPH 1.2% (Rp)", "Gross Profit (Rp)", "Breakeven"]
+MAX_ROWS = 100_000
+
+
+def scenario_axis(start, stop, step):
+    # stop ikut dihitung kalau pas di grid (0..75 step 5 -> 16 baris)
+    if step <= 0:
+        raise ValueError("Step harus > 0")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count > MAX_ROWS:
+        raise ValueError(f"Scenario maksimal {MAX_ROWS:,} baris")
+    return start + step * np.arange(max(count, 0))
+
+
+def profit_scenarios(total_cost, freight_cost_mt, qyt_cargo, start=0, stop=75, step=5, axis=MARGIN):
+    import pandas as pd
+
+    values = scenario_axis(start, stop, step)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if axis == FREIGHT:
+            freight = values.astype(float)
+            margin = (freight / freight_cost_mt - 1) * 100
+        else:
+            margin = values
+            freight = freight_cost_mt * (1 + margin / 100)
+
+        # breakeven: freight x qty x (1 - PPH) = total cost
+        breakeven_freight = float(solve_breakeven_freight(total_cost, qyt_cargo))
+        breakeven_margin = (breakeven_freight / freight_cost_mt - 1) * 100 if freight_cost_mt else np.nan
+
+    breakeven = np.zeros(len(freight), dtype=bool)
+    if np.isfinite(breakeven_freight):
+        at = int(np.searchsorted(freight, breakeven_freight))
+        freight = np.insert(freight.astype(float), at, breakeven_freight)
+        margin = np.insert(margin.astype(float), at, breakeven_margin)
+        breakeven = np.insert(breakeven, at, True)
+
+    revenue = freight * qyt_cargo
+    pph = revenue * PPH_RATE
+    gross_profit = revenue - total_cost - pph
+
+    return pd.DataFrame(dict(zip(COLUMNS, [margin, freight, revenue, pph, gross_profit, breakeven])))
+
+
+def scenario_title(start, stop, axis=MARGIN):
+    if axis == FREIGHT:
+        return f"Profit Scenario Rp {start:,.0f}–{stop:,.0f}/MT"
+    return f"Profit Scenario {start:g}–{stop:g}%"
+
+
+def format_scenarios(df):
+    # tabel string untuk PDF (format vectorized per kolom)
+    rows = [
+        df["Profit %"].map("{:.1f}%".format) + np.where(df["Breakeven"], " (BEP)", ""),
+        *(("Rp " + df[column].map("{:,.0f}".format)) for column in COLUMNS[1:5]),
+    ]
+    table = [list(row) for row in zip(*rows)]
+    return [COLUMNS[:5]] + table
@@ -0,0 +1,94 @@
+import numpy as np
+
+# ==========================================================
+# 📏 STREAMING QUANTILE SKETCH (KLL)
+# - data masuk per chunk (array), memory O(k log n) berapa pun
+#   jumlah sample; error rank ~ 1.7 / k (k=200 -> ±1% rank)
+# - level h: tiap item mewakili 2^h item asli; level penuh ->
+#   sort, ambil selang-seling (offset random) naik ke level h+1
+# ==========================================================
+
+DEFAULT_K = 200
+_DECAY = 2 / 3
+
+
+class QuantileSketch:
+
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * _DECAY ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        # level baru -> kapasitas level bawah mengecil, ulang sampai semua muat
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+            else:
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(items)
+                # jumlah genap dinaikkan, sisa 1 (kalau ganjil) tetap di level ini
+                keep = items[:len(items) % 2]
+                pairs = items[len(items) % 2:]
+                promoted = pairs[self.rng.integers(2)::2]
+
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                level = 0
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype=float)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+
+        items, cumulative = self._weighted()
+        ranks = qs * cumulative[-1]
+        index = np.searchsorted(cumulative, ranks, side="left")
+        return items[np.clip(index, 0, len(items) - 1)]
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def cdf(self, value):
+        # fraksi item <= value
+        if not self.count:
+            return np.nan
+        items, cumulative = self._weighted()
+        index = np.searchsorted(items, value, side="right")
+        return float(cumulative[index - 1] / cumulative[-1]) if index else 0.0
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
@@ -0,0 +1,156 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from freight.presets import preset_voyage
+from freight.result_cache import input_key
+from freight.route_graph import shortest_path
+from freight.route_index import normalize_port
+from freight.vessel_registry import get_vessel_registry
+from freight.voyage_cost import VOYAGE_FIELDS, cost_voyages
+
+# ==========================================================
+# 📇 RATE CARD (semua route x barge class x cargo type)
+# - 1 call cost_voyages untuk seluruh tabel (vectorized)
+# - ballast: tanpa ballast, balik ke POL, atau ke 1 next port
+#   (direct route dulu, kalau tidak ada shortest path)
+# - barge class + default cargo dari vessel registry (preset bawaan
+#   + class tambahan di vessel_registry.json)
+# - hasil di-cache per RouteIndex (index baru = distance berubah)
+#   + fingerprint class -> otomatis invalid kalau salah satu berubah;
+#   per index LRU MAX_CARDS entry (tanpa batas byte: card besar tetap
+#   di-cache) -> pilihan ballast port tidak numpuk
+# - tanpa freight rate -> kolom per hari = voyage cost / hari (stage
+#   tce engine), bukan TCE earning speed optimizer / route ranking
+# ==========================================================
+
+NO_BALLAST = None
+RETURN_TO_POL = "Return to POL"
+
+COLUMNS = [
+    "Route", "POL", "POD", "Barge Class", "Cargo Type", "Qty",
+    "Distance Laden (NM)", "Distance Ballast (NM)", "Voyage (Days)",
+    "Total Cost", "Freight Cost / Unit", "Voyage Cost / Day",
+]
+
+# rate card yang disimpan per RouteIndex (kombinasi ballast / class / mode)
+MAX_CARDS = 8
+
+_lock = threading.Lock()
+_cards = weakref.WeakKeyDictionary()
+
+
+def rate_card_classes(registry=None):
+    # Custom tidak punya speed -> tidak bisa masuk rate card
+    registry = registry or get_vessel_registry()
+    return [
+        barge for barge, params in registry.classes.items()
+        if registry.cargo.get(barge) and params.get("speed_laden", 0) > 0
+    ]
+
+
+def route_lanes(route_index, next_port):
+    # return array POL, POD, distance laden, distance ballast per lane
+    pairs = sorted(route_index.distances)
+    if next_port not in (NO_BALLAST, RETURN_TO_POL):
+        # arah penting kalau ballast ke next port tertentu
+        pairs += [(pod, pol) for pol, pod in pairs]
+
+    pol = [pair[0] for pair in pairs]
+    pod = [pair[1] for pair in pairs]
+    laden = np.array([route_index.distances[tuple(sorted(pair))] for pair in pairs], dtype=float)
+
+    if next_port is NO_BALLAST:
+        ballast = np.zeros(len(pairs))
+    elif next_port == RETURN_TO_POL:
+        ballast = laden.copy()
+    else:
+        target = normalize_port(next_port)
+        to_next = {}
+        for port in set(pod):
+            distance, path = shortest_path(route_index, port, target)
+            to_next[port] = distance if path or port == target else np.nan
+        ballast = np.array([to_next[port] for port in pod], dtype=float)
+
+    keep = ~np.isnan(ballast)
+    return np.array(pol, dtype=object)[keep], np.array(pod, dtype=object)[keep], laden[keep], ballast[keep]
+
+
+def build_rate_card(route_index, next_port=NO_BALLAST, classes=None, mode=None, registry=None):
+    import pandas as pd
+
+    registry = registry or get_vessel_registry()
+    classes = classes or rate_card_classes(registry)
+    pol, pod, laden, ballast = route_lanes(route_index, next_port)
+
+    # kombinasi (barge, cargo) yang punya default qty
+    combos = [
+        (barge, cargo, qty)
+        for barge in classes
+        for cargo, qty in registry.cargo.get(barge, {}).items()
+        if qty > 0
+    ]
+    n_lanes, n_combos = len(pol), len(combos)
+
+    # baris = lane x combo (lane berulang per combo)
+    lane = np.repeat(np.arange(n_lanes), n_combos)
+    combo = np.tile(np.arange(n_combos), n_lanes)
+
+    columns = {}
+    presets = [preset_voyage(barge, registry.classes) for barge, _, _ in combos]
+    for name in VOYAGE_FIELDS:
+        columns[name] = np.array([preset[name] for preset in presets], dtype=float)[combo]
+    columns["distance_laden"] = laden[lane]
+    columns["distance_ballast"] = ballast[lane]
+    columns["qyt_cargo"] = np.array([qty for _, _, qty in combos], dtype=float)[combo]
+    if mode:
+        columns["mode"] = np.full(len(lane), mode, dtype=object)
+
+    result = cost_voyages(columns)
+
+    return pd.DataFrame({
+        "Route": pol[lane] + " - " + pod[lane],
+        "POL": pol[lane],
+        "POD": pod[lane],
+        "Barge Class": np.array([barge for barge, _, _ in combos], dtype=object)[combo],
+        "Cargo Type": np.array([cargo for _, cargo, _ in combos], dtype=object)[combo],
+        "Qty": columns["qyt_cargo"],
+        "Distance Laden (NM)": columns["distance_laden"],
+        "Distance Ballast (NM)": columns["distance_ballast"],
+        "Voyage (Days)": result["total_voyage_days"],
+        "Total Cost": result["total_cost"],
+        "Freight Cost / Unit": result["freight_cost_mt"],
+        "Voyage Cost / Day": result["tce_per_day"],
+    }, columns=COLUMNS)
+
+
+def get_rate_card(route_index, next_port=NO_BALLAST, classes=None, mode=None, registry=None):
+    # cache per index (distance berubah -> index baru) + fingerprint class registry
+    registry = registry or get_vessel_registry()
+    key = input_key(
+        next_port=next_port, classes=classes, mode=mode,
+        presets={barge: dict(params) for barge, params in registry.classes.items()},
+        cargo={barge: dict(qty) for barge, qty in registry.cargo.items()},
+    )
+    with _lock:
+        cards = _cards.get(route_index)
+        if cards is None:
+            cards = _cards[route_index] = OrderedDict()
+        card = cards.get(key)
+        if card is not None:
+            cards.move_to_end(key)
+            return card
+
+    card = build_rate_card(route_index, next_port, classes, mode, registry)
+    with _lock:
+        cards[key] = card
+        while len(cards) > MAX_CARDS:
+            cards.popitem(last=False)
+    return card
+
+
+def clear_rate_card_cache():
+    with _lock:
+        _cards.clear()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ==========================================================
+# 🗃️ RESULT CACHE (shared semua session, per process)
+# - key = hash canonical semua input voyage (route, preset, mode,
+#   cargo, freight, margin, additional cost, setting scenario)
+# - LRU: dibatasi jumlah entry DAN total byte (ukuran pickle)
+# - counter hit / miss / eviction untuk monitoring
+# - value dipakai bareng antar session -> anggap read-only
+# ==========================================================
+
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def _canonical(value):
+    # float 5500 == int 5500, numpy scalar == python scalar, urutan dict tidak penting
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        value = float(value)
+        return value if np.isfinite(value) else repr(value)
+    return repr(value)
+
+
+def input_key(**inputs):
+    payload = json.dumps(_canonical(inputs), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            # lebih besar dari seluruh cache -> tidak disimpan
+            return False
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+            self._entries[key] = (value, size)
+            self.bytes += size
+
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+# ===== SHARED CACHE (per process) =====
+_lock = threading.Lock()
+_shared = {}
+
+
+def get_result_cache(max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+    with _lock:
+        if "cache" not in _shared:
+            _shared["cache"] = ResultCache(max_entries, max_bytes)
+        return _shared["cache"]
@@ -0,0 +1,122 @@
+import heapq
+import threading
+import weakref
+
+from freight.route_index import normalize_port, route_key
+
+# ==========================================================
+# 🔀 MULTI-LEG DISTANCE ENGINE
+# - shortest path (Dijkstra) di atas RouteIndex
+# - hasil per POL (shortest-path tree) + matrix all-pairs di-cache
+#   per index (WeakKeyDictionary), jadi otomatis ke-invalidate waktu
+#   index di-rebuild (add / delete distance -> index baru)
+# ==========================================================
+
+INF = float("inf")
+
+_lock = threading.Lock()
+_graphs = weakref.WeakKeyDictionary()
+
+
+class _GraphCache:
+
+    def __init__(self, index):
+        # adjacency berbobot, dibangun sekali per index
+        self.adjacency = {
+            port: [(nxt, index.distances[route_key(port, nxt)]) for nxt in neighbours]
+            for port, neighbours in index.neighbours.items()
+        }
+        self.trees = {}
+        self.matrix = None
+
+
+def _graph(index):
+    graph = _graphs.get(index)
+    if graph is None:
+        with _lock:
+            graph = _graphs.get(index)
+            if graph is None:
+                graph = _GraphCache(index)
+                _graphs[index] = graph
+    return graph
+
+
+def _dijkstra(adjacency, source):
+    dist = {source: 0}
+    prev = {}
+    heap = [(0, source)]
+
+    while heap:
+        d, port = heapq.heappop(heap)
+        if d > dist[port]:
+            continue
+
+        for nxt, weight in adjacency.get(port, ()):
+            nd = d + weight
+            if nd < dist.get(nxt, INF):
+                dist[nxt] = nd
+                prev[nxt] = port
+                heapq.heappush(heap, (nd, nxt))
+
+    return dist, prev
+
+
+def _tree(index, source):
+    graph = _graph(index)
+    tree = graph.trees.get(source)
+    if tree is None:
+        tree = _dijkstra(graph.adjacency, source)
+        graph.trees[source] = tree
+    return tree
+
+
+def shortest_path(index, pol, pod):
+    # return (distance, [POL, ..., POD]); (0, []) kalau tidak terhubung
+    pol, pod = normalize_port(pol), normalize_port(pod)
+
+    if not pol or not pod or pol == pod:
+        return 0, []
+
+    # ✅ route langsung di tabel selalu dipakai apa adanya
+    direct = index.distances.get(route_key(pol, pod))
+    if direct is not None:
+        return direct, [pol, pod]
+
+    dist, prev = _tree(index, pol)
+    if pod not in dist:
+        return 0, []
+
+    path = [pod]
+    while path[-1] != pol:
+        path.append(prev[path[-1]])
+    path.reverse()
+
+    return dist[pod], path
+
+
+def reachable_ports(index, pol):
+    pol = normalize_port(pol)
+    if pol not in index.neighbours:
+        return []
+
+    dist, _ = _tree(index, pol)
+    return sorted(port for port in dist if port != pol)
+
+
+def all_pairs_matrix(index):
+    # precompute semua POL sekaligus; matrix[i][j] = INF kalau tidak terhubung
+    # dibangun 1x per index lalu dipakai bareng -> row = tuple (read-only)
+    graph = _graph(index)
+    if graph.matrix is not None:
+        return graph.matrix
+
+    ports = index.ports
+    matrix = []
+    for src in ports:
+        dist, _ = _tree(index, src)
+        matrix.append(tuple(dist.get(dst, INF) for dst in ports))
+
+    with _lock:
+        if graph.matrix is None:
+            graph.matrix = (ports, tuple(matrix))
+    return graph.matrix
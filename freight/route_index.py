@@ -0,0 +1,93 @@
+import threading
+
+# ==========================================================
+# 🧭 ROUTE INDEX
+# - dibangun sekali dari distance store, dipakai semua session
+# - rebuild hanya kalau store.version() berubah
+#   (mtime file JSON / counter di SQLite) atau save_distances nulis
+# ==========================================================
+
+
+def normalize_port(name):
+    return (name or "").strip().upper()
+
+
+def split_route(route):
+    # "PUS, Jambi - Belitung" -> ("PUS, JAMBI", "BELITUNG")
+    parts = route.split(" - ")
+    if len(parts) != 2:
+        return None
+
+    pol, pod = normalize_port(parts[0]), normalize_port(parts[1])
+    if not pol or not pod:
+        return None
+
+    return pol, pod
+
+
+def route_key(pol, pod):
+    # arah tidak penting: A-B == B-A
+    return (pol, pod) if pol <= pod else (pod, pol)
+
+
+class RouteIndex:
+
+    def __init__(self, data):
+        self.distances = {}
+        adjacency = {}
+
+        for route, distance in data.items():
+            pair = split_route(route)
+            if pair is None:
+                continue
+
+            pol, pod = pair
+
+            # sama seperti scan lama: route pertama yang ketemu menang
+            self.distances.setdefault(route_key(pol, pod), distance)
+
+            adjacency.setdefault(pol, set()).add(pod)
+            adjacency.setdefault(pod, set()).add(pol)
+
+        self.neighbours = {port: sorted(ports) for port, ports in adjacency.items()}
+        self.ports = sorted(adjacency)
+
+    def distance(self, pol, pod):
+        return self.distances.get(route_key(normalize_port(pol), normalize_port(pod)), 0)
+
+    def neighbours_of(self, port):
+        return self.neighbours.get(normalize_port(port), [])
+
+    def __len__(self):
+        return len(self.distances)
+
+
+# ===== SHARED CACHE (per process) =====
+_lock = threading.Lock()
+_cache = {}
+
+
+def get_route_index(store):
+    stamp = store.version()
+    entry = _cache.get(store.cache_key)
+
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _lock:
+        # cek lagi, mungkin session lain sudah rebuild
+        entry = _cache.get(store.cache_key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        index = RouteIndex(store.load_all())
+        _cache[store.cache_key] = (stamp, index)
+        return index
+
+
+def invalidate_route_index(store=None):
+    with _lock:
+        if store is None:
+            _cache.clear()
+        else:
+            _cache.pop(store.cache_key, None)
@@ -0,0 +1,104 @@
+import numpy as np
+
+from freight.presets import get_default_cargo, preset_voyage
+from freight.rate_card import NO_BALLAST, route_lanes
+from freight.vessel_registry import get_vessel_registry
+from freight.voyage_cost import cost_voyages, tce_earnings
+
+# ==========================================================
+# 🏆 ROUTE RANKING (seluruh network, 1 barge class)
+# - semua route di tabel distance = 1 call cost_voyages
+# - freight: rate customer (freight_price) atau target margin
+#   (ideal freight) kalau rate customer kosong
+# - filter operator code / max voyage days / min TCE earning = mask
+# - TCE earning = voyage_cost.tce_earnings (sama dengan speed
+#   optimizer & batch), dari revenue basis ranking
+# - top-k pakai np.argpartition (O(n)), cuma k baris yang di-sort
+# ==========================================================
+
+PROFIT = "Profit"
+MARGIN = "Margin (%)"
+TCE = "TCE Earnings / Day"
+RANK_BY = [PROFIT, MARGIN, TCE]
+
+DEFAULT_TOP_K = 20
+
+
+def top_k(values, k):
+    # index k nilai terbesar (urut besar -> kecil); NaN tidak ikut
+    candidates = np.flatnonzero(~np.isnan(values))
+    if k < len(candidates):
+        part = np.argpartition(-values[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+def _operator_mask(ports, operator):
+    # operator / jetty = kode sebelum koma ("PUS, JAMBI" -> "PUS"), harus sama persis
+    codes = np.char.strip(np.char.partition(ports.astype(str), ",")[:, 0])
+    return np.char.upper(codes) == operator.strip().upper()
+
+
+def rank_routes(route_index, barge, cargo, freight_price=0, target_margin=0, margin_type="%",
+                next_port=NO_BALLAST, operator="", max_days=None, min_tce=None,
+                rank_by=PROFIT, k=DEFAULT_TOP_K, mode=None, registry=None):
+    import pandas as pd
+
+    registry = registry or get_vessel_registry()
+    pol, pod, laden, ballast = route_lanes(route_index, next_port)
+    n = len(pol)
+
+    base = preset_voyage(barge, registry.classes)
+    columns = {name: np.full(n, float(value)) for name, value in base.items()}
+    columns.update(
+        distance_laden=laden, distance_ballast=ballast,
+        qyt_cargo=np.full(n, get_default_cargo(barge, cargo, registry.cargo)),
+        freight_price=np.full(n, float(freight_price or 0)),
+        target_margin=np.full(n, float(target_margin or 0)),
+        margin_type=np.full(n, margin_type, dtype=object),
+    )
+    if mode:
+        columns["mode"] = np.full(n, mode, dtype=object)
+
+    result = cost_voyages(columns)
+
+    # rate customer diisi -> pakai itu, kalau tidak pakai ideal freight (target margin)
+    if freight_price:
+        freight, revenue, pph = columns["freight_price"], result["revenue_user"], result["pph_user"]
+    else:
+        freight, revenue, pph = result["ideal_freight"], result["ideal_revenue"], result["ideal_pph"]
+
+    total_cost = result["total_cost"]
+    days = result["total_voyage_days"]
+    profit = revenue - total_cost - pph
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margin = np.where(total_cost > 0, profit / total_cost * 100, np.nan)
+        tce = np.where(days > 0, tce_earnings(revenue, pph, result["tce_base_cost"], days), np.nan)
+
+    keep = np.ones(n, dtype=bool)
+    if operator and operator.strip():
+        keep &= _operator_mask(pol, operator) | _operator_mask(pod, operator)
+    if max_days:
+        keep &= days <= max_days
+    if min_tce is not None:
+        keep &= tce >= min_tce
+
+    metric = {PROFIT: profit, MARGIN: margin, TCE: tce}[rank_by]
+    eligible = np.flatnonzero(keep)
+    best = eligible[top_k(metric[eligible], k)]
+
+    ranking = pd.DataFrame({
+        "Rank": np.arange(1, len(best) + 1),
+        "Route": pol[best] + " - " + pod[best],
+        "Distance Laden (NM)": laden[best],
+        "Distance Ballast (NM)": ballast[best],
+        "Voyage (Days)": days[best],
+        "Freight (Rp/Unit)": freight[best],
+        "Revenue": revenue[best],
+        "Total Cost": total_cost[best],
+        "Profit": profit[best],
+        MARGIN: margin[best],
+        TCE: tce[best],
+    })
+    return ranking, int(keep.sum())
@@ -0,0 +1,97 @@
+import numpy as np
+
+from freight.voyage_cost import broadcast_voyage, cost_voyages
+
+# ==========================================================
+# 📈 SENSITIVITY / TORNADO
+# - tiap input digeser ±range (%) di sejumlah step, input lain tetap
+# - semua titik grid (input x step) = 1 call cost_voyages
+# - port stay / port cost POL & POD digeser terpisah, lalu dijumlah
+#   ke field engine (port_stay_days / port_cost_calls)
+# ==========================================================
+
+# input -> (label, field engine)
+SENSITIVITY_INPUTS = {
+    "price_fuel": ("Fuel Price", "price_fuel"),
+    "consumption": ("Fuel Consumption", "consumption"),
+    "speed_laden": ("Speed Laden", "speed_laden"),
+    "speed_ballast": ("Speed Ballast", "speed_ballast"),
+    "port_stay_pol": ("Port Stay POL", "port_stay_days"),
+    "port_stay_pod": ("Port Stay POD", "port_stay_days"),
+    "port_cost_pol": ("Port Cost POL", "port_cost_calls"),
+    "port_cost_pod": ("Port Cost POD", "port_cost_calls"),
+    "charter": ("Charter / Angsuran", "charter"),
+    "qyt_cargo": ("Cargo Qty", "qyt_cargo"),
+}
+
+METRICS = {"freight_cost_mt": "Freight Cost (Rp/MT)", "profit_user": "Profit (Rp)"}
+
+
+def sensitivity_grid(base, parts, inputs=None, spread=0.2, steps=21, additional_costs=None):
+    # base  = input engine 1 voyage (kwargs cost_voyage)
+    # parts = nilai POL / POD yang ada di dalam field gabungan
+    #         {"port_stay_pol": .., "port_stay_pod": .., "port_cost_pol": .., "port_cost_pod": ..}
+    import pandas as pd
+
+    inputs = [name for name in (inputs or SENSITIVITY_INPUTS) if name in SENSITIVITY_INPUTS]
+    factors = np.linspace(1 - spread, 1 + spread, steps)
+    n = len(inputs) * steps
+
+    columns = broadcast_voyage(base, n)
+
+    values = np.empty(n)
+    for k, name in enumerate(inputs):
+        field = SENSITIVITY_INPUTS[name][1]
+        part = float(parts.get(name, base.get(field, 0)))
+        block = slice(k * steps, (k + 1) * steps)
+
+        # field + part x (f - 1): f = 1 -> persis nilai base
+        columns[field][block] = columns[field][block] + part * (factors - 1)
+        values[block] = part * factors
+
+    result = cost_voyages(columns, additional_costs)
+
+    return pd.DataFrame({
+        "Input": np.repeat([SENSITIVITY_INPUTS[name][0] for name in inputs], steps),
+        "Change (%)": np.tile((factors - 1) * 100, len(inputs)),
+        "Value": values,
+        "total_cost": result["total_cost"],
+        "freight_cost_mt": result["freight_cost_mt"],
+        "profit_user": result["profit_user"],
+    })
+
+
+def tornado_table(grid, metric, base_value):
+    # nilai metric di ujung bawah / atas range per input, urut swing terbesar
+    grouped = grid.groupby("Input", sort=False)
+    table = grouped.agg(
+        low=(metric, "first"),
+        high=(metric, "last"),
+        min=(metric, "min"),
+        max=(metric, "max"),
+    )
+    table["swing"] = table["max"] - table["min"]
+    table["low"] -= base_value
+    table["high"] -= base_value
+    return table.sort_values("swing", ascending=False).reset_index()
+
+
+def tornado_figure(table, title, spread):
+    from matplotlib.figure import Figure
+
+    table = table.iloc[::-1]
+    fig = Figure(figsize=(7, 0.45 * len(table) + 1.2))
+    ax = fig.subplots()
+
+    y = np.arange(len(table))
+    ax.barh(y, table["low"], color="#f97316", label=f"-{spread * 100:.0f}%")
+    ax.barh(y, table["high"], color="#2563eb", label=f"+{spread * 100:.0f}%")
+    ax.axvline(0, color="#0f172a", linewidth=0.8)
+
+    ax.set_yticks(y, table["Input"])
+    ax.set_title(title, fontsize=10)
+    ax.set_xlabel("Δ vs base")
+    ax.xaxis.set_major_formatter(lambda value, _: f"{value:,.0f}")
+    ax.legend(loc="lower right", fontsize=8)
+    fig.tight_layout()
+    return fig
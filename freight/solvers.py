@@ -0,0 +1,104 @@
+import numpy as np
+
+from freight.voyage_cost import PPH_RATE, cost_voyages, voyage_columns
+
+# ==========================================================
+# 🎯 INVERSE SOLVER
+# - cari nilai 1 input supaya target tercapai:
+#   - target margin > 0 -> definisi sama dengan Freight Rate ideal
+#     kalkulator (stage ideal): revenue - total cost = margin, sebelum
+#     PPH; margin = % total cost atau Rp/unit x qty (margin_type)
+#   - selain itu profit setelah PPH = target profit (Rp), 0 = breakeven
+# - model linear di freight, fuel price, qty, charter -> closed form
+#   (engine dievaluasi di x = 0 & x = 1, lalu garis lurus)
+# - port stay tidak linear (FW pakai hari dibulatkan) -> bisection
+#   batched, semua voyage sekaligus
+# - input 1 voyage atau array voyage (sama seperti cost_voyages)
+# ==========================================================
+
+# field engine -> (label, maksimum / minimum)
+SOLVE_FOR = {
+    "freight_price": ("Freight Rate (Rp/MT)", "min"),
+    "price_fuel": ("Max Fuel Price (Rp/L)", "max"),
+    "qyt_cargo": ("Min Cargo Qty", "min"),
+    "charter": ("Max Charter (Rp/Month)", "max"),
+    "port_stay_days": ("Max Port Stay (Days)", "max"),
+}
+
+MAX_STAY_DAYS = 365
+BISECT_ITERATIONS = 40
+
+
+def _profit_gap(columns, additional_costs, target_profit, target_margin):
+    # >= 0 kalau target tercapai
+    result = cost_voyages(columns, additional_costs)
+    total_cost = result["total_cost"]
+    net_profit = result["revenue_user"] - result["pph_user"] - total_cost - target_profit
+
+    margin = np.where(
+        columns["margin_type"] == "%",
+        total_cost * target_margin / 100,
+        target_margin * columns["qyt_cargo"],
+    )
+    return np.where(target_margin > 0, result["revenue_user"] - total_cost - margin, net_profit)
+
+
+def _with(columns, field, value):
+    columns = dict(columns)
+    columns[field] = np.broadcast_to(np.asarray(value, dtype=float), columns[field].shape)
+    return columns
+
+
+def _solve_linear(columns, field, additional_costs, target_profit, target_margin):
+    gap_0 = _profit_gap(_with(columns, field, 0.0), additional_costs, target_profit, target_margin)
+    gap_1 = _profit_gap(_with(columns, field, 1.0), additional_costs, target_profit, target_margin)
+    slope = gap_1 - gap_0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = -gap_0 / slope
+
+    # tidak mungkin dicapai (slope 0 / hasil negatif) -> NaN
+    return np.where((slope != 0) & (value >= 0), value, np.nan)
+
+
+def _solve_stay(columns, additional_costs, target_profit, target_margin):
+    def gap(days):
+        return _profit_gap(_with(columns, "port_stay_days", days), additional_costs, target_profit, target_margin)
+
+    n = len(columns["port_stay_days"])
+    lo = np.zeros(n)
+    hi = np.full(n, float(MAX_STAY_DAYS))
+
+    feasible = gap(lo) >= 0
+    unbounded = gap(hi) >= 0
+
+    # invariant: gap(lo) >= 0 > gap(hi)
+    for _ in range(BISECT_ITERATIONS):
+        mid = (lo + hi) / 2
+        ok = gap(mid) >= 0
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+
+    return np.where(~feasible, np.nan, np.where(unbounded, np.inf, lo))
+
+
+def solve(voyages, field, target_profit=0, target_margin=0, additional_costs=None):
+    # return array nilai field per voyage; NaN = target tidak bisa dicapai
+    if field not in SOLVE_FOR:
+        raise ValueError(f"Solver tidak tersedia untuk {field!r}")
+
+    columns = voyage_columns(voyages)
+    target_profit = np.asarray(target_profit, dtype=float)
+    target_margin = np.asarray(target_margin, dtype=float)
+
+    if field == "port_stay_days":
+        return _solve_stay(columns, additional_costs, target_profit, target_margin)
+    return _solve_linear(columns, field, additional_costs, target_profit, target_margin)
+
+
+def breakeven_freight(total_cost, qyt_cargo, target_profit=0):
+    # closed form langsung dari hasil engine: revenue x (1 - PPH) = cost + target profit
+    total_cost = np.asarray(total_cost, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required = target_profit + total_cost
+        return np.where(np.asarray(qyt_cargo) > 0, required / (qyt_cargo * (1 - PPH_RATE)), np.nan)
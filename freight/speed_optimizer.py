@@ -0,0 +1,108 @@
+import numpy as np
+
+from freight.voyage_cost import broadcast_voyage, cost_voyages
+
+# ==========================================================
+# ⚡ ECONOMIC SPEED
+# - consumption (L/hr) ikut speed: cubic law atau titik user
+#   (consumption_curve di preset_params)
+# - curve di-anchor ke input sidebar: consumption @ speed laden /
+#   ballast yang dipakai -> speed sekarang = kalkulasi utama persis
+# - sweep semua pasangan speed laden x ballast = 1 call cost_voyages
+# - hasil: pasangan cost/MT termurah, TCE earning tertinggi, dan
+#   Pareto frontier voyage days vs total cost
+# ==========================================================
+
+CUBIC = "cubic"
+POINTS = "points"
+DEFAULT_CURVE = {"model": CUBIC, "exponent": 3}
+TCE = "TCE Earnings / Day"
+
+
+def consumption_at(curve, speeds, consumption, ref_speed):
+    # (ref_speed, consumption) = titik anchor (input sidebar); curve cuma
+    # kasih bentuk -> consumption_at(curve, ref_speed, ...) == consumption
+    curve = curve or DEFAULT_CURVE
+    speeds = np.asarray(speeds, dtype=float)
+    if not ref_speed:
+        return np.full(speeds.shape, float(consumption))
+
+    if curve.get("model") == POINTS:
+        points = np.asarray(sorted(curve["points"]), dtype=float)
+        at_ref = np.interp(ref_speed, points[:, 0], points[:, 1])
+        if not at_ref:
+            return np.full(speeds.shape, float(consumption))
+        return consumption * np.interp(speeds, points[:, 0], points[:, 1]) / at_ref
+
+    return consumption * (speeds / ref_speed) ** curve.get("exponent", 3)
+
+
+def speed_sweep(base, curve, laden_speeds, ballast_speeds, additional_costs=None):
+    import pandas as pd
+
+    laden, ballast = np.meshgrid(
+        np.asarray(laden_speeds, dtype=float), np.asarray(ballast_speeds, dtype=float), indexing="ij"
+    )
+    laden, ballast = laden.ravel(), ballast.ravel()
+
+    columns = broadcast_voyage(base, len(laden))
+    consumption = base.get("consumption", 0)
+    columns["speed_laden"] = laden
+    columns["speed_ballast"] = ballast
+    # 1 consumption sidebar dipakai laden & ballast -> anchor tiap leg di speed-nya
+    columns["consumption"] = consumption_at(curve, laden, consumption, base.get("speed_laden", 0))
+    columns["consumption_ballast"] = consumption_at(curve, ballast, consumption, base.get("speed_ballast", 0))
+
+    result = cost_voyages(columns, additional_costs)
+
+    return pd.DataFrame({
+        "Speed Laden": laden,
+        "Speed Ballast": ballast,
+        "Consumption Laden (L/hr)": columns["consumption"],
+        "Consumption Ballast (L/hr)": columns["consumption_ballast"],
+        "Voyage (Days)": result["total_voyage_days"],
+        "Total Cost": result["total_cost"],
+        "Freight Cost / MT": result["freight_cost_mt"],
+        TCE: result["tce_earnings_per_day"],
+    })
+
+
+def pareto_frontier(sweep, x="Voyage (Days)", y="Total Cost"):
+    # titik yang tidak bisa lebih cepat tanpa lebih mahal
+    ordered = sweep.sort_values([x, y], kind="stable")
+    best = np.minimum.accumulate(ordered[y].to_numpy())
+    keep = np.r_[True, ordered[y].to_numpy()[1:] < best[:-1]]
+    return ordered[keep].reset_index(drop=True)
+
+
+def optimize_speed(base, curve, laden_speeds, ballast_speeds, additional_costs=None):
+    sweep = speed_sweep(base, curve, laden_speeds, ballast_speeds, additional_costs)
+    return {
+        "sweep": sweep,
+        "min_cost": sweep.loc[sweep["Freight Cost / MT"].idxmin()],
+        "max_tce": sweep.loc[sweep[TCE].idxmax()],
+        "frontier": pareto_frontier(sweep),
+    }
+
+
+def frontier_figure(optimum, current=None):
+    from matplotlib.figure import Figure
+
+    sweep, frontier = optimum["sweep"], optimum["frontier"]
+    fig = Figure(figsize=(7, 3.6))
+    ax = fig.subplots()
+
+    ax.scatter(sweep["Voyage (Days)"], sweep["Total Cost"], s=4, color="#cbd5e1", label="Speed pairs")
+    ax.plot(frontier["Voyage (Days)"], frontier["Total Cost"], color="#f97316", linewidth=1.8, label="Pareto frontier")
+
+    best = optimum["min_cost"]
+    ax.scatter([best["Voyage (Days)"]], [best["Total Cost"]], color="#16a34a", zorder=3, label="Min cost / MT")
+    if current is not None:
+        ax.scatter([current["Voyage (Days)"]], [current["Total Cost"]], color="#2563eb", marker="x", zorder=3, label="Current")
+
+    ax.set_xlabel("Voyage (Days)")
+    ax.set_ylabel("Total Cost (Rp)")
+    ax.yaxis.set_major_formatter(lambda value, _: f"{value / 1e6:,.0f} jt")
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from collections import ChainMap
+from types import MappingProxyType
+
+from freight.presets import cargo_qty_default, preset_params
+
+# ==========================================================
+# 🚢 VESSEL REGISTRY (file lokal, shared read-only)
+# - vessel_registry.json:
+#     {"classes": {"300 ft": {...}},                  <- tambah / ubah class
+#      "vessels": {"BG Example 01": {"class": "300 ft",
+#                  "params": {"crew": ...}, "cargo": {"Coal (MT)": 7600}}}}
+# - class bawaan = preset_params / cargo_qty_default (freight/presets.py)
+# - di-load lazy + reload kalau file berubah, 1 object untuk semua
+#   session (MappingProxyType -> tidak bisa diubah)
+# - session cuma simpan ref (nama vessel / class) + dict override;
+#   params() = ChainMap(override, vessel, class) -> copy-on-write
+# ==========================================================
+
+DEFAULT_PATH = "vessel_registry.json"
+
+
+def _frozen(mapping):
+    return MappingProxyType(dict(mapping))
+
+
+class VesselRegistry:
+
+    def __init__(self, data):
+        classes = {name: dict(params) for name, params in preset_params.items()}
+        for name, params in data.get("classes", {}).items():
+            classes.setdefault(name, {}).update(params)
+
+        cargo = {name: dict(qty) for name, qty in cargo_qty_default.items()}
+        for name, qty in data.get("cargo", {}).items():
+            cargo.setdefault(name, {}).update(qty)
+
+        vessels = {}
+        for name, vessel in data.get("vessels", {}).items():
+            barge = vessel.get("class")
+            if barge not in classes:
+                # class tidak dikenal -> vessel di-skip, registry tetap jalan
+                continue
+            vessels[name] = _frozen({
+                "class": barge,
+                "params": _frozen(vessel.get("params", {})),
+                "cargo": _frozen(vessel.get("cargo", {})),
+            })
+
+        self.classes = _frozen({name: _frozen(params) for name, params in classes.items()})
+        self.cargo = _frozen({name: _frozen(qty) for name, qty in cargo.items()})
+        self.vessels = _frozen(vessels)
+
+    def vessels_of(self, barge):
+        return sorted(name for name, vessel in self.vessels.items() if vessel["class"] == barge)
+
+    def class_of(self, ref):
+        vessel = self.vessels.get(ref)
+        return vessel["class"] if vessel is not None else ref
+
+    def base(self, ref):
+        # nilai registry (tanpa override session), read-only
+        vessel = self.vessels.get(ref)
+        barge = self.class_of(ref)
+        maps = [self.classes.get(barge, MappingProxyType({}))]
+        if vessel is not None:
+            maps.insert(0, vessel["params"])
+        return ChainMap(*maps)
+
+    def params(self, ref, overrides=None):
+        # tulis ke hasil ini -> masuk ke overrides, registry tidak berubah
+        base = self.base(ref)
+        return base.new_child({} if overrides is None else overrides)
+
+    def cargo_qty(self, ref, cargo_type):
+        vessel = self.vessels.get(ref)
+        if vessel is not None and cargo_type in vessel["cargo"]:
+            return vessel["cargo"][cargo_type]
+        return self.cargo.get(self.class_of(ref), {}).get(cargo_type, 0)
+
+
+def diff_overrides(base, values, default=0):
+    # cuma simpan yang beda dari registry (key yang tidak ada = default)
+    return {name: value for name, value in values.items() if base.get(name, default) != value}
+
+
+# ===== SHARED CACHE (reload kalau file berubah) =====
+_lock = threading.Lock()
+_cache = {}
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
+
+def get_vessel_registry(path=DEFAULT_PATH):
+    stamp = _stamp(path)
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        data = {}
+        if stamp is not None:
+            with open(path, "r") as f:
+                data = json.load(f)
+
+        registry = VesselRegistry(data)
+        _cache[path] = (stamp, registry)
+        return registry
+
+
+def save_vessel(path, name, barge, params, cargo=None):
+    # tambah / update 1 vessel (tulis atomic: .tmp lalu rename)
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Nama vessel kosong")
+    if barge not in get_vessel_registry(path).classes:
+        raise ValueError(f"Barge class tidak dikenal: {barge!r}")
+
+    with _lock:
+        data = {}
+        if _stamp(path) is not None:
+            with open(path, "r") as f:
+                data = json.load(f)
+
+        vessel = {"class": barge, "params": dict(params)}
+        if cargo:
+            vessel["cargo"] = dict(cargo)
+        data.setdefault("vessels", {})[name] = vessel
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
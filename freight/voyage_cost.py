@@ -0,0 +1,261 @@
+import numpy as np
+
+from freight.additional_costs import compile_additional_costs
+from freight.voyage_legs import PORT_FUEL_PER_DAY
+
+# ==========================================================
+# 💰 VOYAGE COST ENGINE (tanpa Streamlit)
+# - input = kolom per voyage: DataFrame, NumPy structured array,
+#   atau dict {nama: array}; kolom yang tidak ada pakai default
+# - semua voyage dihitung sekali jalan (vectorized), urutan operasi
+#   sama persis dengan kalkulasi lama -> hasil 1 voyage identik
+# - cost_voyage() = 1 voyage dari nilai scalar (dipakai app.py)
+# ==========================================================
+
+PPH_RATE = 0.012
+
+OWNER = "Owner"
+CHARTER = "Charter"
+
+# kolom input -> default
+VOYAGE_FIELDS = {
+    "distance_laden": 0.0, "distance_ballast": 0.0,
+    "speed_laden": 0.0, "speed_ballast": 0.0,
+    "consumption": 0.0, "price_fuel": 0.0,
+    # L/hr ballast kalau beda dengan laden (curve speed); NaN = sama dengan consumption
+    "consumption_ballast": np.nan,
+    "consumption_fw": 0.0, "price_fw": 0.0,
+    "charter": 0.0, "crew": 0.0, "insurance": 0.0,
+    "docking": 0.0, "maintenance": 0.0, "certificate": 0.0,
+    "premi_nm": 0.0, "other_cost": 0.0,
+    "opex_office": 0.0, "depreciation_kapal": 0.0,
+    # total semua port call (POL + POD, atau semua call di rotation)
+    "port_cost_calls": 0.0, "port_stay_days": 0.0, "asist_tug": 0.0,
+    "qyt_cargo": 0.0, "freight_price": 0.0, "target_margin": 0.0,
+}
+
+# kolom text
+VOYAGE_MODES = {"mode": OWNER, "margin_type": "%"}
+
+
+def _columns(voyages):
+    if hasattr(voyages, "columns"):
+        names = set(voyages.columns)
+        n = len(voyages)
+    elif getattr(voyages, "dtype", None) is not None and voyages.dtype.names:
+        names = set(voyages.dtype.names)
+        n = len(voyages)
+    else:
+        names = set(voyages)
+        sizes = {np.size(voyages[name]) for name in names if np.ndim(voyages[name])}
+        n = max(sizes) if sizes else 1
+
+    def column(name, default, dtype):
+        if name not in names:
+            return np.full(n, default, dtype=dtype)
+        values = np.asarray(voyages[name])
+        if dtype is float:
+            values = values.astype(float)
+        return np.broadcast_to(values, (n,))
+
+    return column, n
+
+
+def voyage_columns(voyages):
+    # input apa saja (DataFrame / structured array / dict) -> dict kolom lengkap (copy)
+    column, _ = _columns(voyages)
+    columns = {name: np.array(column(name, default, float)) for name, default in VOYAGE_FIELDS.items()}
+    for name, default in VOYAGE_MODES.items():
+        columns[name] = np.array(column(name, default, object))
+    return columns
+
+
+def broadcast_voyage(base, n):
+    # 1 voyage (kwargs cost_voyage) -> n baris kolom, siap digeser per baris
+    columns = {name: np.full(n, float(base.get(name, default))) for name, default in VOYAGE_FIELDS.items()}
+    for name, default in VOYAGE_MODES.items():
+        columns[name] = np.full(n, base.get(name, default), dtype=object)
+    return columns
+
+
+def _where(condition, value):
+    # ganti "x if cond else 0"
+    return np.where(condition, value, 0.0)
+
+
+# ===== STAGE MODEL =====
+# tiap stage = 1 fungsi; nama parameter = node yang dibaca (input / hasil
+# stage lain), output = node yang ditulis. cost_voyages jalankan semua
+# stage berurutan; freight/voyage_graph.py cuma jalankan yang kena ubah.
+STAGES = []
+
+
+def _stage(*outputs):
+    def register(fn):
+        fn.outputs = outputs
+        fn.inputs = fn.__code__.co_varnames[:fn.__code__.co_argcount]
+        STAGES.append(fn)
+        return fn
+    return register
+
+
+@_stage("laden_hours", "ballast_hours", "laden_days", "ballast_days", "sailing_time",
+        "total_voyage_days", "total_voyage_days_round")
+def sailing(distance_laden, distance_ballast, speed_laden, speed_ballast, port_stay_days):
+    # leg kosong (distance 0) tidak dihitung, speed 0 tidak masalah
+    laden_hours = np.divide(distance_laden, speed_laden,
+                            out=np.zeros(np.shape(distance_laden)), where=distance_laden != 0)
+    ballast_hours = np.divide(distance_ballast, speed_ballast,
+                              out=np.zeros(np.shape(distance_ballast)), where=distance_ballast != 0)
+
+    sailing_time = laden_hours + ballast_hours
+    total_voyage_days = (sailing_time / 24) + port_stay_days
+    total_voyage_days_round = np.floor(total_voyage_days) + (total_voyage_days % 1 >= 0.5)
+    return (laden_hours, ballast_hours, laden_hours / 24, ballast_hours / 24, sailing_time,
+            total_voyage_days, total_voyage_days_round)
+
+
+@_stage("total_consumption_fuel", "cost_fuel")
+def fuel(laden_hours, ballast_hours, sailing_time, consumption, consumption_ballast, port_stay_days, price_fuel):
+    sailing_fuel = np.where(
+        np.isnan(consumption_ballast),
+        sailing_time * consumption,
+        laden_hours * consumption + ballast_hours * consumption_ballast
+    )
+    total_consumption_fuel = sailing_fuel + (port_stay_days * PORT_FUEL_PER_DAY)
+    return total_consumption_fuel, total_consumption_fuel * price_fuel
+
+
+@_stage("total_consumption_fw", "cost_fw")
+def fresh_water(consumption_fw, total_voyage_days_round, price_fw):
+    total_consumption_fw = consumption_fw * total_voyage_days_round
+    return total_consumption_fw, total_consumption_fw * price_fw
+
+
+@_stage("charter_cost", "crew_cost", "insurance_cost", "docking_cost", "maintenance_cost", "certificate_cost",
+        "total_general_overhead", "depreciation_cost")
+def time_costs(total_voyage_days, mode, charter, crew, insurance, docking, maintenance, certificate,
+               opex_office, depreciation_kapal):
+    owner = mode == OWNER
+    return (
+        (charter / 30) * total_voyage_days,
+        *(_where(owner, (item / 30) * total_voyage_days) for item in (crew, insurance, docking, maintenance, certificate)),
+        (opex_office / 30) * total_voyage_days,
+        (depreciation_kapal / 30) * total_voyage_days,
+    )
+
+
+@_stage("premi_cost")
+def premi(distance_laden, premi_nm):
+    return distance_laden * premi_nm,
+
+
+@_stage("port_cost")
+def port(port_cost_calls, asist_tug):
+    return port_cost_calls + asist_tug,
+
+
+@_stage("additional_total", "additional_breakdown")
+def additional(total_voyage_days, qyt_cargo, additional_costs):
+    return compile_additional_costs(additional_costs).evaluate(total_voyage_days, qyt_cargo)
+
+
+@_stage("total_cost", "freight_cost_mt")
+def total(charter_cost, crew_cost, insurance_cost, docking_cost, maintenance_cost, certificate_cost,
+          total_general_overhead, depreciation_cost, premi_cost, port_cost, cost_fuel, cost_fw, other_cost,
+          additional_total, qyt_cargo):
+    total_cost = 0
+    for item in (
+        charter_cost, crew_cost, insurance_cost, docking_cost, maintenance_cost,
+        certificate_cost, total_general_overhead, depreciation_cost,
+        premi_cost, port_cost, cost_fuel, cost_fw, other_cost, additional_total,
+    ):
+        total_cost = total_cost + item
+    return total_cost, _where(qyt_cargo > 0, total_cost / qyt_cargo)
+
+
+@_stage("margin_value_rp", "margin_value_pct", "ideal_freight", "ideal_revenue", "ideal_pph", "ideal_profit")
+def ideal(freight_cost_mt, total_cost, qyt_cargo, target_margin, margin_type):
+    # target margin % (dari freight cost) atau Rp / MT
+    margin_pct = margin_type == "%"
+    has_target = target_margin > 0
+    margin_rp_pct = freight_cost_mt * (target_margin / 100)
+
+    ideal_freight = np.where(margin_pct, freight_cost_mt * (1 + target_margin / 100), freight_cost_mt + target_margin)
+    ideal_freight = _where(has_target, ideal_freight)
+    ideal_revenue = ideal_freight * qyt_cargo
+    ideal_pph = ideal_revenue * PPH_RATE
+
+    return (
+        np.where(margin_pct, _where(freight_cost_mt != 0, margin_rp_pct), target_margin),
+        _where(has_target, np.where(margin_pct, target_margin, (target_margin / freight_cost_mt) * 100)),
+        ideal_freight,
+        ideal_revenue,
+        ideal_pph,
+        _where(has_target, ideal_revenue - total_cost - ideal_pph),
+    )
+
+
+@_stage("revenue_user", "pph_user", "profit_user", "profit_percent_user")
+def revenue(freight_price, qyt_cargo, total_cost):
+    # freight customer
+    revenue_user = freight_price * qyt_cargo
+    pph_user = revenue_user * PPH_RATE
+    profit_user = revenue_user - total_cost - pph_user
+    return revenue_user, pph_user, profit_user, _where(total_cost > 0, profit_user / total_cost * 100)
+
+
+def tce_earnings(revenue, pph, tce_base_cost, total_voyage_days):
+    # TCE earning = (revenue net PPH - voyage cost) / hari; dipakai speed
+    # optimizer, route ranking & batch ("TCE Earnings / Day") supaya sama
+    return _where(total_voyage_days > 0, (revenue - pph - tce_base_cost) / total_voyage_days)
+
+
+@_stage("tce_base_cost", "tce_per_day", "tce_per_month", "tce_earnings_per_day")
+def tce(cost_fuel, cost_fw, port_cost, premi_cost, total_voyage_days, revenue_user, pph_user):
+    # tce_per_day = voyage cost / hari (kartu TCE di app & PDF)
+    tce_base_cost = cost_fuel + cost_fw + port_cost + premi_cost
+    tce_per_day = _where(total_voyage_days > 0, tce_base_cost / total_voyage_days)
+    return (tce_base_cost, tce_per_day, tce_per_day * 30,
+            tce_earnings(revenue_user, pph_user, tce_base_cost, total_voyage_days))
+
+
+# node hasil engine (urutan output cost_voyages); other_cost = input apa adanya
+RESULTS = [
+    name for stage in STAGES for name in stage.outputs if name not in ("laden_hours", "ballast_hours")
+] + ["other_cost"]
+
+
+def run_stage(stage, values):
+    # values = dict node -> nilai; return dict output stage
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return dict(zip(stage.outputs, stage(*(values[name] for name in stage.inputs))))
+
+
+def cost_voyages(voyages, additional_costs=None):
+    column, _ = _columns(voyages)
+    values = {name: column(name, default, float) for name, default in VOYAGE_FIELDS.items()}
+    for name, default in VOYAGE_MODES.items():
+        values[name] = column(name, default, object)
+    values["additional_costs"] = additional_costs
+
+    for stage in STAGES:
+        values.update(run_stage(stage, values))
+
+    return {name: values[name] for name in RESULTS}
+
+
+def cost_voyage(additional_costs=None, **inputs):
+    # 1 voyage: scalar in, scalar out (float)
+    return scalar_result(cost_voyages({name: [value] for name, value in inputs.items()}, additional_costs))
+
+
+def scalar_result(result):
+    # hasil 1 voyage (array panjang 1) -> float
+    result = dict(result)
+    breakdown = result.pop("additional_breakdown")
+    result = {name: float(values[0]) for name, values in result.items()}
+    result["additional_breakdown"] = {
+        name: float(values[0]) for name, values in breakdown.items() if values[0] > 0
+    }
+    return result
@@ -0,0 +1,130 @@
+import numpy as np
+
+from freight.additional_costs import compile_additional_costs
+from freight.voyage_cost import RESULTS, STAGES, VOYAGE_FIELDS, VOYAGE_MODES, run_stage, scalar_result
+
+# ==========================================================
+# 🧮 VOYAGE DEPENDENCY GRAPH (incremental)
+# - node input (speed_laden, price_fuel, qyt_cargo, ...) -> stage
+#   engine voyage_cost.STAGES -> node hasil (sailing_time, cost_fuel,
+#   total_cost, tce_per_day, ...)
+# - set() input yang berubah -> stage downstream ditandai dirty;
+#   get() / result() cuma hitung ulang stage dirty yang dibutuhkan
+# - object graph disimpan di st.session_state -> nilai node tetap
+#   ada antar rerun; last_run = stage apa yang dihitung & kenapa
+# ==========================================================
+
+INPUTS = list(VOYAGE_FIELDS) + list(VOYAGE_MODES) + ["additional_costs"]
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) and a.dtype == object:
+        return a.tolist() == b.tolist()
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b, equal_nan=True)
+    return a == b
+
+
+class VoyageGraph:
+
+    def __init__(self, stages=STAGES):
+        self.stages = list(stages)
+        self.producer = {name: stage for stage in self.stages for name in stage.outputs}
+
+        # node -> stage yang membaca node itu
+        self.readers = {}
+        for stage in self.stages:
+            for name in stage.inputs:
+                self.readers.setdefault(name, []).append(stage)
+
+        self.values = {name: np.array([default]) for name, default in VOYAGE_FIELDS.items()}
+        self.values.update({name: np.array([default], dtype=object) for name, default in VOYAGE_MODES.items()})
+        self.values["additional_costs"] = compile_additional_costs(None)
+
+        # stage dirty -> input yang bikin dirty (alasan recompute)
+        self.dirty = {stage: {"initial"} for stage in self.stages}
+        self.last_run = []
+
+    # ===== INPUT =====
+    def set(self, **inputs):
+        # return nama input yang benar-benar berubah
+        changed = []
+        for name, value in inputs.items():
+            if name not in INPUTS:
+                raise KeyError(f"Input tidak dikenal: {name!r}")
+            if name == "additional_costs":
+                value = compile_additional_costs(value)
+            else:
+                value = np.array([value], dtype=object if name in VOYAGE_MODES else float)
+
+            if not _same(self.values[name], value):
+                self.values[name] = value
+                changed.append(name)
+                for stage in self.downstream_stages(name):
+                    self.dirty.setdefault(stage, set()).add(name)
+        return changed
+
+    def load(self, additional_costs=None, **inputs):
+        # 1 voyage lengkap (kwargs cost_voyage); input yang tidak diisi kembali ke default
+        values = dict(VOYAGE_FIELDS, **VOYAGE_MODES)
+        values.update(inputs)
+        return self.set(additional_costs=additional_costs, **values)
+
+    # ===== INTROSPECTION =====
+    def downstream_stages(self, name):
+        # semua stage yang (langsung / tidak langsung) bergantung ke node ini
+        found, stack = [], [name]
+        while stack:
+            for stage in self.readers.get(stack.pop(), []):
+                if stage not in found:
+                    found.append(stage)
+                    stack.extend(stage.outputs)
+        return sorted(found, key=self.stages.index)
+
+    def downstream(self, name):
+        return [output for stage in self.downstream_stages(name) for output in stage.outputs]
+
+    def upstream(self, name):
+        # input yang mempengaruhi node ini
+        stage = self.producer.get(name)
+        if stage is None:
+            return [name] if name in INPUTS else []
+        found = []
+        for dependency in stage.inputs:
+            for root in self.upstream(dependency):
+                if root not in found:
+                    found.append(root)
+        return found
+
+    def is_stale(self, name):
+        return self.producer.get(name) in self.dirty
+
+    # ===== EVALUATE =====
+    def _required(self, names):
+        required, stack = set(), list(names)
+        while stack:
+            stage = self.producer.get(stack.pop())
+            if stage is not None and stage not in required:
+                required.add(stage)
+                stack.extend(stage.inputs)
+        return required
+
+    def evaluate(self, names=RESULTS):
+        run = []
+        required = self._required(names)
+        for stage in self.stages:
+            if stage in required and stage in self.dirty:
+                self.values.update(run_stage(stage, self.values))
+                run.append({"stage": stage.__name__, "outputs": list(stage.outputs),
+                            "because": sorted(self.dirty.pop(stage))})
+        self.last_run = run
+        return {name: self.values[name] for name in names}
+
+    def get(self, name):
+        return self.evaluate([name])[name]
+
+    def result(self):
+        # format sama dengan voyage_cost.cost_voyage (float per node)
+        return scalar_result(self.evaluate())
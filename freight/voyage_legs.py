@@ -0,0 +1,129 @@
+import numpy as np
+
+from freight.geo_estimate import DEFAULT_DETOUR_FACTOR, estimate_distance
+from freight.route_graph import shortest_path
+from freight.route_index import normalize_port, route_key
+
+# ==========================================================
+# 🧭 MULTI-STOP ROTATION (N leg)
+# - port call berurutan, tiap call punya port stay & port cost
+# - tiap leg laden / ballast (speed laden / speed ballast)
+# - distance semua leg di-resolve sekali jalan, hitungan per leg
+#   (jam, hari, fuel, premi) vectorized NumPy
+# - matrix (DistanceMatrix, mmap) diisi -> route langsung dari situ;
+#   route_index boleh fungsi tanpa argumen -> RouteIndex baru dibangun
+#   kalau memang perlu multi-leg
+# ==========================================================
+
+# fuel di port (L/day), sama dengan kalkulasi lama
+PORT_FUEL_PER_DAY = 120
+
+LADEN = "Laden"
+BALLAST = "Ballast"
+
+
+def _index(route_index):
+    return route_index() if callable(route_index) else route_index
+
+
+def resolve_leg_distances(route_index, ports, matrix=None):
+    # batch lookup semua leg; NaN kalau route tidak ada di tabel
+    if matrix is not None:
+        return matrix.lookup(ports[:-1], ports[1:])
+
+    ports = [normalize_port(port) for port in ports]
+    route_index = _index(route_index)
+    distances = route_index.distances
+    return np.array(
+        [distances.get(route_key(a, b), np.nan) for a, b in zip(ports[:-1], ports[1:])],
+        dtype=float
+    )
+
+
+def resolve_route(route_index, coords, pol, pod, detour_factor=DEFAULT_DETOUR_FACTOR, matrix=None):
+    # return (distance, path, estimated)
+    # route langsung dulu, kalau tidak ada -> shortest path via leg lain
+    if matrix is not None and normalize_port(pol) != normalize_port(pod):
+        direct = matrix.lookup([pol], [pod])[0]
+        if not np.isnan(direct):
+            return matrix.distance(pol, pod), [normalize_port(pol), normalize_port(pod)], False
+
+    distance, path = shortest_path(_index(route_index), pol, pod)
+    if path:
+        return distance, path, False
+
+    # 🌐 tidak ada sama sekali -> estimasi great-circle x detour factor
+    estimate = estimate_distance(coords, pol, pod, detour_factor)
+    if estimate is None:
+        return 0, [], False
+
+    return round(estimate), [normalize_port(pol), normalize_port(pod)], True
+
+
+def resolve_rotation(route_index, coords, ports, detour_factor=DEFAULT_DETOUR_FACTOR, matrix=None):
+    # semua leg di-lookup sekali jalan; yang tidak ada di tabel -> resolve_route
+    distances = resolve_leg_distances(route_index, ports, matrix)
+    paths, estimated = [], []
+
+    for i, (a, b) in enumerate(zip(ports[:-1], ports[1:])):
+        if np.isnan(distances[i]):
+            distances[i], path, is_estimate = resolve_route(route_index, coords, a, b, detour_factor)
+        else:
+            path, is_estimate = [normalize_port(a), normalize_port(b)], False
+
+        paths.append(path)
+        estimated.append(is_estimate)
+
+    return distances, paths, estimated
+
+
+def compute_legs(distances, laden, speed_laden, speed_ballast, consumption, price_fuel, premi_nm):
+    distances = np.asarray(distances, dtype=float)
+    laden = np.asarray(laden, dtype=bool)
+
+    speeds = np.where(laden, float(speed_laden), float(speed_ballast))
+    if np.any(speeds <= 0):
+        raise ValueError("Speed laden / ballast harus > 0")
+
+    hours = distances / speeds
+    fuel_ltr = hours * consumption
+
+    return {
+        "distance": distances,
+        "laden": laden,
+        "speed": speeds,
+        "hours": hours,
+        "days": hours / 24,
+        "fuel_ltr": fuel_ltr,
+        "fuel_cost": fuel_ltr * price_fuel,
+        "premi": np.where(laden, distances * premi_nm, 0.0),
+    }
+
+
+def summarize_rotation(legs, port_stays, port_costs):
+    laden = legs["laden"]
+    return {
+        "sailing_time": legs["hours"].sum(),
+        "laden_distance": legs["distance"][laden].sum(),
+        "ballast_distance": legs["distance"][~laden].sum(),
+        "laden_days": legs["days"][laden].sum(),
+        "ballast_days": legs["days"][~laden].sum(),
+        "port_stay_days": sum(port_stays),
+        "port_cost": sum(port_costs),
+    }
+
+
+def rotation_dataframe(ports, legs):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "Leg": np.arange(1, len(legs["distance"]) + 1),
+        "From": ports[:-1],
+        "To": ports[1:],
+        "Type": np.where(legs["laden"], LADEN, BALLAST),
+        "Distance (NM)": legs["distance"],
+        "Speed (knot)": legs["speed"],
+        "Sailing (Days)": legs["days"],
+        "Fuel (Ltr)": legs["fuel_ltr"],
+        "Fuel Cost (Rp)": legs["fuel_cost"],
+    })